@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from gymtracking import calendar
+
+# Statut de chaque jour du calendrier
+NOT_PLANNED = 0  # Avant le début du programme, à venir, ou historique non chargé
+TRAINED = 1
+SKIPPED = 2
+REST = 3
+MISSED = 4
+
+STATUS_LABELS = {
+    NOT_PLANNED: "—",
+    TRAINED: "Entraînement",
+    SKIPPED: "Skippé",
+    REST: "Repos",
+    MISSED: "Manqué",
+}
+
+PLANNED = (TRAINED, SKIPPED, MISSED)
+
+def _day_mask(dates, first_day, n_days):
+    """Tableau booléen des jours de la plage présents dans `dates` (bincount)"""
+    if not dates:
+        return np.zeros(n_days, dtype=bool)
+    idx = (np.array(list(dates), dtype='datetime64[D]') - first_day).astype(np.int64)
+    idx = idx[(idx >= 0) & (idx < n_days)]
+    return np.bincount(idx, minlength=n_days) > 0
+
+def rest_cycle_days(programme):
+    """Jours du cycle prévus en repos"""
+    return [day for day, program_day in programme.days.items() if program_day.is_rest]
+
+def day_status(start, end, today, session_dates, skipped_days, program_start, programme, known_from=None):
+    """
+    Statut de chaque jour de [start, end], calculé sur des tableaux de
+    jours (aucune boucle par jour). Retourne (jours, statuts).
+    """
+    days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+    n_days = len(days)
+    if n_days == 0:
+        return days, np.zeros(0, dtype=np.int8)
+
+    trained = _day_mask(session_dates, days[0], n_days)
+    skipped = _day_mask(skipped_days, days[0], n_days)
+
+    # Jour du cycle de chaque date (le programme se décale à chaque skip)
+    program_days = calendar.get_program_days(days, program_start, skipped_days)
+    cycle_days = (program_days - 1) % programme.length + 1
+    rest = np.isin(cycle_days, rest_cycle_days(programme))
+
+    status = np.full(n_days, MISSED, dtype=np.int8)
+    status[rest] = REST
+    status[skipped] = SKIPPED
+
+    # Aujourd'hui n'est pas encore manqué ; rien n'est prévu avant le début
+    # du programme ni dans la partie de l'historique non chargée
+    not_planned = (days >= np.datetime64(today, 'D')) | (days < np.datetime64(program_start, 'D'))
+    if known_from is not None:
+        not_planned |= days < np.datetime64(known_from, 'D')
+    status[not_planned & ~skipped] = NOT_PLANNED
+    status[trained] = TRAINED
+    return days, status
+
+def adherence_by_period(days, status, freq):
+    """
+    Séances, jours prévus, skips, adhérence et taux de skip par période
+    ('W' : semaine, 'M' : mois), agrégés par bincount.
+    """
+    if len(days) == 0:
+        return pd.DataFrame(columns=['période', 'séances', 'prévus', 'skips', 'adhérence', 'taux de skip'])
+
+    periods = pd.PeriodIndex(pd.DatetimeIndex(days), freq='W-SUN' if freq == 'W' else 'M')
+    codes, labels = pd.factorize(periods, sort=True)
+
+    trained = np.bincount(codes, weights=status == TRAINED, minlength=len(labels))
+    planned = np.bincount(codes, weights=np.isin(status, PLANNED), minlength=len(labels))
+    skipped = np.bincount(codes, weights=status == SKIPPED, minlength=len(labels))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        df = pd.DataFrame({
+            'période': labels.start_time,
+            'séances': trained.astype(int),
+            'prévus': planned.astype(int),
+            'skips': skipped.astype(int),
+            'adhérence': np.where(planned > 0, trained / planned, np.nan),
+            'taux de skip': np.where(planned > 0, skipped / planned, np.nan)
+        })
+    return df
+
+def streak_runs(status, current=0, longest=0):
+    """
+    Prolonge une série de jours prévus réalisés : les jours de repos et non
+    prévus sont neutres, un skip ou un jour manqué la coupe. Vectorisé
+    (cumsum remis à zéro à chaque coupure). Retourne (courante, plus longue).
+    """
+    done = status[np.isin(status, PLANNED)] == TRAINED
+    if done.size == 0:
+        return current, longest
+
+    count = np.cumsum(done)
+    runs = count - np.maximum.accumulate(np.where(done, 0, count))
+
+    # La série en cours se poursuit jusqu'à la première coupure
+    first_break = int(np.argmin(done)) if not done.all() else done.size
+    runs[:first_break] += current
+    return int(runs[-1]), max(longest, int(runs.max()))
+
+def advance_streak(state, compute_status, first_day, today):
+    """
+    Met à jour l'état des séries ({'through', 'current', 'longest'}) avec
+    les seuls jours réglés depuis 'through' (jusqu'à hier inclus).
+    state=None : recalcul depuis first_day.
+    """
+    yesterday = today - timedelta(days=1)
+    if state is None:
+        start, current, longest = first_day, 0, 0
+    else:
+        start = datetime.strptime(state['through'], "%Y-%m-%d").date() + timedelta(days=1)
+        current, longest = state['current'], state['longest']
+
+    if start <= yesterday:
+        _, status = compute_status(start, yesterday)
+        current, longest = streak_runs(status, current, longest)
+
+    return {'through': max(yesterday, start - timedelta(days=1)).isoformat(), 'current': current, 'longest': longest}
+
+def earliest_change(previous_inputs, inputs):
+    """
+    Première date dont le statut peut avoir changé entre deux états des
+    entrées (date de début, programme, séances, jours skippés) ;
+    '' si tout est à recalculer, None si rien n'a changé.
+    """
+    if previous_inputs is None or previous_inputs == inputs:
+        return None
+    if previous_inputs[:2] != inputs[:2]:
+        return ''
+    changed = (previous_inputs[2] ^ inputs[2]) | (previous_inputs[3] ^ inputs[3])
+    return min(changed) if changed else None
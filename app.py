@@ -1,16 +1,29 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
 from datetime import datetime, timedelta
-import plotly.graph_objects as go
-import plotly.express as px
 import os
-import numpy as np
 
 # Imports locaux
 import database
 import auth
-import utils
+import importer
+import programs
+import search
+import profiling
+import live
+import leaderboards
+import adherence
+import gym
+import undo
+import prefetch
+import state
+from cache import LRUCache
+from gymtracking import analytics, calendar, storage
+
+# Volume envoyé au navigateur par cette relance (barre latérale des administrateurs)
+profiling.start_payload_meter()
 
 # Configuration de la page
 st.set_page_config(
@@ -26,11 +39,21 @@ supabase = database.init_supabase()
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
 
+# Restaurer la session persistante (cookie) avant d'afficher la connexion
+if not st.session_state.logged_in:
+    auth.restore_session(supabase)
+
 # Vérifier si l'utilisateur est connecté
 if not st.session_state.logged_in:
     auth.login_page(supabase)
     st.stop()
 
+# Renouveler le token si besoin et mettre à jour le cookie de session
+auth.keep_session_alive(supabase)
+
+# Profilage de cette relance si un administrateur l'a demandé
+profiling.start_capture_if_requested()
+
 # ============= APPLICATION PRINCIPALE =============
 
 # Initialiser le session state
@@ -58,12 +81,75 @@ if 'target_body_weight' not in st.session_state:
 if 'target_body_weight_date' not in st.session_state:
     st.session_state.target_body_weight_date = None
 
+if 'leaderboard_opt_in' not in st.session_state:
+    st.session_state.leaderboard_opt_in = False
+
+# Séries d'entraînement, tenues à jour incrémentalement (jours réglés jusqu'à 'through')
+if 'streak_state' not in st.session_state:
+    st.session_state.streak_state = None
+
 if 'data_loaded' not in st.session_state:
     st.session_state.data_loaded = False
 
 if 'selected_program_id' not in st.session_state:
     st.session_state.selected_program_id = 1  # ID par défaut
 
+# Historique chargé à partir de ce mois (None = tout l'historique est chargé)
+if 'history_loaded_from' not in st.session_state:
+    st.session_state.history_loaded_from = None
+
+# Résumé de chaque mois d'historique stocké (chargés ou non)
+if 'history_summaries' not in st.session_state:
+    st.session_state.history_summaries = {}
+
+# Mois d'historique modifiés depuis la dernière sauvegarde (None = tous les mois chargés)
+if 'unsaved_months' not in st.session_state:
+    st.session_state.unsaved_months = set()
+
+# Compteurs de génération par section des données (clé des caches)
+state.init()
+
+# Graphiques déjà construits, par vue et génération des données
+if 'figure_cache' not in st.session_state:
+    st.session_state.figure_cache = LRUCache(maxsize=24)
+
+# Octets retirés par le compactage depuis la connexion
+if 'compaction_bytes_saved' not in st.session_state:
+    st.session_state.compaction_bytes_saved = 0
+
+def compact_session_data(measure=False):
+    """
+    Compacte l'historique chargé et les données du blob en mémoire. Les
+    octets économisés ne sont mesurés qu'au chargement et depuis le bouton
+    de compactage, pas à chaque sauvegarde.
+    """
+    history, data, saved = storage.compact_workout_data(st.session_state.history, {
+        'skipped_days': st.session_state.skipped_days,
+        'skipped_exercises': st.session_state.skipped_exercises,
+        'body_weight_history': st.session_state.body_weight_history
+    }, measure=measure)
+    previous = st.session_state.history
+    changed_dates = {date_str for date_str, session in previous.items() if history.get(date_str) is not session}
+    if changed_dates or len(history) != len(previous):
+        state.assign('history', history, changed_dates | (history.keys() - previous.keys()))
+    for name in ('skipped_days', 'skipped_exercises', 'body_weight_history'):
+        if data[name] != st.session_state[name]:
+            state.assign(name, data[name])
+    if measure:
+        st.session_state.compaction_bytes_saved += saved
+    return saved
+
+def note_unsaved_months(changes):
+    """Note les mois d'historique à réécrire à la prochaine sauvegarde (None : tous les mois chargés)"""
+    dates = changes.get('history', set())
+    if dates is None:
+        st.session_state.unsaved_months = None
+    elif st.session_state.unsaved_months is not None:
+        st.session_state.unsaved_months.update(date_str[:7] for date_str in dates)
+
+HISTORY_WINDOW_WEEKS = 12  # Fenêtre d'historique chargée à la connexion
+HISTORY_PAGE_MONTHS = 3    # Mois supplémentaires chargés à la demande
+
 # Charger les données depuis Supabase
 if not st.session_state.data_loaded:
     # S'assurer que le client utilise le bon token
@@ -71,58 +157,478 @@ if not st.session_state.data_loaded:
         supabase.postgrest.auth(st.session_state.session.access_token)
     
     data = database.load_workout_data(supabase, st.session_state.user.id)
+    st.session_state.unsaved_months = set()
+    
+    if data and 'history' in data:
+        # Ancien format : tout l'historique est dans le blob, il sera
+        # réparti par mois à la prochaine sauvegarde
+        state.assign('history', data['history'])
+        st.session_state.history_loaded_from = None
+    else:
+        # Seuls les mois récents sont chargés, plus les résumés de tous les mois
+        summaries = database.load_history_summaries(supabase, st.session_state.user.id)
+        window_start = calendar.history_window_start(datetime.now().date(), HISTORY_WINDOW_WEEKS)
+        history = database.load_history_months(supabase, st.session_state.user.id, since_month=window_start)
+        if summaries is None or history is None:
+            st.stop()
+        state.assign('history', history)
+        # Mois chargés tels qu'ils sont enregistrés : rien à réécrire
+        state.take_changes()
+        st.session_state.history_summaries = summaries
+        has_older = any(month < window_start for month in summaries)
+        st.session_state.history_loaded_from = window_start if has_older else None
+    
     if data:
-        st.session_state.history = data.get('history', {})
-        st.session_state.start_date = data.get('start_date', datetime.now().strftime("%Y-%m-%d"))
-        st.session_state.skipped_days = data.get('skipped_days', [])
-        st.session_state.skipped_exercises = data.get('skipped_exercises', {})
-        st.session_state.body_weight_history = data.get('body_weight_history', {})
-        st.session_state.target_body_weight = data.get('target_body_weight', 0.0)
-        st.session_state.target_body_weight_date = data.get('target_body_weight_date', None)
-        st.session_state.selected_program_id = data.get('selected_program_id', 1)
+        state.assign('start_date', data.get('start_date', datetime.now().strftime("%Y-%m-%d")))
+        state.assign('skipped_days', data.get('skipped_days', []))
+        state.assign('skipped_exercises', data.get('skipped_exercises', {}))
+        state.assign('body_weight_history', data.get('body_weight_history', {}))
+        state.assign('target_body_weight', data.get('target_body_weight', 0.0))
+        state.assign('target_body_weight_date', data.get('target_body_weight_date', None))
+        state.assign('selected_program_id', data.get('selected_program_id', 1))
+        state.assign('leaderboard_opt_in', data.get('leaderboard_opt_in', False))
+        st.session_state.streak_state = data.get('streak_state')
+    
+    # Les données compactées seront réécrites à la prochaine sauvegarde
+    compact_session_data(measure=True)
+    note_unsaved_months(state.take_changes())
+    
+    # Reprendre les séances en cours (mode live)
+    live.restore(supabase, st.session_state.user.id, data)
+    undo.init()
     st.session_state.data_loaded = True
 
+if 'undo' not in st.session_state:
+    undo.init()
+
 # Fonction pour sauvegarder toutes les données
-def save_all_data():
-    data = {
-        'history': st.session_state.history,
+def save_all_data(action="Modification"):
+    compact_session_data()
+    changes = state.take_changes()
+    undo.record(action, changes)
+    note_unsaved_months(changes)
+    
+    # Réécrire uniquement les mois chargés modifiés depuis la dernière sauvegarde (un seul upsert)
+    loaded_from = st.session_state.history_loaded_from
+    months = st.session_state.unsaved_months
+    if months is None:
+        months = {date_str[:7] for date_str in st.session_state.history} | set(st.session_state.history_summaries)
+    months_to_write = {month: {} for month in months if loaded_from is None or month >= loaded_from}
+    for date_str, session in st.session_state.history.items():
+        if date_str[:7] in months_to_write:
+            months_to_write[date_str[:7]][date_str] = session
+    for month, sessions in months_to_write.items():
+        st.session_state.history_summaries[month] = storage.summarize_sessions(sessions)
+    
+    if not database.save_history_months(supabase, st.session_state.user.id, months_to_write, st.session_state.history_summaries):
+        return False
+    st.session_state.unsaved_months = set()
+    
+    if not save_live_snapshot():
+        return False
+    live.folded(supabase, st.session_state.user.id)
+    return True
+
+def workout_blob():
+    """Données du blob user_data (l'historique est stocké par mois à part)"""
+    return {
         'start_date': st.session_state.start_date,
         'skipped_days': st.session_state.skipped_days,
         'skipped_exercises': st.session_state.skipped_exercises,
         'body_weight_history': st.session_state.body_weight_history,
         'target_body_weight': st.session_state.target_body_weight,
         'target_body_weight_date': st.session_state.target_body_weight_date,
-        'selected_program_id': st.session_state.selected_program_id
+        'selected_program_id': st.session_state.selected_program_id,
+        'leaderboard_opt_in': st.session_state.leaderboard_opt_in,
+        'streak_state': st.session_state.streak_state,
+        **live.snapshot_fields()
     }
-    return database.save_workout_data(supabase, st.session_state.user.id, data)
-
-# Header avec bouton de déconnexion
-col1, col2 = st.columns([4, 1])
-with col1:
-    st.title("💪 Tracker de Musculation")
-with col2:
-    st.write(f"👤 {st.session_state.username}")
-    if st.button("🚪 Déconnexion"):
-        database.logout_user(supabase)
-        st.session_state.clear()
-        st.rerun()
 
-st.markdown("---")
+def record_session(date_str, workout_type, day_number, weights):
+    """Enregistre la séance d'une date dans l'historique et sauvegarde"""
+    # Seuls les mois chargés sont réécrits : charger d'abord celui de la séance
+    ensure_history_loaded(date_str[:7])
+    state.set_session(date_str, {
+        'workout_type': workout_type,
+        'day_number': day_number,
+        'program_id': st.session_state.selected_program_id,
+        'weights': weights,
+        'timestamp': datetime.now().isoformat()
+    })
+    live.finish_session(date_str)
+    if not save_all_data(f"Séance du {date_str}"):
+        return False
+    if st.session_state.leaderboard_opt_in:
+        update_leaderboards([date_str], leaderboards.session_exercises(st.session_state.history[date_str]))
+    return True
 
-# Sidebar pour la navigation
-page = st.sidebar.radio(
-    "Navigation",
-    ["📅 Séance du jour", "⚙️ Configuration", "📊 Historique", "📈 Statistiques"]
-)
+def update_leaderboards(dates=(), exercises=None):
+    """
+    Répercute des séances (exercices et semaines touchés) ou, sans
+    argument, toutes les données dans les classements partagés
+    """
+    return leaderboards.update_user(
+        supabase,
+        flat_history(),
+        archived_exercise_stats(),
+        all_session_dates(),
+        datetime.now().date(),
+        dates,
+        exercises
+    )
 
-# Charger le programme actif depuis la DB
-df_programme = database.load_program_by_id(supabase, st.session_state.selected_program_id)
+def all_session_dates():
+    """
+    Dates de toutes les séances : historique chargé et dates des résumés
+    des mois non chargés. Les mois résumés sans leurs dates (anciens
+    résumés) sont chargés, puis réécrits à la sauvegarde suivante.
+    """
+    summaries = st.session_state.history_summaries
+    loaded_from = st.session_state.history_loaded_from
+    undated = [
+        month for month, summary in summaries.items()
+        if loaded_from is not None and month < loaded_from and summary.get('sessions') and 'dates' not in summary
+    ]
+    if undated:
+        ensure_history_loaded(min(undated))
+        loaded_from = st.session_state.history_loaded_from
+        if st.session_state.unsaved_months is not None:
+            st.session_state.unsaved_months.update(undated)
+    
+    dates = set(st.session_state.history)
+    for month, summary in summaries.items():
+        if loaded_from is not None and month < loaded_from:
+            dates.update(summary.get('dates', ()))
+    return dates
 
-if df_programme.empty:
-    st.error("⚠️ Impossible de charger le programme. Vérifiez la base de données.")
-    program_length = 1
+def save_restored_data(changes):
+    """
+    Écrit les seules données modifiées par une annulation : les mois des
+    séances concernées (un upsert) et le blob si les skips ou le poids du
+    corps ont changé.
+    """
+    changed_dates = changes.get('history', set())
+    if changed_dates:
+        months = {date_str[:7] for date_str in changed_dates}
+        months_to_write = {month: {} for month in months}
+        for date_str, session in st.session_state.history.items():
+            if date_str[:7] in months:
+                months_to_write[date_str[:7]][date_str] = session
+        for month, sessions in months_to_write.items():
+            st.session_state.history_summaries[month] = storage.summarize_sessions(sessions)
+        if not database.save_history_months(supabase, st.session_state.user.id, months_to_write, st.session_state.history_summaries):
+            return False
+        if st.session_state.leaderboard_opt_in:
+            update_leaderboards()
+    
+    if set(changes) - {'history'}:
+        return save_live_snapshot()
+    return True
+
+def save_live_snapshot():
+    """Écrit le blob seul (snapshot des séances en cours), sans réécrire l'historique"""
+    return database.save_workout_data(supabase, st.session_state.user.id, workout_blob())
+
+def ensure_history_loaded(since_month):
+    """Charge à la demande les mois d'historique antérieurs (since_month=None : tout)"""
+    loaded_from = st.session_state.history_loaded_from
+    if loaded_from is None or (since_month is not None and since_month >= loaded_from):
+        return
+    
+    older = database.load_history_months(supabase, st.session_state.user.id, since_month=since_month, until_month=loaded_from)
+    if older is None:
+        return
+    
+    state.add_sessions(older)
+    undo.absorb_loaded(older)
+    has_older = since_month is not None and any(month < since_month for month in st.session_state.history_summaries)
+    st.session_state.history_loaded_from = since_month if has_older else None
+
+def cached_view(key, builder, sections=('history',)):
+    """
+    Retourne une vue (données + graphiques) construite une seule fois par
+    génération des sections de données dont elle dépend
+    """
+    cache_key = key + state.generation(*sections)
+    view = st.session_state.figure_cache.get(cache_key)
+    if view is None and cache_key not in st.session_state.figure_cache:
+        # Vue calculée en arrière-plan après la relance précédente ?
+        view = prefetch.take(cache_key)
+        if view is prefetch.MISSING:
+            prefetch.record_miss(key)
+            view = builder()
+        st.session_state.figure_cache.put(cache_key, view)
+    return view
+
+def flat_history():
+    """Historique chargé aplati en une ligne par série (recalculé à chaque version)"""
+    return cached_view(('flat_history',), lambda: analytics.flatten_history(st.session_state.history))
+
+# --- Vues partagées par les pages et le préchargement : (clé, calcul) ---
+# Les calculs capturent leurs données ici : ils peuvent tourner dans un thread.
+
+def recommendations_view(date_str, day_workout):
+    """Charges suggérées pour tous les exercices d'un jour (un seul calcul)"""
+    exercise_specs = {exercise.name: (exercise.sets, exercise.reps) for exercise in day_workout}
+    flat = flat_history()
+    return (
+        ('recommendations', date_str, tuple(exercise_specs.items())),
+        lambda: analytics.recommend_weights(flat, exercise_specs, date_str)
+    )
+
+def exercise_records_view(date_str, day_workout):
+    """Dernier max et record de chaque exercice d'un jour, avant cette date (un seul calcul)"""
+    exercise_names = tuple(exercise.name for exercise in day_workout)
+    flat = flat_history()
+    archived_stats = archived_exercise_stats()
+    return (
+        ('exercise_records', date_str, exercise_names),
+        lambda: analytics.get_exercises_stats(flat, exercise_names, date_str, archived_stats)
+    )
+
+def default_stats_period():
+    """Période par défaut des statistiques : depuis le début de l'historique chargé"""
+    if st.session_state.history_loaded_from is not None:
+        default_start = datetime.strptime(st.session_state.history_loaded_from + "-01", "%Y-%m-%d").date()
+    elif st.session_state.history:
+        default_start = datetime.strptime(min(st.session_state.history), "%Y-%m-%d").date()
+    else:
+        default_start = datetime.now().date()
+    return default_start, datetime.now().date()
+
+def period_history(history, period_start, period_end):
+    start_str, end_str = period_start.strftime("%Y-%m-%d"), period_end.strftime("%Y-%m-%d")
+    return {
+        date_str: session
+        for date_str, session in history.items()
+        if start_str <= date_str <= end_str
+    }
+
+# Les vues préchargeables reçoivent un instantané de l'historique (history)
+# quand elles sont calculées dans un thread ; sinon elles lisent
+# l'historique courant, filtré seulement si la vue doit être calculée.
+
+def exercise_view(exercise, period_start, period_end, history=None):
+    """Progression d'un exercice sur la période"""
+    history = st.session_state.history if history is None else history
+
+    def build():
+        import charts
+        return charts.exercise_progress(period_history(history, period_start, period_end), exercise)
+
+    return ('exercise', exercise, period_start, period_end), build
+
+def volume_view(period_start, period_end, history=None):
+    """Volume global sur la période"""
+    history = st.session_state.history if history is None else history
+
+    def build():
+        import charts
+        return charts.global_volume(period_history(history, period_start, period_end))
+
+    return ('volume', period_start, period_end), build
+
+def history_page_view(history=None):
+    """
+    Séances chargées, de la plus récente à la plus ancienne, avec leurs
+    séries regroupées par exercice dans l'ordre du programme suivi ce jour-là
+    """
+    default_program_id = st.session_state.selected_program_id
+
+    def session_programs():
+        # Charger en une fois les programmes suivis lors de ces séances
+        return programs.get_programs(supabase, {
+            programs.session_program_id(session, default_program_id)
+            for session in history.values()
+        })
+
+    if history is None:
+        history = st.session_state.history
+        resolved_programs = None
+    else:
+        # Calcul dans un thread : les programmes (requêtes, erreurs affichées
+        # par st.error) sont résolus ici, dans la relance
+        resolved_programs = session_programs()
+
+    def build():
+        history_programs = session_programs() if resolved_programs is None else resolved_programs
+        entries = []
+        for date_str in sorted(history, reverse=True):
+            session = history[date_str]
+
+            # Regrouper par exercice
+            exercises = {}
+            for key, weight in session['weights'].items():
+                if weight > 0:
+                    parts = key.split('_')
+                    if len(parts) >= 3:
+                        exercises.setdefault("_".join(parts[1:-1]), []).append((int(parts[-1]), weight))
+
+            session_programme = history_programs[programs.session_program_id(session, default_program_id)]
+            lines = [
+                (exercise.name, " | ".join(f"S{s+1}: {w}kg" for s, w in sorted(exercises[exercise.name])))
+                for exercise in session_programme.day(session['day_number'])
+                if exercise.name in exercises
+            ]
+            entries.append((date_str, session, lines))
+        return entries
+
+    return ('history_page',), build
+
+def prefetch_next_views():
+    """
+    Après la séance du jour : précharge la séance du prochain jour prévu,
+    l'historique et les statistiques des exercices faits aujourd'hui
+    """
+    tomorrow, next_day = calendar.get_next_scheduled_day(st.session_state.start_date, st.session_state.skipped_days)
+    next_workout = programme.day(next_day)
+    if next_workout and not next_workout.is_rest:
+        prefetch.schedule(*recommendations_view(tomorrow.strftime("%Y-%m-%d"), next_workout))
+
+    # Vues préchargeables : (vue, arguments, sections dont elle dépend)
+    candidates = []
+    if st.session_state.history:
+        candidates.append((history_page_view, (), ('history', 'settings')))
+
+    period_start, period_end = default_stats_period()
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    trained_today = {
+        key.split('_', 1)[1].rsplit('_', 1)[0]
+        for key, weight in st.session_state.history.get(today_str, {}).get('weights', {}).items()
+        if weight > 0 and key.count('_') >= 2
+    }
+    if trained_today:
+        # Exercice affiché par défaut dans les statistiques, puis ceux du jour
+        default_exercise = next(iter(df_programme[df_programme['Type'] != 'Repos']['Exercice']), None)
+        for exercise in [default_exercise, *sorted(trained_today - {default_exercise})]:
+            if exercise:
+                candidates.append((exercise_view, (exercise, period_start, period_end), ('history',)))
+        candidates.append((volume_view, (period_start, period_end), ('history',)))
+
+    # Un seul instantané de l'historique, et seulement si une vue reste à calculer
+    snapshot = None
+    for view, args, sections in candidates:
+        key, _ = view(*args)
+        if prefetch.needed(key, sections):
+            if snapshot is None:
+                snapshot = dict(st.session_state.history)
+            prefetch.schedule(*view(*args, history=snapshot), sections=sections)
+
+def workload_view():
+    """Ratio charge aiguë / chronique de chaque jour jusqu'à aujourd'hui, total et par groupe musculaire"""
+    today = datetime.now().date()
+
+    def build():
+        flat = flat_history()
+        mapping = analytics.muscle_group_mapping(flat['exercise'].unique(), df_programme)
+        ratio, _ = analytics.workload_ratio(flat, mapping, end=today)
+        return ratio
+
+    return cached_view(('workload', today), build, sections=('history', 'settings'))
+
+def archived_exercise_stats():
+    """Statistiques par exercice des mois d'historique non chargés"""
+    if st.session_state.history_loaded_from is None:
+        return {}
+    return storage.combine_summaries(st.session_state.history_summaries, before_month=st.session_state.history_loaded_from)
+
+def history_known_from():
+    """Premier jour de l'historique chargé (None si tout est chargé)"""
+    loaded_from = st.session_state.history_loaded_from
+    return datetime.strptime(loaded_from + "-01", "%Y-%m-%d").date() if loaded_from else None
+
+def adherence_status(start, end):
+    """Statut (entraîné, skippé, repos, manqué) de chaque jour de [start, end]"""
+    return adherence.day_status(
+        start, end, datetime.now().date(),
+        st.session_state.history, st.session_state.skipped_days,
+        st.session_state.start_date, programme, known_from=history_known_from()
+    )
+
+def streak_summary():
+    """
+    Série courante et plus longue. L'état n'avance que sur les jours réglés
+    depuis la dernière mise à jour ; il est recalculé si une séance ou un
+    skip antérieur a changé.
+    """
+    today = datetime.now().date()
+    # Entrées reconstruites seulement si l'historique, les skips ou les réglages ont changé
+    generations = state.generation('history', 'skips', 'settings')
+    if st.session_state.get('streak_generations') == generations:
+        inputs = st.session_state.streak_inputs
+    else:
+        inputs = (
+            st.session_state.start_date,
+            st.session_state.selected_program_id,
+            frozenset(st.session_state.history),
+            frozenset(st.session_state.skipped_days)
+        )
+        st.session_state.streak_generations = generations
+    changed_from = adherence.earliest_change(st.session_state.get('streak_inputs'), inputs)
+    streak = st.session_state.streak_state
+    if streak is not None and changed_from is not None and changed_from <= streak['through']:
+        streak = None
+    st.session_state.streak_inputs = inputs
+    
+    first_day = history_known_from() or datetime.strptime(
+        min([st.session_state.start_date, *st.session_state.history]), "%Y-%m-%d"
+    ).date()
+    streak = adherence.advance_streak(streak, adherence_status, first_day, today)
+    st.session_state.streak_state = streak
+    
+    # La séance du jour prolonge la série sans être encore réglée
+    current = streak['current'] + (1 if today.strftime("%Y-%m-%d") in st.session_state.history else 0)
+    return current, max(streak['longest'], current)
+
+# Mode salle (?gym=1) : séance du jour seule, sans en-tête ni barre latérale
+gym_mode = gym.is_active()
+
+if gym_mode:
+    page = None
 else:
-    program_length = df_programme['Jour'].max()
+    # Header avec bouton de déconnexion
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        st.title("💪 Tracker de Musculation")
+    with col2:
+        st.write(f"👤 {st.session_state.username}")
+        if st.button("🚪 Déconnexion"):
+            auth.logout(supabase)
+            st.rerun()
+
+    st.markdown("---")
+
+    # Sidebar pour la navigation
+    page = st.sidebar.radio(
+        "Navigation",
+        ["📅 Séance du jour", "⚙️ Configuration", "📊 Historique", "📈 Statistiques"]
+    )
+
+    # Annuler / rétablir les dernières modifications
+    undo_col, redo_col = st.sidebar.columns(2)
+    with undo_col:
+        undo_label = undo.undo_label()
+        if st.button("↩️ Annuler", disabled=undo_label is None, help=undo_label, use_container_width=True):
+            if save_restored_data(undo.undo()):
+                st.toast(f"↩️ Annulé : {undo_label}")
+            st.rerun()
+    with redo_col:
+        redo_label = undo.redo_label()
+        if st.button("↪️ Rétablir", disabled=redo_label is None, help=redo_label, use_container_width=True):
+            if save_restored_data(undo.redo()):
+                st.toast(f"↪️ Rétabli : {redo_label}")
+            st.rerun()
+
+    if st.sidebar.button("🏋️ Mode salle", help="Séance du jour seule, allégée pour le Wi-Fi de la salle", use_container_width=True):
+        gym.enter()
+        st.rerun()
+
+# Charger le programme actif (cache partagé entre les sessions)
+programme = programs.get_program(supabase, st.session_state.selected_program_id)
+df_programme = programme.df
+
+if programme.empty:
+    st.error("⚠️ Impossible de charger le programme. Vérifiez la base de données.")
 
 # --- MIGRATION AUTOMATIQUE DES DONNÉES (Index -> Nom) ---
 # Convertit l'historique pour utiliser les noms d'exercices au lieu des index
@@ -130,7 +636,7 @@ if st.session_state.history or st.session_state.skipped_exercises:
     migrated = False
     
     # 1. Migration de l'historique des poids
-    for date_str, session in st.session_state.history.items():
+    for date_str, session in list(st.session_state.history.items()):
         new_weights = {}
         weights = session.get('weights', {})
         session_migrated = False
@@ -150,7 +656,8 @@ if st.session_state.history or st.session_state.skipped_exercises:
                 new_weights[key] = weight
         
         if session_migrated:
-            session['weights'] = new_weights
+            # Nouvelle séance plutôt que modification en place (états d'annulation)
+            state.set_session(date_str, {**session, 'weights': new_weights})
             migrated = True
 
     # 2. Migration des exercices skippés
@@ -168,11 +675,18 @@ if st.session_state.history or st.session_state.skipped_exercises:
             new_skipped_exercises[key] = val
     
     if migrated:
-        st.session_state.skipped_exercises = new_skipped_exercises
-        save_all_data()
+        state.assign('skipped_exercises', new_skipped_exercises)
+        save_all_data("Migration des données")
         st.toast("🔄 Historique migré vers le format robuste (Noms)", icon="🛠️")
         st.rerun()
 
+# PAGE: Mode salle (rien d'autre n'est rendu ni envoyé)
+if gym_mode:
+    gym.render(programme, record_session)
+    profiling.finish_capture("🏋️ Mode salle", len(st.session_state.history))
+    profiling.finish_payload_meter("salle")
+    st.stop()
+
 # PAGE: Configuration
 if page == "⚙️ Configuration":
     st.header("⚙️ Configuration du programme")
@@ -210,7 +724,7 @@ if page == "⚙️ Configuration":
             
         if new_program_id != st.session_state.selected_program_id:
             if st.button("🔄 Changer de programme"):
-                st.session_state.selected_program_id = new_program_id
+                state.assign('selected_program_id', new_program_id)
                 save_all_data()
                 st.success(f"Programme changé pour : {selected_name}")
                 st.rerun()
@@ -230,14 +744,14 @@ if page == "⚙️ Configuration":
         )
         
         if st.button("💾 Mettre à jour la date de début"):
-            st.session_state.start_date = new_start_date.strftime("%Y-%m-%d")
+            state.assign('start_date', new_start_date.strftime("%Y-%m-%d"))
             if save_all_data():
                 st.success("✅ Date de début mise à jour !")
                 st.rerun()
     
     with col2:
         st.info(f"**Date actuelle de début:** {st.session_state.start_date}")
-        today_day = utils.get_program_day(datetime.now().date(), st.session_state.start_date, st.session_state.skipped_days)
+        today_day = calendar.get_program_day(datetime.now().date(), st.session_state.start_date, st.session_state.skipped_days)
         st.info(f"**Jour du programme aujourd'hui:** Jour {today_day}")
     
     st.markdown("---")
@@ -254,8 +768,8 @@ if page == "⚙️ Configuration":
                 st.text(f"📅 {skip_date}")
             with col2:
                 if st.button("❌ Annuler", key=f"unskip_{skip_date}"):
-                    st.session_state.skipped_days.remove(skip_date)
-                    save_all_data()
+                    state.unskip_day(skip_date)
+                    save_all_data(f"Réactivation du {skip_date}")
                     st.rerun()
     else:
         st.info("Aucun jour skippé pour le moment.")
@@ -288,19 +802,100 @@ if page == "⚙️ Configuration":
         )
 
     if st.button("💾 Enregistrer l'objectif de poids"):
-        st.session_state.target_body_weight = new_target_weight
-        st.session_state.target_body_weight_date = new_target_date.strftime("%Y-%m-%d") if new_target_date else None
+        state.assign('target_body_weight', new_target_weight)
+        state.assign('target_body_weight_date', new_target_date.strftime("%Y-%m-%d") if new_target_date else None)
         if save_all_data():
             st.success("✅ Objectif de poids mis à jour !")
 
+    st.markdown("---")
+    st.subheader("📥 Importer un historique")
+    
+    st.write("Importez vos séances depuis un autre tracker : un fichier CSV avec les colonnes `date`, `exercise`, `set`, `weight` et, optionnellement, `body_weight`.")
+    
+    uploaded_file = st.file_uploader("Fichier CSV", type=["csv"])
+    
+    if uploaded_file is not None and st.button("📥 Importer l'historique"):
+        try:
+            raw_import = importer.read_history_csv(uploaded_file)
+            report = importer.import_history(
+                raw_import,
+                st.session_state.history,
+                st.session_state.body_weight_history,
+                df_programme,
+                st.session_state.start_date,
+                st.session_state.skipped_days,
+                st.session_state.selected_program_id,
+                before_merge=lambda date_min: ensure_history_loaded(date_min[:7])
+            )
+        except ValueError as e:
+            st.error(f"❌ {e}")
+        else:
+            # L'import fusionne en place dans l'historique et le poids du corps
+            state.sessions_changed(report['dates'])
+            state.touch('body_weight')
+            
+            # Une seule écriture pour tout l'import
+            if report['accepted'] > 0 and save_all_data("Import") and st.session_state.leaderboard_opt_in:
+                update_leaderboards(report['dates'], report['exercises'])
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Lignes acceptées", report['accepted'])
+            with col2:
+                st.metric("Lignes rejetées", report['rejected'], f"{report['duplicates']} doublons ignorés", delta_color="off")
+            with col3:
+                st.metric("Séances", report['sessions_created'], f"{report['sessions_updated']} mises à jour", delta_color="off")
+            
+            if report['rejected'] > 0:
+                st.warning(" | ".join(f"{reason} : {count}" for reason, count in report['reasons'].items()))
+                st.dataframe(report['rejected_rows'].head(100), use_container_width=True)
+    
+    st.markdown("---")
+    st.subheader("🏆 Classements")
+    
+    opt_in = st.checkbox(
+        "Participer aux classements de la salle (charge max, volume hebdomadaire, séries de semaines)",
+        value=st.session_state.leaderboard_opt_in
+    )
+    if opt_in != st.session_state.leaderboard_opt_in:
+        state.assign('leaderboard_opt_in', opt_in)
+        if save_all_data():
+            if opt_in:
+                update_leaderboards()
+                st.success("✅ Vous apparaissez maintenant dans les classements")
+            else:
+                leaderboards.remove_user(supabase)
+                st.success("✅ Vous avez été retiré des classements")
+    
+    st.markdown("---")
+    st.subheader("🧹 Compactage des données")
+    st.caption(
+        "Les poids nuls, les exercices réactivés et les entrées orphelines sont retirés "
+        "automatiquement au chargement et à chaque sauvegarde."
+    )
+    st.metric("Octets économisés (session)", f"{st.session_state.compaction_bytes_saved / 1024:.1f} Ko")
+    
+    if st.button("🧹 Compacter tout l'historique"):
+        # Les mois non chargés ne sont réécrits qu'une fois chargés
+        ensure_history_loaded(None)
+        saved = compact_session_data(measure=True)
+        if save_all_data():
+            st.success(f"✅ Historique compacté ({saved / 1024:.1f} Ko économisés)")
+    
     st.markdown("---")
     st.subheader("🗑️ Réinitialiser toutes les données")
     
     if st.button("⚠️ RÉINITIALISER TOUT", type="secondary"):
-        st.session_state.history = {}
-        st.session_state.start_date = datetime.now().strftime("%Y-%m-%d")
-        st.session_state.skipped_days = []
-        save_all_data()
+        # Tout l'historique en mémoire pour que la réinitialisation soit annulable
+        ensure_history_loaded(None)
+        database.delete_history(supabase, st.session_state.user.id)
+        state.assign('history', {})
+        st.session_state.history_summaries = {}
+        st.session_state.history_loaded_from = None
+        state.assign('start_date', datetime.now().strftime("%Y-%m-%d"))
+        state.assign('skipped_days', [])
+        st.session_state.live_sessions = {}
+        save_all_data("Réinitialisation")
         st.success("Toutes les données ont été réinitialisées !")
         st.rerun()
 
@@ -318,7 +913,7 @@ elif page == "📅 Séance du jour":
         )
     
     date_str = selected_date.strftime("%Y-%m-%d")
-    day_number = utils.get_program_day(selected_date, st.session_state.start_date, st.session_state.skipped_days)
+    day_number = calendar.get_program_day(selected_date, st.session_state.start_date, st.session_state.skipped_days)
     
     with col2:
         st.metric("Jour du programme", f"Jour {day_number}")
@@ -329,24 +924,37 @@ elif page == "📅 Séance du jour":
         
         if is_skipped:
             if st.button("✅ Réactiver", type="secondary"):
-                st.session_state.skipped_days.remove(date_str)
-                save_all_data()
+                state.unskip_day(date_str)
+                save_all_data(f"Réactivation du {date_str}")
                 st.rerun()
             st.warning("⏭️ Jour skippé")
         else:
             if st.button("⏭️ Skip séance", type="secondary"):
                 if date_str not in st.session_state.skipped_days:
-                    st.session_state.skipped_days.append(date_str)
-                    save_all_data()
+                    state.skip_day(date_str)
+                    save_all_data(f"Skip du {date_str}")
                     st.success("Séance skippée ! Le programme est décalé.")
                     st.rerun()
     
     # Afficher info sur le prochain jour
-    tomorrow, next_day = utils.get_next_scheduled_day(st.session_state.start_date, st.session_state.skipped_days)
-    next_day_in_cycle = (next_day - 1) % program_length + 1
-    next_workout = df_programme[df_programme['Jour'] == next_day_in_cycle].iloc[0]['Type']
+    tomorrow, next_day = calendar.get_next_scheduled_day(st.session_state.start_date, st.session_state.skipped_days)
+    next_workout = programme.day_type(next_day)
     st.info(f"📅 Demain ({tomorrow.strftime('%d/%m/%Y')}): Jour {next_day} - {next_workout}")
 
+    # Charge aiguë / chronique du jour, avec les groupes musculaires à surveiller
+    workload = workload_view()
+    latest = workload.iloc[-1].dropna() if not workload.empty else pd.Series(dtype=float)
+    if analytics.TOTAL_GROUP in latest:
+        label, level = analytics.workload_band(latest[analytics.TOTAL_GROUP])
+        watched = [
+            f"{group} ({value:.2f})" for group, value in latest.drop(analytics.TOTAL_GROUP).items()
+            if analytics.workload_band(value)[1] in ('warning', 'error')
+        ]
+        message = f"🩺 Charge aiguë / chronique : {latest[analytics.TOTAL_GROUP]:.2f} ({label})"
+        if watched:
+            message += f" - à surveiller : {', '.join(watched)}"
+        getattr(st, level)(message)
+
     st.markdown("---")
     st.subheader("⚖️ Poids du corps du jour")
     
@@ -364,138 +972,225 @@ elif page == "📅 Séance du jour":
     
     # Mettre à jour l'historique si la valeur a changé et est supérieure à 0
     if body_weight > 0 and body_weight != default_body_weight:
-        st.session_state.body_weight_history[date_str] = body_weight
-        if save_all_data():
+        state.set_body_weight(date_str, body_weight)
+        if save_all_data(f"Poids du {date_str}"):
             st.toast("⚖️ Poids du corps enregistré !", icon="✅")
 
     st.markdown("---")
     
     # Filtrer le programme pour le jour sélectionné
-    day_in_cycle = (day_number - 1) % program_length + 1
-    day_workout = df_programme[df_programme['Jour'] == day_in_cycle]
+    day_workout = programme.day(day_number)
     
-    if not day_workout.empty:
-        workout_type = day_workout.iloc[0]['Type']
+    if day_workout:
+        workout_type = day_workout.type
         
-        if workout_type == "Repos":
+        if day_workout.is_rest:
             st.info("🧘‍♂️ Jour de repos - Profitez-en pour récupérer !")
         else:
             st.subheader(f"🏋️ {workout_type}")
             
+            col_mode1, col_mode2 = st.columns([1, 2])
+            with col_mode1:
+                entry_mode = st.radio(
+                    "Mode de saisie",
+                    ["📋 Par exercice", "🧮 Grille"],
+                    horizontal=True,
+                    key="entry_mode"
+                )
+            with col_mode2:
+                # Le mode live enregistre chaque série : il ne concerne que la saisie par exercice
+                live_mode = entry_mode == "📋 Par exercice" and st.toggle(
+                    "🔴 Mode live (chaque série est enregistrée dès sa saisie)",
+                    key="live_mode"
+                )
+            
             # Afficher si la séance est déjà complétée
             if date_str in st.session_state.history:
                 st.success("✅ Séance déjà enregistrée pour cette date")
             
-            # Charger les poids existants pour cette date si disponibles
+            # Charger les poids existants pour cette date si disponibles,
+            # complétés par les séries saisies en mode live
             if date_str in st.session_state.history:
-                st.session_state.current_weights = st.session_state.history[date_str].get('weights', {})
+                st.session_state.current_weights = dict(st.session_state.history[date_str].get('weights', {}))
             else:
                 st.session_state.current_weights = {}
             
-            # Afficher chaque exercice
-            for idx, row in day_workout.iterrows():
-                exercise_key = f"{date_str}_{row['Exercice']}"
-                is_exercise_skipped = st.session_state.skipped_exercises.get(exercise_key, False)
+            live_weights = live.session_weights(date_str)
+            if live_weights:
+                st.session_state.current_weights = {**st.session_state.current_weights, **live_weights}
+                st.info(f"⏱️ Séance en cours reprise ({len(live_weights)} séries saisies) - pensez à l'enregistrer")
+            
+            # Dernier max et record de chaque exercice, archives comprises (un seul calcul)
+            exercise_records = cached_view(*exercise_records_view(date_str, day_workout))
+            
+            # Charges suggérées pour tous les exercices du jour (un seul calcul)
+            recommendations = cached_view(*recommendations_view(date_str, day_workout))
+            
+            if entry_mode == "🧮 Grille":
+                # Toute la séance dans une seule grille (exercices × séries), validée en une fois
+                set_columns = [f"Série {serie_num + 1}" for serie_num in range(day_workout.max_sets)]
                 
-                with st.expander(f"**{row['Exercice']}**", expanded=not is_exercise_skipped):
-                    # Bouton pour skip l'exercice
-                    col_skip1, col_skip2 = st.columns([3, 1])
-                    with col_skip2:
-                        if is_exercise_skipped:
-                            if st.button("✅ Réactiver", key=f"unskip_ex_{exercise_key}"):
-                                st.session_state.skipped_exercises[exercise_key] = False
-                                save_all_data()
-                                st.rerun()
-                        else:
-                            if st.button("⏭️ Skip exercice", key=f"skip_ex_{exercise_key}"):
-                                st.session_state.skipped_exercises[exercise_key] = True
-                                # Supprimer les poids de cet exercice
-                                for serie_num in range(int(row['Séries'])):
-                                    key = f"{date_str}_{row['Exercice']}_{serie_num}"
-                                    if key in st.session_state.current_weights:
-                                        del st.session_state.current_weights[key]
-                                save_all_data()
-                                st.rerun()
+                grid_rows = []
+                for exercise in day_workout:
+                    exercise_key = f"{date_str}_{exercise.name}"
+                    recommendation = recommendations.get(exercise.name)
+                    grid_row = {
+                        'Exercice': exercise.name,
+                        'Répétitions (RPE)': exercise.reps,
+                        'Suggestion': " | ".join(f"{w:g}" for w in recommendation['weights']) if recommendation else "",
+                        'Skip': st.session_state.skipped_exercises.get(exercise_key, False)
+                    }
+                    for serie_num, column in enumerate(set_columns):
+                        # Pas de cellule pour les séries au-delà de celles prévues
+                        grid_row[column] = (
+                            float(st.session_state.current_weights.get(f"{exercise_key}_{serie_num}", 0.0))
+                            if serie_num < exercise.sets else None
+                        )
+                    grid_rows.append(grid_row)
+                
+                with st.form(f"grid_form_{date_str}"):
+                    edited_grid = st.data_editor(
+                        pd.DataFrame(grid_rows),
+                        hide_index=True,
+                        num_rows="fixed",
+                        disabled=['Exercice', 'Répétitions (RPE)', 'Suggestion'],
+                        column_config={
+                            'Skip': st.column_config.CheckboxColumn("⏭️ Skip"),
+                            **{
+                                column: st.column_config.NumberColumn(column, min_value=0.0, max_value=500.0, step=0.5, format="%.1f")
+                                for column in set_columns
+                            }
+                        },
+                        use_container_width=True,
+                        key=f"grid_{date_str}"
+                    )
+                    grid_submitted = st.form_submit_button("✅ Enregistrer la séance", type="primary", use_container_width=True)
+                
+                if grid_submitted:
+                    # Les poids d'autres exercices déjà enregistrés ce jour-là sont conservés
+                    day_exercise_keys = {f"{date_str}_{exercise.name}" for exercise in day_workout}
+                    session_weights = {
+                        key: weight for key, weight in st.session_state.current_weights.items()
+                        if key.rsplit('_', 1)[0] not in day_exercise_keys
+                    }
+                    for exercise, grid_row in zip(day_workout, edited_grid.to_dict('records')):
+                        exercise_key = f"{date_str}_{exercise.name}"
+                        if grid_row['Skip']:
+                            # Exercice skippé : aucune donnée enregistrée
+                            state.set_exercise_skip(exercise_key, True)
+                            continue
+                        state.set_exercise_skip(exercise_key, False)
+                        for serie_num in range(exercise.sets):
+                            weight = grid_row[set_columns[serie_num]]
+                            if pd.notna(weight) and weight > 0:
+                                session_weights[f"{exercise_key}_{serie_num}"] = float(weight)
                     
-                    if is_exercise_skipped:
-                        st.warning("⏭️ Exercice skippé - aucune donnée ne sera enregistrée")
-                    else:
-                        col1, col2 = st.columns([2, 1])
+                    if record_session(date_str, workout_type, day_number, session_weights):
+                        st.success("✅ Séance enregistrée avec succès !")
+                        st.balloons()
+            else:
+                # Afficher chaque exercice
+                for exercise in day_workout:
+                    exercise_key = f"{date_str}_{exercise.name}"
+                    is_exercise_skipped = st.session_state.skipped_exercises.get(exercise_key, False)
+                    
+                    with st.expander(f"**{exercise.name}**", expanded=not is_exercise_skipped):
+                        # Bouton pour skip l'exercice
+                        col_skip1, col_skip2 = st.columns([3, 1])
+                        with col_skip2:
+                            if is_exercise_skipped:
+                                if st.button("✅ Réactiver", key=f"unskip_ex_{exercise_key}"):
+                                    state.set_exercise_skip(exercise_key, False)
+                                    save_all_data(f"Réactivation de {exercise.name}")
+                                    st.rerun()
+                            else:
+                                if st.button("⏭️ Skip exercice", key=f"skip_ex_{exercise_key}"):
+                                    state.set_exercise_skip(exercise_key, True)
+                                    # Supprimer les poids de cet exercice
+                                    for serie_num in range(exercise.sets):
+                                        key = f"{date_str}_{exercise.name}_{serie_num}"
+                                        if key in st.session_state.current_weights:
+                                            del st.session_state.current_weights[key]
+                                    save_all_data(f"Skip de {exercise.name}")
+                                    st.rerun()
                         
-                        with col1:
-                            st.write(f"**Répétitions:** {row['Répétitions (RPE)']}")
+                        if is_exercise_skipped:
+                            st.warning("⏭️ Exercice skippé - aucune donnée ne sera enregistrée")
+                        else:
+                            col1, col2 = st.columns([2, 1])
                             
-                            # Récupérer et afficher les stats de l'exercice
-                            last_max, all_time_max = utils.get_exercise_stats(
-                                row['Exercice'], 
-                                st.session_state.history, 
-                                df_programme, 
-                                program_length, 
-                                current_date_str=date_str
-                            )
+                            with col1:
+                                st.write(f"**Répétitions:** {exercise.reps}")
+                                
+                                # Récupérer et afficher les stats de l'exercice
+                                last_max, all_time_max = exercise_records[exercise.name]
+                                
+                                notes_and_stats = []
+                                if exercise.notes:
+                                    notes_and_stats.append(f"📝 {exercise.notes}")
+                                
+                                if all_time_max is not None:
+                                    if last_max == all_time_max:
+                                        notes_and_stats.append(f"**Dernier max :** {last_max} kg (🏅 Record)")
+                                    else:
+                                        notes_and_stats.append(f"**Dernier max :** {last_max} kg | **Record :** {all_time_max} kg")
+                                
+                                if notes_and_stats:
+                                    st.caption(" | ".join(notes_and_stats))
+                                
+                                recommendation = recommendations.get(exercise.name)
+                                if recommendation:
+                                    suggested = " | ".join(f"S{i + 1} {w:g} kg" for i, w in enumerate(recommendation['weights']))
+                                    st.caption(f"💡 **Suggestion :** {suggested} ({recommendation['reason']})")
                             
-                            notes_and_stats = []
-                            if pd.notna(row['Notes']) and row['Notes']:
-                                notes_and_stats.append(f"📝 {row['Notes']}")
+                            with col2:
+                                st.write(f"**Séries:** {exercise.sets}")
                             
-                            if all_time_max is not None:
-                                if last_max == all_time_max:
-                                    notes_and_stats.append(f"**Dernier max :** {last_max} kg (🏅 Record)")
-                                else:
-                                    notes_and_stats.append(f"**Dernier max :** {last_max} kg | **Record :** {all_time_max} kg")
+                            # Inputs pour les poids de chaque série
+                            st.write("**Poids de travail (kg):**")
+                            cols = st.columns(exercise.sets)
                             
-                            if notes_and_stats:
-                                st.caption(" | ".join(notes_and_stats))
-                        
-                        with col2:
-                            st.write(f"**Séries:** {int(row['Séries'])}")
-                        
-                        # Inputs pour les poids de chaque série
-                        st.write("**Poids de travail (kg):**")
-                        cols = st.columns(int(row['Séries']))
+                            for serie_num in range(exercise.sets):
+                                with cols[serie_num]:
+                                    key = f"{date_str}_{exercise.name}_{serie_num}"
+                                    default_value = st.session_state.current_weights.get(key, 0.0)
+                                    
+                                    weight = st.number_input(
+                                        f"Série {serie_num + 1}",
+                                        min_value=0.0,
+                                        max_value=500.0,
+                                        value=float(default_value),
+                                        step=0.5,
+                                        key=key,
+                                        on_change=live.record_set if live_mode else None,
+                                        args=(
+                                            supabase, st.session_state.user.id, date_str,
+                                            exercise.name, serie_num, key, save_live_snapshot
+                                        ) if live_mode else None
+                                    )
+                                    st.session_state.current_weights[key] = weight
+                
+                st.markdown("---")
+                
+                # Bouton pour sauvegarder la séance
+                col1, col2, col3 = st.columns([1, 2, 1])
+                with col2:
+                    if st.button("✅ Enregistrer la séance", type="primary", use_container_width=True):
+                        # Filtrer les poids pour exclure les exercices skippés
+                        filtered_weights = {}
+                        for key, weight in st.session_state.current_weights.items():
+                            # Extraire l'index de l'exercice de la clé
+                            parts = key.split('_')
+                            if len(parts) >= 3:
+                                exercise_key = f"{parts[0]}_{'_'.join(parts[1:-1])}"
+                                # N'inclure que si l'exercice n'est pas skippé
+                                if not st.session_state.skipped_exercises.get(exercise_key, False):
+                                    filtered_weights[key] = weight
                         
-                        for serie_num in range(int(row['Séries'])):
-                            with cols[serie_num]:
-                                key = f"{date_str}_{row['Exercice']}_{serie_num}"
-                                default_value = st.session_state.current_weights.get(key, 0.0)
-                                
-                                weight = st.number_input(
-                                    f"Série {serie_num + 1}",
-                                    min_value=0.0,
-                                    max_value=500.0,
-                                    value=float(default_value),
-                                    step=0.5,
-                                    key=key
-                                )
-                                st.session_state.current_weights[key] = weight
-            
-            st.markdown("---")
-            
-            # Bouton pour sauvegarder la séance
-            col1, col2, col3 = st.columns([1, 2, 1])
-            with col2:
-                if st.button("✅ Enregistrer la séance", type="primary", use_container_width=True):
-                    # Filtrer les poids pour exclure les exercices skippés
-                    filtered_weights = {}
-                    for key, weight in st.session_state.current_weights.items():
-                        # Extraire l'index de l'exercice de la clé
-                        parts = key.split('_')
-                        if len(parts) >= 3:
-                            exercise_key = f"{parts[0]}_{'_'.join(parts[1:-1])}"
-                            # N'inclure que si l'exercice n'est pas skippé
-                            if not st.session_state.skipped_exercises.get(exercise_key, False):
-                                filtered_weights[key] = weight
-                    
-                    # Sauvegarder dans l'historique
-                    st.session_state.history[date_str] = {
-                        'workout_type': workout_type,
-                        'day_number': day_number,
-                        'weights': filtered_weights,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                    if save_all_data():
-                        st.success("✅ Séance enregistrée avec succès !")
-                        st.balloons()
+                        # Sauvegarder dans l'historique
+                        if record_session(date_str, workout_type, day_number, filtered_weights):
+                            st.success("✅ Séance enregistrée avec succès !")
+                            st.balloons()
 
 # PAGE: Historique
 elif page == "📊 Historique":
@@ -504,177 +1199,99 @@ elif page == "📊 Historique":
     if not st.session_state.history:
         st.info("Aucune séance enregistrée pour le moment.")
     else:
-        # Trier les dates par ordre décroissant
-        sorted_dates = sorted(st.session_state.history.keys(), reverse=True)
+        # Séances triées et séries regroupées (souvent préchargées depuis la séance du jour)
+        history_entries = cached_view(*history_page_view(), sections=('history', 'settings'))
         
-        for date_str in sorted_dates:
-            session = st.session_state.history[date_str]
-            
+        for date_str, session, lines in history_entries:
             with st.expander(f"📅 {date_str} - {session['workout_type']} (Jour {session['day_number']})", expanded=False):
                 st.write(f"**Type d'entraînement:** {session['workout_type']}")
                 st.write(f"**Jour du programme:** Jour {session['day_number']}")
                 
-                # Afficher les poids enregistrés
-                weights = session['weights']
-                
-                if weights:
-                    # Regrouper par exercice
-                    exercises = {}
-                    for key, weight in weights.items():
-                        if weight > 0:
-                            parts = key.split('_')
-                            if len(parts) >= 3:
-                                ex_name = "_".join(parts[1:-1])
-                                serie_num = int(parts[-1])
-                                
-                                if ex_name not in exercises:
-                                    exercises[ex_name] = []
-                                exercises[ex_name].append((serie_num, weight))
-                    
-                    # Afficher les exercices et leurs poids
-                    day_in_cycle = (session['day_number'] - 1) % program_length + 1
-                    day_workout = df_programme[df_programme['Jour'] == day_in_cycle]
-                    
-                    for idx, row in day_workout.iterrows():
-                        if row['Exercice'] in exercises:
-                            st.write(f"**{row['Exercice']}**")
-                            series_data = sorted(exercises[row['Exercice']])
-                            weights_str = " | ".join([f"S{s+1}: {w}kg" for s, w in series_data])
-                            st.caption(weights_str)
+                # Afficher les exercices et leurs poids (programme suivi ce jour-là)
+                for exercise_name, weights_str in lines:
+                    st.write(f"**{exercise_name}**")
+                    st.caption(weights_str)
                 
                 # Bouton pour supprimer la séance
                 if st.button(f"🗑️ Supprimer", key=f"del_{date_str}"):
-                    del st.session_state.history[date_str]
-                    save_all_data()
+                    exercises = leaderboards.session_exercises(session)
+                    state.delete_session(date_str)
+                    if save_all_data(f"Suppression du {date_str}") and st.session_state.leaderboard_opt_in:
+                        update_leaderboards([date_str], exercises)
                     st.rerun()
+    
+    # Les séances plus anciennes ne sont chargées qu'à la demande
+    if st.session_state.history_loaded_from is not None:
+        if st.button("⬇️ Charger les séances plus anciennes", use_container_width=True):
+            ensure_history_loaded(calendar.previous_month(st.session_state.history_loaded_from, HISTORY_PAGE_MONTHS))
+            st.rerun()
 
 # PAGE: Statistiques
 elif page == "📈 Statistiques":
+    # Plotly n'est chargé qu'ici (le mode salle ne l'importe jamais)
+    import charts
+
     st.header("Statistiques et progression")
     
-    if not st.session_state.history and not st.session_state.body_weight_history:
+    has_sessions = bool(st.session_state.history) or st.session_state.history_loaded_from is not None
+    
+    if not has_sessions and not st.session_state.body_weight_history:
         st.info("Aucune donnée disponible. Enregistrez vos séances ou votre poids pour voir vos statistiques.")
     else:
+        # Période analysée : élargir avant la fenêtre chargée charge les mois manquants
+        default_start, default_end = default_stats_period()
+        
+        period = st.date_input(
+            "Période analysée",
+            value=(default_start, default_end),
+            format="DD/MM/YYYY",
+            key="stats_period"
+        )
+        period_start = period[0] if period else default_start
+        period_end = period[1] if len(period) > 1 else datetime.now().date()
+        
+        ensure_history_loaded(period_start.strftime("%Y-%m"))
+        
         # Onglets pour différentes vues
-        tab1, tab2, tab3 = st.tabs(["📊 Par exercice", "📈 Volume global", "⚖️ Poids du corps"])
+        tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📊 Par exercice", "📈 Volume global", "⚖️ Poids du corps", "💪 Groupes musculaires", "🏆 Classements", "📅 Régularité"])
         
         with tab1:
-            # Sélection de l'exercice à analyser
-            all_exercises = df_programme[df_programme['Type'] != 'Repos']['Exercice'].unique()
+            # Recherche parmi les exercices de tous les programmes
+            exercise_query = st.text_input(
+                "🔎 Rechercher un exercice (tous programmes)",
+                key="exercise_search"
+            )
             
+            if exercise_query:
+                all_exercises = search.get_exercise_index(supabase).search(exercise_query, limit=50)
+                if not all_exercises:
+                    st.caption("Aucun exercice trouvé.")
+            else:
+                # Par défaut : exercices du programme actif
+                all_exercises = df_programme[df_programme['Type'] != 'Repos']['Exercice'].unique()
+            
+            # Sélection de l'exercice à analyser
             selected_exercise = st.selectbox(
                 "Choisir un exercice",
                 options=all_exercises
             )
             
             if selected_exercise:
-                # Collecter les données pour cet exercice
-                exercise_data = []
-                
-                for date_str, session in sorted(st.session_state.history.items()):
-                    weights = session['weights']
-                    day_number = session['day_number']
-                    
-                    # Trouver l'exercice dans le programme du jour
-                    day_in_cycle = (day_number - 1) % program_length + 1
-                    day_workout = df_programme[df_programme['Jour'] == day_in_cycle]
-                    exercise_row = day_workout[day_workout['Exercice'] == selected_exercise]
-                    
-                    if not exercise_row.empty:
-                        # Collecter les poids pour cet exercice
-                        exercise_weights = []
-                        for key, weight in weights.items():
-                            # Vérifier que la clé correspond exactement à l'exercice
-                            parts = key.split('_')
-                            stored_name = "_".join(parts[1:-1])
-                            if len(parts) >= 3 and stored_name == selected_exercise and weight > 0:
-                                exercise_weights.append(weight)
-                        
-                        if exercise_weights:
-                            exercise_data.append({
-                                'date': date_str,
-                                'max_weight': max(exercise_weights),
-                                'avg_weight': sum(exercise_weights) / len(exercise_weights),
-                                'total_volume': sum(exercise_weights) * len(exercise_weights)
-                            })
+                exercise_stats = cached_view(*exercise_view(selected_exercise, period_start, period_end))
                 
-                if exercise_data:
-                    df_stats = pd.DataFrame(exercise_data)
-                    df_stats['date'] = pd.to_datetime(df_stats['date'])
-                    
-                    # Regrouper par date en prenant la valeur maximale pour chaque date
-                    df_stats = df_stats.groupby('date').agg({
-                        'max_weight': 'max',
-                        'avg_weight': 'mean',
-                        'total_volume': 'sum'
-                    }).reset_index()
-                    
-                    df_stats = df_stats.sort_values('date')
+                if exercise_stats is not None:
+                    df_stats = exercise_stats['df_stats']
                     
                     # Graphique de progression
                     col1, col2 = st.columns(2)
                     
                     with col1:
-                        # Charge maximale
-                        fig_max = go.Figure()
-                        fig_max.add_trace(go.Scatter(
-                            x=df_stats['date'],
-                            y=df_stats['max_weight'],
-                            mode='lines+markers',
-                            name='Charge max',
-                            line=dict(color='#FF6B6B', width=3),
-                            marker=dict(size=8)
-                        ))
-                        fig_max.update_layout(
-                            title="Charge maximale",
-                            xaxis_title="Date",
-                            yaxis_title="Poids (kg)",
-                            hovermode='x unified',
-                            xaxis=dict(
-                                tickformat='%d-%m-%Y'
-                            )
-                        )
-                        st.plotly_chart(fig_max, use_container_width=True)
+                        st.plotly_chart(exercise_stats['fig_max'], use_container_width=True)
                     
                     with col2:
-                        # Charge moyenne
-                        fig_avg = go.Figure()
-                        fig_avg.add_trace(go.Scatter(
-                            x=df_stats['date'],
-                            y=df_stats['avg_weight'],
-                            mode='lines+markers',
-                            name='Charge moyenne',
-                            line=dict(color='#4ECDC4', width=3),
-                            marker=dict(size=8)
-                        ))
-                        fig_avg.update_layout(
-                            title="Charge moyenne",
-                            xaxis_title="Date",
-                            yaxis_title="Poids (kg)",
-                            hovermode='x unified',
-                            xaxis=dict(
-                                tickformat='%d-%m-%Y'
-                            )
-                        )
-                        st.plotly_chart(fig_avg, use_container_width=True)
+                        st.plotly_chart(exercise_stats['fig_avg'], use_container_width=True)
                     
-                    # Volume pour cet exercice
-                    fig_volume = go.Figure()
-                    fig_volume.add_trace(go.Bar(
-                        x=df_stats['date'],
-                        y=df_stats['total_volume'],
-                        name='Volume total',
-                        marker_color='#95E1D3'
-                    ))
-                    fig_volume.update_layout(
-                        title=f"Volume total - {selected_exercise}",
-                        xaxis_title="Date",
-                        yaxis_title="Volume (kg)",
-                        xaxis=dict(
-                            tickformat='%d-%m-%Y'
-                        )
-                    )
-                    st.plotly_chart(fig_volume, use_container_width=True)
+                    st.plotly_chart(exercise_stats['fig_volume'], use_container_width=True)
                     
                     # Statistiques récapitulatives
                     st.markdown("---")
@@ -717,90 +1334,12 @@ elif page == "📈 Statistiques":
         with tab2:
             st.subheader("Volume d'entraînement global")
             
-            # Calculer le volume total par séance avec type
-            volume_data = []
+            volume_stats = cached_view(*volume_view(period_start, period_end))
             
-            for date_str, session in sorted(st.session_state.history.items()):
-                weights = session['weights']
-                workout_type = session['workout_type']
-                
-                # Calculer le volume total de la séance
-                total_volume = sum([w for w in weights.values() if w > 0])
-                
-                if total_volume > 0:
-                    # Déterminer la catégorie
-                    if 'PUSH' in workout_type:
-                        category = 'PUSH'
-                        color = '#FF6B6B'
-                    elif 'PULL' in workout_type:
-                        category = 'PULL'
-                        color = '#4ECDC4'
-                    elif 'LEGS' in workout_type or 'LEG' in workout_type:
-                        category = 'LEGS'
-                        color = '#95E1D3'
-                    else:
-                        category = 'Autre'
-                        color = '#A8A8A8'
-                    
-                    volume_data.append({
-                        'date': date_str,
-                        'volume': total_volume,
-                        'type': category,
-                        'color': color,
-                        'workout_name': workout_type
-                    })
-            
-            if volume_data:
-                df_volume = pd.DataFrame(volume_data)
-                df_volume['date'] = pd.to_datetime(df_volume['date'])
-                
-                # Regrouper par date et type pour éviter les doublons
-                df_volume = df_volume.groupby(['date', 'type', 'color']).agg({
-                    'volume': 'sum',
-                    'workout_name': 'first'
-                }).reset_index()
-                
-                df_volume = df_volume.sort_values('date')
+            if volume_stats is not None:
+                df_volume = volume_stats['df_volume']
                 
-                # Créer le graphique avec code couleur
-                fig_global = go.Figure()
-                
-                # Ajouter une barre pour chaque type
-                for workout_type in ['PUSH', 'PULL', 'LEGS', 'Autre']:
-                    df_type = df_volume[df_volume['type'] == workout_type]
-                    if not df_type.empty:
-                        fig_global.add_trace(go.Bar(
-                            x=df_type['date'],
-                            y=df_type['volume'],
-                            name=workout_type,
-                            marker_color=df_type['color'].iloc[0],
-                            hovertemplate='<b>%{x|%d/%m/%Y}</b><br>' +
-                                        'Volume: %{y:.0f} kg<br>' +
-                                        '<extra></extra>'
-                        ))
-                
-                fig_global.update_layout(
-                    title="Volume total par séance",
-                    xaxis_title="Date",
-                    yaxis_title="Volume total (kg)",
-                    barmode='group',
-                    hovermode='x unified',
-                    legend=dict(
-                        title="Type de séance",
-                        orientation="h",
-                        yanchor="bottom",
-                        y=1.02,
-                        xanchor="right",
-                        x=1
-                    ),
-                    xaxis=dict(
-                        tickformat='%d-%m-%Y',
-                        dtick=86400000.0  # 1 jour en millisecondes
-                    ),
-                    height=500
-                )
-                
-                st.plotly_chart(fig_global, use_container_width=True)
+                st.plotly_chart(volume_stats['fig_global'], use_container_width=True)
                 
                 # Statistiques globales
                 st.markdown("---")
@@ -858,92 +1397,27 @@ elif page == "📈 Statistiques":
             if not st.session_state.body_weight_history:
                 st.info("Aucun poids enregistré pour le moment. Enregistrez votre poids dans l'onglet 'Séance du jour'.")
             else:
-                # Préparation des données
-                bw_data = [
-                    {'date': date, 'weight': weight} 
-                    for date, weight in st.session_state.body_weight_history.items()
-                ]
-                df_bw = pd.DataFrame(bw_data)
-                df_bw['date'] = pd.to_datetime(df_bw['date'])
-                df_bw = df_bw.sort_values('date')
-                
-                # Graphique
-                fig_bw = go.Figure()
-                
-                # Courbe de poids (réelle)
-                fig_bw.add_trace(go.Scatter(
-                    x=df_bw['date'],
-                    y=df_bw['weight'],
-                    mode='lines+markers',
-                    name='Poids actuel',
-                    line=dict(color='#3B8ED0', width=3),
-                    marker=dict(size=8)
-                ))
-                
-                # Ligne d'objectif
                 target_weight = st.session_state.target_body_weight
                 target_date_str = st.session_state.target_body_weight_date
                 
-                if target_weight > 0:
-                    fig_bw.add_hline(
-                        y=target_weight, 
-                        line_dash="dash", 
-                        line_color="#28a745", 
-                        annotation_text=f"Objectif: {target_weight}kg",
-                        annotation_position="bottom right"
-                    )
-                    
-                    if target_date_str:
-                        target_date = pd.to_datetime(target_date_str)
-                        start_date = df_bw['date'].iloc[0]
-                        start_weight = df_bw['weight'].iloc[0]
-                        
-                        # Point cible (étoile)
-                        fig_bw.add_trace(go.Scatter(
-                            x=[target_date],
-                            y=[target_weight],
-                            mode='markers',
-                            name='Objectif cible',
-                            marker=dict(color='#28a745', size=12, symbol='star')
-                        ))
-                        
-                        # 1. Trajectoire Idéale (Ligne pointillée Start -> Target)
-                        fig_bw.add_trace(go.Scatter(
-                            x=[start_date, target_date],
-                            y=[start_weight, target_weight],
-                            mode='lines',
-                            name='Trajectoire Idéale',
-                            line=dict(color='rgba(40, 167, 69, 0.5)', width=2, dash='dot')
-                        ))
-                        
-                        # 2. Régression linéaire (Tendance actuelle)
-                        if len(df_bw) > 1:
-                            # Convert dates to days from start for regression
-                            days_from_start = (df_bw['date'] - start_date).dt.days
-                            # Calculate fit
-                            z = np.polyfit(days_from_start, df_bw['weight'], 1)
-                            p = np.poly1d(z)
-                            
-                            # Calculate trend line
-                            trend_y = p(days_from_start)
-                            
-                            fig_bw.add_trace(go.Scatter(
-                                x=df_bw['date'],
-                                y=trend_y,
-                                mode='lines',
-                                name='Tendance',
-                                line=dict(color='#FFA07A', width=2)
-                            ))
+                def build_body_weight_view():
+                    body_weight_history = st.session_state.body_weight_history
+                    forecast = analytics.body_weight_forecast(
+                        body_weight_history, target_weight, target_date_str, datetime.now().date()
+                    ) if target_weight > 0 and target_date_str else None
+                    return {
+                        **charts.body_weight_progress(body_weight_history, target_weight, target_date_str, forecast),
+                        'forecast': forecast
+                    }
                 
-                fig_bw.update_layout(
-                    title="Évolution du poids",
-                    xaxis_title="Date",
-                    yaxis_title="Poids (kg)",
-                    hovermode='x unified',
-                    xaxis=dict(tickformat='%d-%m-%Y')
+                body_weight_view = cached_view(
+                    ('body_weight', target_weight, target_date_str, datetime.now().date()),
+                    build_body_weight_view,
+                    sections=('body_weight',)
                 )
+                df_bw = body_weight_view['df_bw']
                 
-                st.plotly_chart(fig_bw, use_container_width=True)
+                st.plotly_chart(body_weight_view['fig_bw'], use_container_width=True)
                 
                 # Métriques existantes
                 st.markdown("---")
@@ -1048,6 +1522,200 @@ elif page == "📈 Statistiques":
                                      f"{delta_val:.1f} kg vs Trajectoire idéale",
                                      delta_color=delta_color
                                  )
+                         
+                         # Prévision à partir du rythme récent et des variations d'un jour à l'autre
+                         forecast = body_weight_view['forecast']
+                         if forecast is not None:
+                             col_c, col_d = st.columns(2)
+                             with col_c:
+                                 st.metric(
+                                     "Probabilité d'atteindre l'objectif",
+                                     f"{forecast['probability']:.0%}",
+                                     f"le {target_date.strftime('%d/%m/%Y')}",
+                                     delta_color="off"
+                                 )
+                             with col_d:
+                                 st.metric(
+                                     "Rythme récent",
+                                     f"{forecast['rate_per_week']:+.2f} kg/semaine",
+                                     f"± {forecast['noise']:.1f} kg d'un jour à l'autre",
+                                     delta_color="off"
+                                 )
+                             st.caption(
+                                 f"Prévision sur {analytics.FORECAST_SIMULATIONS} trajectoires simulées ; "
+                                 f"la bande du graphique contient 80 % d'entre elles."
+                             )
+                         else:
+                             st.caption(f"Au moins 3 pesées sur les {analytics.RATE_WINDOW_DAYS} derniers jours sont nécessaires pour la prévision.")
+
+        with tab4:
+            st.subheader("💪 Répartition par groupe musculaire")
+            
+            muscle_metric = st.radio("Mesure", ["Séries", "Volume (kg)"], horizontal=True, key="muscle_metric")
+            
+            def build_muscle_view():
+                flat = flat_history()
+                flat = flat[(flat['date'] >= pd.Timestamp(period_start)) & (flat['date'] <= pd.Timestamp(period_end))]
+                mapping = analytics.muscle_group_mapping(flat['exercise'].unique(), df_programme)
+                sets, volume = analytics.weekly_muscle_volume(flat, mapping)
+                if sets.empty:
+                    return None
+                return {
+                    'sets': sets,
+                    'volume': volume,
+                    'fig_sets': charts.muscle_group_heatmap(sets, "Séries"),
+                    'fig_volume': charts.muscle_group_heatmap(volume, "Volume (kg)")
+                }
+            
+            muscle_view = cached_view(('muscles', period_start, period_end), build_muscle_view, sections=('history', 'settings'))
+            
+            if muscle_view is not None:
+                if muscle_metric == "Séries":
+                    st.plotly_chart(muscle_view['fig_sets'], use_container_width=True)
+                    totals = muscle_view['sets'].sum()
+                else:
+                    st.plotly_chart(muscle_view['fig_volume'], use_container_width=True)
+                    totals = muscle_view['volume'].sum()
+                
+                # Moyenne hebdomadaire par groupe pour repérer les déséquilibres
+                weekly_mean = (totals / len(muscle_view['sets'])).sort_values(ascending=False)
+                cols = st.columns(min(4, len(weekly_mean)))
+                for i, (group, value) in enumerate(weekly_mean.items()):
+                    with cols[i % len(cols)]:
+                        st.metric(group, f"{value:.1f} / sem.")
+            else:
+                st.info("Aucune série enregistrée sur la période.")
+            
+            st.subheader("🩺 Charge aiguë / chronique")
+            st.caption(
+                "Volume moyen des 7 derniers jours rapporté à celui des 28 derniers jours. "
+                "Au-delà de 1,3 la charge augmente plus vite que l'organisme ne s'y est habitué ; "
+                "au-delà de 1,5 le risque de blessure augmente nettement."
+            )
+            
+            def build_workload_view():
+                ratio = workload_view()
+                if ratio.empty:
+                    return None
+                ratio = ratio[(ratio.index >= pd.Timestamp(period_start)) & (ratio.index <= pd.Timestamp(period_end))]
+                ratio = ratio.dropna(how='all')
+                if ratio.empty:
+                    return None
+                return charts.workload_ratio_chart(ratio, analytics.WORKLOAD_BANDS, analytics.TOTAL_GROUP)
+            
+            fig_workload = cached_view(('workload_chart', period_start, period_end), build_workload_view, sections=('history', 'settings'))
+            if fig_workload is not None:
+                st.plotly_chart(fig_workload, use_container_width=True)
+            else:
+                st.info(f"Il faut au moins {analytics.CHRONIC_DAYS} jours d'historique pour calculer ce ratio.")
+        
+        with tab5:
+            st.subheader("🏆 Classements de la salle")
+            
+            if not st.session_state.leaderboard_opt_in:
+                st.info("Activez la participation aux classements dans ⚙️ Configuration pour y apparaître.")
+            
+            # Tous les classements utiles en une seule requête
+            today = datetime.now().date()
+            boards = leaderboards.current_boards(supabase, today) or {}
+            
+            def leaderboard_table(entries, column):
+                return pd.DataFrame({
+                    'Rang': range(1, len(entries) + 1),
+                    'Membre': [
+                        f"{entry['username']} (vous)" if entry['user_id'] == st.session_state.user.id else entry['username']
+                        for entry in entries
+                    ],
+                    column: [entry['value'] for entry in entries]
+                })
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**🔥 Semaines consécutives**")
+                streak_entries = boards.get((leaderboards.STREAK_BOARD, leaderboards.ALL_TIME), [])
+                if streak_entries:
+                    st.dataframe(leaderboard_table(streak_entries, "Semaines"), hide_index=True, use_container_width=True)
+                else:
+                    st.caption("Aucune entrée.")
+            with col2:
+                st.markdown("**📦 Volume de la semaine**")
+                volume_entries = boards.get((leaderboards.VOLUME_BOARD, leaderboards.week_period(today)), [])
+                if volume_entries:
+                    st.dataframe(leaderboard_table(volume_entries, "Volume (kg)"), hide_index=True, use_container_width=True)
+                else:
+                    st.caption("Aucune entrée.")
+            
+            st.markdown("**🏋️ Charge maximale par exercice**")
+            exercise_boards = sorted(
+                board[len(leaderboards.max_board('')):]
+                for board, period in boards
+                if board.startswith(leaderboards.max_board('')) and period == leaderboards.ALL_TIME
+            )
+            if exercise_boards:
+                board_exercise = st.selectbox("Exercice", exercise_boards, key="leaderboard_exercise")
+                st.dataframe(
+                    leaderboard_table(boards[(leaderboards.max_board(board_exercise), leaderboards.ALL_TIME)], "Charge max (kg)"),
+                    hide_index=True,
+                    use_container_width=True
+                )
+            else:
+                st.caption("Aucune entrée.")
+        
+        with tab6:
+            st.subheader("📅 Régularité")
+            
+            current_streak, longest_streak = streak_summary()
+            
+            def build_adherence_view():
+                today = datetime.now().date()
+                days, status = adherence_status(period_start, period_end)
+                year_days, year_status = adherence_status(today - timedelta(days=364), today)
+                planned = np.isin(status, adherence.PLANNED).sum()
+                df_weeks = adherence.adherence_by_period(days, status, 'W')
+                return {
+                    'adherence': (status == adherence.TRAINED).sum() / planned if planned else None,
+                    'skip_rate': (status == adherence.SKIPPED).sum() / planned if planned else None,
+                    'df_weeks': df_weeks,
+                    'fig_weeks': charts.weekly_adherence(df_weeks) if not df_weeks.empty else None,
+                    'df_months': adherence.adherence_by_period(days, status, 'M'),
+                    'fig_calendar': charts.adherence_calendar(year_days, year_status, adherence.STATUS_LABELS)
+                }
+            
+            adherence_view = cached_view(
+                ('adherence', period_start, period_end),
+                build_adherence_view,
+                sections=('history', 'skips', 'settings')
+            )
+            
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Série en cours", f"{current_streak} séances")
+            with col2:
+                st.metric("Plus longue série", f"{longest_streak} séances")
+            with col3:
+                st.metric("Adhérence (période)", f"{adherence_view['adherence']:.0%}" if adherence_view['adherence'] is not None else "—")
+            with col4:
+                st.metric("Taux de skip (période)", f"{adherence_view['skip_rate']:.0%}" if adherence_view['skip_rate'] is not None else "—")
+            st.caption("Série : jours d'entraînement prévus réalisés d'affilée (les jours de repos ne la coupent pas, un skip ou un jour manqué si).")
+            
+            st.plotly_chart(adherence_view['fig_calendar'], use_container_width=True)
+            if st.session_state.history_loaded_from is not None:
+                st.caption("Les jours antérieurs à l'historique chargé apparaissent en gris.")
+                if st.button("⬇️ Charger l'année complète", key="adherence_load_year"):
+                    ensure_history_loaded((datetime.now().date() - timedelta(days=364)).strftime("%Y-%m"))
+                    st.rerun()
+            
+            if adherence_view['fig_weeks'] is not None:
+                st.plotly_chart(adherence_view['fig_weeks'], use_container_width=True)
+                df_months = adherence_view['df_months'].copy()
+                df_months['période'] = df_months['période'].dt.strftime("%m/%Y")
+                df_months['adhérence'] = (df_months['adhérence'] * 100).round(0)
+                df_months['taux de skip'] = (df_months['taux de skip'] * 100).round(0)
+                st.dataframe(
+                    df_months.rename(columns={'adhérence': 'adhérence (%)', 'taux de skip': 'taux de skip (%)'}),
+                    hide_index=True,
+                    use_container_width=True
+                )
 
 # Sidebar - Informations
 st.sidebar.markdown("---")
@@ -1057,9 +1725,8 @@ st.sidebar.markdown("### 📋 Calendrier du programme")
 today = datetime.now().date()
 for i in range(7):
     day_date = today + timedelta(days=i)
-    day_num = utils.get_program_day(day_date, st.session_state.start_date, st.session_state.skipped_days)
-    day_in_cycle = (day_num - 1) % program_length + 1
-    workout_info = df_programme[df_programme['Jour'] == day_in_cycle].iloc[0]['Type']
+    day_num = calendar.get_program_day(day_date, st.session_state.start_date, st.session_state.skipped_days)
+    workout_info = programme.day_type(day_num)
     
     is_today = day_date == today
     is_skipped = day_date.strftime("%Y-%m-%d") in st.session_state.skipped_days
@@ -1085,6 +1752,16 @@ st.sidebar.info(
     """
 )
 
+# Profilage (administrateurs)
+profiling.render_sidebar()
+
 # Footer
 st.sidebar.markdown("---")
-st.sidebar.caption("💪 Tracker de Musculation v4.2 - Powered by Supabase")
\ No newline at end of file
+st.sidebar.caption("💪 Tracker de Musculation v4.2 - Powered by Supabase")
+
+profiling.finish_capture(page, len(st.session_state.history))
+profiling.finish_payload_meter("normale")
+
+# Vues suivantes probables, calculées pendant que l'utilisateur lit la page
+if page == "📅 Séance du jour":
+    prefetch_next_views()
@@ -1,6 +1,101 @@
 import streamlit as st
+import streamlit.components.v1 as components
+import hashlib
+import json
+import secrets
+import time
 import database
 
+# Cookie contenant un jeton opaque à usage unique : le refresh token Supabase
+# reste côté serveur (table app_sessions), le cookie n'en donne que l'empreinte
+SESSION_COOKIE = "gymtracking_session"
+SESSION_COOKIE_MAX_AGE = 7 * 24 * 3600   # 7 jours, prolongés à chaque usage
+SESSION_REFRESH_MARGIN = 300             # Renouveler 5 min avant expiration
+
+def _set_session_cookie(value, max_age):
+    """Écrit (ou efface) le cookie de session dans le navigateur"""
+    cookie = f"{SESSION_COOKIE}={value}; Max-Age={max_age}; Path=/; SameSite=Strict; Secure"
+    components.html(f"<script>window.parent.document.cookie = {json.dumps(cookie)};</script>", height=0)
+
+def _token_hash(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _rotate_session_token(supabase):
+    """
+    Émet un nouveau jeton de session persistante pour le refresh token
+    courant et révoque le précédent
+    """
+    token = secrets.token_urlsafe(32)
+    token_hash = _token_hash(token)
+    if database.create_app_session(
+        supabase, token_hash, st.session_state.session.refresh_token,
+        SESSION_COOKIE_MAX_AGE, st.session_state.get('session_token_hash')
+    ):
+        st.session_state.session_token_hash = token_hash
+        _set_session_cookie(token, SESSION_COOKIE_MAX_AGE)
+
+def _start_session(user, session, username):
+    """Enregistre l'utilisateur connecté dans le session state"""
+    st.session_state.logged_in = True
+    st.session_state.user = user
+    st.session_state.session = session
+    st.session_state.username = username
+    st.session_state.session_cookie_pending = True
+    st.session_state.pop('logged_out', None)
+
+def restore_session(supabase):
+    """
+    Restaure l'utilisateur à partir du jeton conservé en cookie, sans
+    nouvelle saisie du mot de passe. Le jeton est consommé : un nouveau
+    est émis. Retourne True si la session a été restaurée.
+    """
+    if st.session_state.get('logged_out') or st.session_state.get('session_restore_failed'):
+        # Effacer le cookie après une déconnexion ou un jeton invalide
+        _set_session_cookie("", 0)
+        return False
+    
+    token = st.context.cookies.get(SESSION_COOKIE)
+    if not token or not isinstance(token, str):
+        return False
+    
+    refresh_token = database.consume_app_session(supabase, _token_hash(token))
+    user, session, error = (
+        database.refresh_user_session(supabase, refresh_token) if refresh_token else (None, None, None)
+    )
+    if not (user and session):
+        st.session_state.session_restore_failed = True
+        _set_session_cookie("", 0)
+        return False
+    
+    metadata = getattr(user, 'user_metadata', None) or {}
+    username = metadata.get('username') or user.email.split('@')[0]
+    _start_session(user, session, username)
+    return True
+
+def keep_session_alive(supabase):
+    """Renouvelle silencieusement le token d'accès avant son expiration"""
+    session = st.session_state.get('session')
+    if session and session.expires_at and session.expires_at - time.time() < SESSION_REFRESH_MARGIN:
+        user, new_session, error = database.refresh_user_session(supabase, session.refresh_token)
+        if user and new_session:
+            st.session_state.user = user
+            st.session_state.session = new_session
+            st.session_state.session_cookie_pending = True
+        else:
+            st.session_state.clear()
+            st.session_state.logged_out = True
+            st.rerun()
+    
+    # Le refresh token change à chaque renouvellement : nouveau jeton de session
+    if st.session_state.pop('session_cookie_pending', False):
+        _rotate_session_token(supabase)
+
+def logout(supabase):
+    """Déconnecte l'utilisateur et révoque le jeton de ce navigateur"""
+    database.logout_user(supabase, st.session_state.get('session_token_hash'))
+    st.session_state.clear()
+    st.session_state.logged_out = True
+
 def login_page(supabase):
     """Affiche la page de connexion"""
     st.title("🔐 Connexion - Tracker Musculation")
@@ -25,10 +120,7 @@ def login_page(supabase):
                 else:
                     user, session, error = database.login_user(supabase, username, password)
                     if user and session:
-                        st.session_state.logged_in = True
-                        st.session_state.user = user
-                        st.session_state.session = session
-                        st.session_state.username = username
+                        _start_session(user, session, username)
                         st.success("✅ Connexion réussie !")
                         st.rerun()
                     else:
@@ -54,4 +146,4 @@ def login_page(supabase):
                     if success:
                         st.success(f"✅ {message} Vous pouvez maintenant vous connecter.")
                     else:
-                        st.error(f"❌ {message}")
\ No newline at end of file
+                        st.error(f"❌ {message}")
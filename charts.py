@@ -0,0 +1,458 @@
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+
+# Couleur associée à chaque catégorie de séance
+CATEGORY_COLORS = {
+    'PUSH': '#FF6B6B',
+    'PULL': '#4ECDC4',
+    'LEGS': '#95E1D3',
+    'Autre': '#A8A8A8'
+}
+
+def workout_category(workout_type):
+    """Détermine la catégorie (PUSH/PULL/LEGS/Autre) d'un type de séance"""
+    if 'PUSH' in workout_type:
+        return 'PUSH'
+    elif 'PULL' in workout_type:
+        return 'PULL'
+    elif 'LEGS' in workout_type or 'LEG' in workout_type:
+        return 'LEGS'
+    return 'Autre'
+
+def exercise_progress(history, exercise):
+    """
+    Construit les données et graphiques de progression d'un exercice,
+    quel que soit le programme suivi lors des séances.
+    Retourne None si aucune donnée n'est enregistrée pour cet exercice.
+    """
+    exercise_data = []
+
+    for date_str, session in sorted(history.items()):
+        # Collecter les poids pour cet exercice (le nom fait partie de la clé)
+        exercise_weights = []
+        for key, weight in session['weights'].items():
+            # Vérifier que la clé correspond exactement à l'exercice
+            parts = key.split('_')
+            stored_name = "_".join(parts[1:-1])
+            if len(parts) >= 3 and stored_name == exercise and weight > 0:
+                exercise_weights.append(weight)
+
+        if exercise_weights:
+            exercise_data.append({
+                'date': date_str,
+                'max_weight': max(exercise_weights),
+                'avg_weight': sum(exercise_weights) / len(exercise_weights),
+                'total_volume': sum(exercise_weights) * len(exercise_weights)
+            })
+
+    if not exercise_data:
+        return None
+
+    df_stats = pd.DataFrame(exercise_data)
+    df_stats['date'] = pd.to_datetime(df_stats['date'])
+
+    # Regrouper par date en prenant la valeur maximale pour chaque date
+    df_stats = df_stats.groupby('date').agg({
+        'max_weight': 'max',
+        'avg_weight': 'mean',
+        'total_volume': 'sum'
+    }).reset_index()
+
+    df_stats = df_stats.sort_values('date')
+
+    # Charge maximale
+    fig_max = go.Figure()
+    fig_max.add_trace(go.Scatter(
+        x=df_stats['date'],
+        y=df_stats['max_weight'],
+        mode='lines+markers',
+        name='Charge max',
+        line=dict(color='#FF6B6B', width=3),
+        marker=dict(size=8)
+    ))
+    fig_max.update_layout(
+        title="Charge maximale",
+        xaxis_title="Date",
+        yaxis_title="Poids (kg)",
+        hovermode='x unified',
+        xaxis=dict(
+            tickformat='%d-%m-%Y'
+        )
+    )
+
+    # Charge moyenne
+    fig_avg = go.Figure()
+    fig_avg.add_trace(go.Scatter(
+        x=df_stats['date'],
+        y=df_stats['avg_weight'],
+        mode='lines+markers',
+        name='Charge moyenne',
+        line=dict(color='#4ECDC4', width=3),
+        marker=dict(size=8)
+    ))
+    fig_avg.update_layout(
+        title="Charge moyenne",
+        xaxis_title="Date",
+        yaxis_title="Poids (kg)",
+        hovermode='x unified',
+        xaxis=dict(
+            tickformat='%d-%m-%Y'
+        )
+    )
+
+    # Volume pour cet exercice
+    fig_volume = go.Figure()
+    fig_volume.add_trace(go.Bar(
+        x=df_stats['date'],
+        y=df_stats['total_volume'],
+        name='Volume total',
+        marker_color='#95E1D3'
+    ))
+    fig_volume.update_layout(
+        title=f"Volume total - {exercise}",
+        xaxis_title="Date",
+        yaxis_title="Volume (kg)",
+        xaxis=dict(
+            tickformat='%d-%m-%Y'
+        )
+    )
+
+    return {
+        'df_stats': df_stats,
+        'fig_max': fig_max,
+        'fig_avg': fig_avg,
+        'fig_volume': fig_volume
+    }
+
+def global_volume(history):
+    """
+    Construit les données et le graphique du volume total par séance.
+    Retourne None si aucun volume n'est enregistré.
+    """
+    volume_data = []
+
+    for date_str, session in sorted(history.items()):
+        weights = session['weights']
+        workout_type = session['workout_type']
+
+        # Calculer le volume total de la séance
+        total_volume = sum([w for w in weights.values() if w > 0])
+
+        if total_volume > 0:
+            category = workout_category(workout_type)
+            volume_data.append({
+                'date': date_str,
+                'volume': total_volume,
+                'type': category,
+                'color': CATEGORY_COLORS[category],
+                'workout_name': workout_type
+            })
+
+    if not volume_data:
+        return None
+
+    df_volume = pd.DataFrame(volume_data)
+    df_volume['date'] = pd.to_datetime(df_volume['date'])
+
+    # Regrouper par date et type pour éviter les doublons
+    df_volume = df_volume.groupby(['date', 'type', 'color']).agg({
+        'volume': 'sum',
+        'workout_name': 'first'
+    }).reset_index()
+
+    df_volume = df_volume.sort_values('date')
+
+    # Créer le graphique avec code couleur
+    fig_global = go.Figure()
+
+    # Ajouter une barre pour chaque type
+    for workout_type in ['PUSH', 'PULL', 'LEGS', 'Autre']:
+        df_type = df_volume[df_volume['type'] == workout_type]
+        if not df_type.empty:
+            fig_global.add_trace(go.Bar(
+                x=df_type['date'],
+                y=df_type['volume'],
+                name=workout_type,
+                marker_color=df_type['color'].iloc[0],
+                hovertemplate='<b>%{x|%d/%m/%Y}</b><br>' +
+                            'Volume: %{y:.0f} kg<br>' +
+                            '<extra></extra>'
+            ))
+
+    fig_global.update_layout(
+        title="Volume total par séance",
+        xaxis_title="Date",
+        yaxis_title="Volume total (kg)",
+        barmode='group',
+        hovermode='x unified',
+        legend=dict(
+            title="Type de séance",
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        xaxis=dict(
+            tickformat='%d-%m-%Y',
+            dtick=86400000.0  # 1 jour en millisecondes
+        ),
+        height=500
+    )
+
+    return {
+        'df_volume': df_volume,
+        'fig_global': fig_global
+    }
+
+def body_weight_progress(body_weight_history, target_weight, target_date_str, forecast=None):
+    """
+    Construit les données et le graphique d'évolution du poids du corps,
+    avec la prévision (médiane et bande de confiance) si elle est fournie
+    """
+    # Préparation des données
+    bw_data = [
+        {'date': date, 'weight': weight}
+        for date, weight in body_weight_history.items()
+    ]
+    df_bw = pd.DataFrame(bw_data)
+    df_bw['date'] = pd.to_datetime(df_bw['date'])
+    df_bw = df_bw.sort_values('date')
+
+    # Graphique
+    fig_bw = go.Figure()
+
+    # Courbe de poids (réelle)
+    fig_bw.add_trace(go.Scatter(
+        x=df_bw['date'],
+        y=df_bw['weight'],
+        mode='lines+markers',
+        name='Poids actuel',
+        line=dict(color='#3B8ED0', width=3),
+        marker=dict(size=8)
+    ))
+
+    # Ligne d'objectif
+    if target_weight > 0:
+        fig_bw.add_hline(
+            y=target_weight,
+            line_dash="dash",
+            line_color="#28a745",
+            annotation_text=f"Objectif: {target_weight}kg",
+            annotation_position="bottom right"
+        )
+
+        if target_date_str:
+            target_date = pd.to_datetime(target_date_str)
+            start_date = df_bw['date'].iloc[0]
+            start_weight = df_bw['weight'].iloc[0]
+
+            # Point cible (étoile)
+            fig_bw.add_trace(go.Scatter(
+                x=[target_date],
+                y=[target_weight],
+                mode='markers',
+                name='Objectif cible',
+                marker=dict(color='#28a745', size=12, symbol='star')
+            ))
+
+            # 1. Trajectoire Idéale (Ligne pointillée Start -> Target)
+            fig_bw.add_trace(go.Scatter(
+                x=[start_date, target_date],
+                y=[start_weight, target_weight],
+                mode='lines',
+                name='Trajectoire Idéale',
+                line=dict(color='rgba(40, 167, 69, 0.5)', width=2, dash='dot')
+            ))
+
+            # 2. Régression linéaire (Tendance actuelle)
+            if len(df_bw) > 1:
+                # Convert dates to days from start for regression
+                days_from_start = (df_bw['date'] - start_date).dt.days
+                # Calculate fit
+                z = np.polyfit(days_from_start, df_bw['weight'], 1)
+                p = np.poly1d(z)
+
+                # Calculate trend line
+                trend_y = p(days_from_start)
+
+                fig_bw.add_trace(go.Scatter(
+                    x=df_bw['date'],
+                    y=trend_y,
+                    mode='lines',
+                    name='Tendance',
+                    line=dict(color='#FFA07A', width=2)
+                ))
+
+    # 3. Prévision Monte Carlo : bande de confiance puis trajectoire médiane
+    if forecast is not None:
+        fig_bw.add_trace(go.Scatter(
+            x=forecast['dates'],
+            y=forecast['high'],
+            mode='lines',
+            line=dict(width=0),
+            showlegend=False,
+            hoverinfo='skip'
+        ))
+        fig_bw.add_trace(go.Scatter(
+            x=forecast['dates'],
+            y=forecast['low'],
+            mode='lines',
+            line=dict(width=0),
+            fill='tonexty',
+            fillcolor='rgba(59, 142, 208, 0.2)',
+            name='Prévision (80 %)',
+            hoverinfo='skip'
+        ))
+        fig_bw.add_trace(go.Scatter(
+            x=forecast['dates'],
+            y=forecast['median'],
+            mode='lines',
+            name='Prévision médiane',
+            line=dict(color='#3B8ED0', width=2, dash='dash')
+        ))
+
+    fig_bw.update_layout(
+        title="Évolution du poids",
+        xaxis_title="Date",
+        yaxis_title="Poids (kg)",
+        hovermode='x unified',
+        xaxis=dict(tickformat='%d-%m-%Y')
+    )
+
+    return {
+        'df_bw': df_bw,
+        'fig_bw': fig_bw
+    }
+
+def muscle_group_heatmap(matrix, metric_label):
+    """Heatmap semaines × groupes musculaires (séries ou volume)"""
+    fig = go.Figure(go.Heatmap(
+        x=matrix.index,
+        y=matrix.columns,
+        z=matrix.T.values,
+        colorscale='YlOrRd',
+        colorbar=dict(title=metric_label),
+        hovertemplate='Semaine du %{x|%d/%m/%Y}<br>%{y}: %{z:.0f}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=f"{metric_label} par semaine et groupe musculaire",
+        xaxis_title="Semaine",
+        xaxis=dict(tickformat='%d-%m-%Y'),
+        height=max(350, 40 * len(matrix.columns) + 150)
+    )
+    return fig
+
+# Couleur de chaque statut du calendrier de régularité (voir adherence.py)
+ADHERENCE_COLORS = ['#EBEDF0', '#2EA043', '#FFA07A', '#C6E2FF', '#FF6B6B']
+WEEKDAY_LABELS = ['Lun', 'Mar', 'Mer', 'Jeu', 'Ven', 'Sam', 'Dim']
+
+def adherence_calendar(days, status, labels):
+    """Calendrier (semaines × jours de la semaine) des jours entraînés, skippés, de repos et manqués"""
+    dates = pd.DatetimeIndex(days)
+    weekday = dates.weekday.to_numpy()
+    week_starts = (dates - pd.to_timedelta(weekday, unit='D')).normalize()
+    weeks, week_index = np.unique(week_starts, return_inverse=True)
+
+    z = np.full((7, len(weeks)), np.nan)
+    text = np.full((7, len(weeks)), "", dtype=object)
+    z[weekday, week_index] = status
+    text[weekday, week_index] = [f"{d:%d/%m/%Y} : {labels[s]}" for d, s in zip(dates, status)]
+
+    # Échelle discrète : une couleur par statut
+    n_status = len(ADHERENCE_COLORS)
+    colorscale = []
+    for i, color in enumerate(ADHERENCE_COLORS):
+        colorscale += [[i / n_status, color], [(i + 1) / n_status, color]]
+
+    fig = go.Figure(go.Heatmap(
+        x=weeks,
+        y=WEEKDAY_LABELS,
+        z=z,
+        text=text,
+        hovertemplate='%{text}<extra></extra>',
+        colorscale=colorscale,
+        zmin=-0.5,
+        zmax=n_status - 0.5,
+        xgap=2,
+        ygap=2,
+        showscale=False
+    ))
+    fig.update_layout(
+        title="Calendrier de régularité",
+        yaxis=dict(autorange='reversed'),
+        xaxis=dict(tickformat='%b %Y'),
+        height=260,
+        margin=dict(t=40, b=20)
+    )
+    return fig
+
+def weekly_adherence(df_weeks):
+    """Adhérence (%) et taux de skip par semaine"""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=df_weeks['période'],
+        y=df_weeks['adhérence'] * 100,
+        name='Adhérence',
+        marker_color='#2EA043'
+    ))
+    fig.add_trace(go.Scatter(
+        x=df_weeks['période'],
+        y=df_weeks['taux de skip'] * 100,
+        name='Taux de skip',
+        mode='lines+markers',
+        line=dict(color='#FFA07A', width=2)
+    ))
+    fig.update_layout(
+        title="Adhérence par semaine",
+        xaxis_title="Semaine",
+        yaxis_title="%",
+        yaxis=dict(range=[0, 105]),
+        xaxis=dict(tickformat='%d-%m-%Y'),
+        hovermode='x unified'
+    )
+    return fig
+
+# Couleur de fond de chaque zone du ratio aigu/chronique (voir analytics.WORKLOAD_BANDS)
+WORKLOAD_BAND_COLORS = {
+    'info': 'rgba(198, 226, 255, 0.35)',
+    'success': 'rgba(46, 160, 67, 0.15)',
+    'warning': 'rgba(255, 193, 7, 0.2)',
+    'error': 'rgba(255, 107, 107, 0.2)'
+}
+
+def workload_ratio_chart(ratio, bands, total_column, min_range=2.0):
+    """Ratio charge aiguë / chronique par jour, total et par groupe musculaire, sur fond de zones"""
+    fig = go.Figure()
+    y_top = max(min_range, float(np.nanmax(ratio.to_numpy(), initial=0)) * 1.05)
+    lower = 0.0
+    for upper, label, level in bands:
+        fig.add_hrect(
+            y0=lower, y1=min(upper, y_top),
+            fillcolor=WORKLOAD_BAND_COLORS[level], line_width=0, layer='below',
+            annotation_text=label, annotation_position='top left'
+        )
+        lower = upper
+        if lower >= y_top:
+            break
+    for column in ratio.columns:
+        is_total = column == total_column
+        fig.add_trace(go.Scatter(
+            x=ratio.index,
+            y=ratio[column],
+            name=column,
+            mode='lines',
+            line=dict(width=3 if is_total else 1.5, color='#222222' if is_total else None),
+            # Seul le total est affiché d'emblée, les groupes depuis la légende
+            visible=True if is_total else 'legendonly'
+        ))
+    fig.update_layout(
+        title="Charge aiguë (7 j) / chronique (28 j)",
+        xaxis_title="Date",
+        yaxis_title="Ratio",
+        yaxis=dict(range=[0, y_top]),
+        xaxis=dict(tickformat='%d-%m-%Y'),
+        hovermode='x unified'
+    )
+    return fig
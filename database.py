@@ -3,6 +3,9 @@ import pandas as pd
 from supabase import create_client
 from datetime import datetime
 
+import shared_cache
+from gymtracking import storage
+
 def init_supabase():
     """Initialise et retourne le client Supabase"""
     try:
@@ -60,8 +63,53 @@ def login_user(supabase, username, password):
             return None, None, "Email non confirmé. Vérifiez la configuration Supabase."
         return None, None, f"Erreur : {error_msg}"
 
-def logout_user(supabase):
-    """Déconnecte l'utilisateur"""
+def refresh_user_session(supabase, refresh_token):
+    """Renouvelle la session d'un utilisateur à partir de son refresh token"""
+    try:
+        response = supabase.auth.refresh_session(refresh_token)
+        if response.user and response.session:
+            supabase.postgrest.auth(response.session.access_token)
+            return response.user, response.session, None
+        return None, None, "Session expirée"
+    except Exception as e:
+        return None, None, f"Session expirée : {str(e)}"
+
+def create_app_session(supabase, token_hash, refresh_token, ttl_seconds, replaces=None):
+    """
+    Enregistre un jeton de session persistante (seule son empreinte est
+    stockée) et supprime le jeton qu'il remplace
+    """
+    try:
+        supabase.rpc('create_app_session', {
+            'p_token_hash': token_hash,
+            'p_refresh_token': refresh_token,
+            'p_ttl_seconds': ttl_seconds,
+            'p_replaces': replaces
+        }).execute()
+        return True
+    except Exception as e:
+        st.error(f"Erreur création session persistante: {str(e)}")
+        return False
+
+def consume_app_session(supabase, token_hash):
+    """
+    Retourne le refresh token associé à un jeton de session persistante,
+    ou None s'il est inconnu ou expiré. Le jeton est à usage unique.
+    """
+    try:
+        response = supabase.rpc('consume_app_session', {'p_token_hash': token_hash}).execute()
+        return response.data or None
+    except Exception as e:
+        st.error(f"Erreur restauration session: {str(e)}")
+        return None
+
+def logout_user(supabase, session_token_hash=None):
+    """Déconnecte l'utilisateur et révoque son jeton de session persistante"""
+    try:
+        if session_token_hash:
+            supabase.rpc('revoke_app_session', {'p_token_hash': session_token_hash}).execute()
+    except:
+        pass
     try:
         supabase.auth.sign_out()
     except:
@@ -70,20 +118,10 @@ def logout_user(supabase):
 def save_workout_data(supabase, user_id, data):
     """Sauvegarde les données d'entraînement de l'utilisateur"""
     try:
-        result = supabase.table('user_data').select("*").eq('user_id', user_id).execute()
-        
-        if len(result.data) > 0:
-            supabase.table('user_data').update({
-                'workout_data': data,
-                'updated_at': datetime.now().isoformat()
-            }).eq('user_id', user_id).execute()
-        else:
-            supabase.table('user_data').insert({
-                'user_id': user_id,
-                'workout_data': data,
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat()
-            }).execute()
+        storage.save_workout_data(supabase, user_id, data)
+        # Les autres réplicas ne doivent plus servir l'ancienne version
+        shared_cache.invalidate_user(user_id)
+        shared_cache.store_user_value(user_id, 'workout_data', data)
         return True
     except Exception as e:
         st.error(f"Erreur sauvegarde: {str(e)}")
@@ -91,41 +129,195 @@ def save_workout_data(supabase, user_id, data):
 
 def load_workout_data(supabase, user_id):
     """Charge les données d'entraînement de l'utilisateur"""
+    def load():
+        try:
+            return storage.load_workout_data(supabase, user_id)
+        except Exception as e:
+            st.error(f"Erreur chargement: {str(e)}")
+            return None
+    return shared_cache.get_or_load(f"user:{user_id}", 'workout_data', load)
+
+def load_history_summaries(supabase, user_id):
+    """Charge le résumé de chaque mois d'historique (sans les séances)"""
+    def load():
+        try:
+            return storage.load_history_summaries(supabase, user_id)
+        except Exception as e:
+            st.error(f"Erreur chargement résumés: {str(e)}")
+            return None
+    return shared_cache.get_or_load(f"user:{user_id}", 'history_summaries', load)
+
+def load_history_months(supabase, user_id, since_month=None, until_month=None):
+    """
+    Charge les séances des mois compris entre since_month (inclus) et
+    until_month (exclu) ; None signifie sans borne.
+    """
     try:
-        result = supabase.table('user_data').select("workout_data").eq('user_id', user_id).execute()
-        if len(result.data) > 0:
-            return result.data[0]['workout_data']
+        return storage.load_history_months(supabase, user_id, since_month, until_month)
+    except Exception as e:
+        st.error(f"Erreur chargement historique: {str(e)}")
         return None
+
+def save_history_months(supabase, user_id, months, summaries):
+    """Enregistre plusieurs mois d'historique en une seule requête"""
+    if not months:
+        return True
+    try:
+        storage.save_history_months(supabase, user_id, months, summaries)
+        shared_cache.invalidate_user(user_id)
+        return True
+    except Exception as e:
+        st.error(f"Erreur sauvegarde historique: {str(e)}")
+        return False
+
+def delete_history(supabase, user_id):
+    """Supprime tout l'historique de séances de l'utilisateur"""
+    try:
+        storage.delete_history(supabase, user_id)
+        shared_cache.invalidate_user(user_id)
+        return True
     except Exception as e:
-        st.error(f"Erreur chargement: {str(e)}")
+        st.error(f"Erreur suppression historique: {str(e)}")
+        return False
+
+def append_workout_event(supabase, user_id, date_str, exercise, set_num, weight):
+    """Ajoute une série saisie au journal d'événements ; retourne l'id de l'événement"""
+    try:
+        result = supabase.table('workout_events').insert({
+            'user_id': user_id,
+            'date': date_str,
+            'exercise': exercise,
+            'set_num': set_num,
+            'weight': weight,
+            'created_at': datetime.now().isoformat()
+        }).execute()
+        return result.data[0]['id']
+    except Exception as e:
+        st.error(f"Erreur enregistrement série: {str(e)}")
         return None
 
+def load_workout_events(supabase, user_id, after_id=0):
+    """Charge, dans l'ordre, les événements postérieurs à after_id"""
+    try:
+        query = supabase.table('workout_events').select("id, date, exercise, set_num, weight").eq('user_id', user_id)
+        result = query.gt('id', after_id).order('id').execute()
+        return result.data
+    except Exception as e:
+        st.error(f"Erreur chargement séance en cours: {str(e)}")
+        return None
+
+def delete_workout_events(supabase, user_id, up_to_id):
+    """Supprime les événements déjà repliés dans le snapshot (id <= up_to_id)"""
+    try:
+        supabase.table('workout_events').delete().eq('user_id', user_id).lte('id', up_to_id).execute()
+        return True
+    except Exception as e:
+        st.error(f"Erreur nettoyage journal: {str(e)}")
+        return False
+
+def load_leaderboards(supabase, boards=None, periods=None, page_size=1000):
+    """
+    Top 10 des classements demandés (vue leaderboard_top), lu par pages :
+    {(classement, période): entrées triées}
+    """
+    try:
+        loaded = {}
+        start = 0
+        while True:
+            query = supabase.table('leaderboard_top').select("board, period, user_id, username, value")
+            if boards is not None:
+                query = query.in_('board', list(boards))
+            if periods is not None:
+                query = query.in_('period', list(periods))
+            rows = (
+                query.order('board').order('period').order('value', desc=True).order('user_id')
+                .range(start, start + page_size - 1).execute().data
+            )
+            for row in rows:
+                loaded.setdefault((row['board'], row['period']), []).append(
+                    {'user_id': row['user_id'], 'username': row['username'], 'value': row['value']}
+                )
+            if len(rows) < page_size:
+                return loaded
+            start += page_size
+    except Exception as e:
+        st.error(f"Erreur chargement classements: {str(e)}")
+        return None
+
+def submit_leaderboard_values(supabase, values):
+    """
+    Enregistre les valeurs de l'utilisateur connecté {(classement, période):
+    valeur} en un seul appel ; une valeur nulle retire son entrée
+    """
+    if not values:
+        return True
+    try:
+        supabase.rpc('submit_leaderboard_values', {
+            'p_values': [
+                {'board': board, 'period': period, 'value': value}
+                for (board, period), value in values.items()
+            ]
+        }).execute()
+        return True
+    except Exception as e:
+        st.error(f"Erreur sauvegarde classements: {str(e)}")
+        return False
+
+def leave_leaderboards(supabase):
+    """Retire l'utilisateur connecté de tous les classements"""
+    try:
+        supabase.rpc('leave_leaderboards', {}).execute()
+        return True
+    except Exception as e:
+        st.error(f"Erreur sauvegarde classements: {str(e)}")
+        return False
+
 def get_all_programs(supabase):
     """Récupère la liste des programmes disponibles"""
+    def load():
+        try:
+            response = supabase.table('programs').select("*").order('id').execute()
+            return response.data
+        except Exception as e:
+            st.error(f"Erreur chargement liste programmes: {str(e)}")
+            return None
+    return shared_cache.get_or_load('catalog', 'programs', load, shared_cache.CATALOG_VERSION_TTL) or []
+
+def get_exercise_catalog_version(supabase):
+    """
+    Version du catalogue d'exercices (nombre de lignes et dernier id),
+    partagée entre réplicas pendant CATALOG_VERSION_TTL.
+    """
+    def load():
+        try:
+            response = supabase.table('exercices').select("id", count='exact').order('id', desc=True).limit(1).execute()
+            last_id = response.data[0]['id'] if response.data else 0
+            return (response.count, last_id)
+        except Exception as e:
+            st.error(f"Erreur chargement catalogue: {str(e)}")
+            return None
+    return shared_cache.get_or_load('catalog', 'version', load, shared_cache.CATALOG_VERSION_TTL)
+
+def get_exercise_names(supabase):
+    """Récupère les noms distincts des exercices de tous les programmes"""
     try:
-        response = supabase.table('programs').select("*").order('id').execute()
-        return response.data
+        return storage.load_exercise_names(supabase)
     except Exception as e:
-        st.error(f"Erreur chargement liste programmes: {str(e)}")
-        return []
+        st.error(f"Erreur chargement catalogue: {str(e)}")
+        return None
 
 def load_program_by_id(supabase, program_id):
     """Charge les exercices d'un programme spécifique"""
     try:
-        response = supabase.table('exercices').select("*").eq('program_id', program_id).order('id').execute()
-        df = pd.DataFrame(response.data)
-        
-        if not df.empty:
-            # Renommer les colonnes pour correspondre à ce que l'app attend (format CSV original)
-            df = df.rename(columns={
-                'day_number': 'Jour',
-                'workout_type': 'Type',
-                'exercise_name': 'Exercice',
-                'sets': 'Séries',
-                'reps_rpe': 'Répétitions (RPE)',
-                'notes': 'Notes'
-            })
-        return df
+        return storage.load_programs_by_ids(supabase, [program_id])
     except Exception as e:
         st.error(f"Erreur chargement détails programme: {str(e)}")
-        return pd.DataFrame()
\ No newline at end of file
+        return pd.DataFrame()
+
+def load_programs_by_ids(supabase, program_ids):
+    """Charge les exercices de plusieurs programmes en une seule requête"""
+    try:
+        return storage.load_programs_by_ids(supabase, program_ids)
+    except Exception as e:
+        st.error(f"Erreur chargement détails programmes: {str(e)}")
+        return pd.DataFrame()
@@ -0,0 +1,331 @@
+"""
+Backend Supabase factice en mémoire, pour les tests de charge et le
+développement local sans base de données.
+
+Seule la partie de l'API utilisée par l'application est émulée :
+table().select/eq/in_/order/.../execute(), rpc() pour les fonctions SQL de
+l'application, auth.* et postgrest.auth(). Dans les fonctions SQL,
+auth.uid() est le dernier utilisateur authentifié par postgrest.auth() :
+une instance partagée entre sessions ne distingue pas les appelants.
+"""
+import copy
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+# Programme de démonstration : (jour, type, [exercices])
+DEMO_PROGRAM = [
+    (1, 'PUSH #1', ['Développé couché', 'Développé militaire', 'Dips']),
+    (2, 'PULL #1', ['Tractions', 'Rowing barre', 'Curl biceps']),
+    (3, 'LEGS #1', ['Squat', 'Soulevé de terre roumain', 'Leg curl']),
+    (4, 'Repos', ['Repos']),
+]
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+class FakeQuery:
+    """Requête chaînable façon postgrest, exécutée sur les tables en mémoire"""
+
+    def __init__(self, backend, table):
+        self._backend = backend
+        self._table = table
+        self._filters = []
+        self._operation = 'select'
+        self._columns = '*'
+        self._count = None
+        self._payload = None
+        self._on_conflict = None
+        self._order = []
+        self._limit = None
+        self._range = None
+
+    # --- Lecture ---
+    def select(self, columns='*', count=None):
+        self._columns = columns
+        self._count = count
+        return self
+
+    def _filter(self, predicate):
+        self._filters.append(predicate)
+        return self
+
+    def eq(self, column, value):
+        return self._filter(lambda row: row.get(column) == value)
+
+    def neq(self, column, value):
+        return self._filter(lambda row: row.get(column) != value)
+
+    def gt(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row.get(column) > value)
+
+    def gte(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row.get(column) >= value)
+
+    def lt(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row.get(column) < value)
+
+    def lte(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row.get(column) <= value)
+
+    def in_(self, column, values):
+        values = list(values)
+        return self._filter(lambda row: row.get(column) in values)
+
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    # --- Écriture ---
+    def insert(self, payload):
+        self._operation = 'insert'
+        self._payload = payload
+        return self
+
+    def update(self, payload):
+        self._operation = 'update'
+        self._payload = payload
+        return self
+
+    def upsert(self, payload, on_conflict=None):
+        self._operation = 'upsert'
+        self._payload = payload
+        self._on_conflict = on_conflict
+        return self
+
+    def delete(self):
+        self._operation = 'delete'
+        return self
+
+    def execute(self):
+        self._backend.simulate_latency()
+        with self._backend.lock:
+            if self._table in self._backend.views:
+                rows = self._backend.views[self._table]()
+            else:
+                rows = self._backend.tables.setdefault(self._table, [])
+            matched = [row for row in rows if all(f(row) for f in self._filters)]
+            return getattr(self, f"_execute_{self._operation}")(rows, matched)
+
+    def _execute_select(self, rows, matched):
+        for column, desc in reversed(self._order):
+            matched.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+        if self._range:
+            matched = matched[self._range[0]:self._range[1] + 1]
+        if self._limit is not None:
+            matched = matched[:self._limit]
+
+        data = copy.deepcopy(matched)
+        if self._columns.strip() != '*':
+            columns = [c.strip() for c in self._columns.split(',')]
+            data = [{c: row.get(c) for c in columns} for row in data]
+        return FakeResponse(data, len(data) if self._count else None)
+
+    def _execute_insert(self, rows, matched):
+        payload = self._payload if isinstance(self._payload, list) else [self._payload]
+        inserted = []
+        for row in payload:
+            row = copy.deepcopy(row)
+            row.setdefault('id', self._backend.next_id(self._table))
+            rows.append(row)
+            inserted.append(copy.deepcopy(row))
+        return FakeResponse(inserted)
+
+    def _execute_update(self, rows, matched):
+        for row in matched:
+            row.update(copy.deepcopy(self._payload))
+        return FakeResponse(copy.deepcopy(matched))
+
+    def _execute_upsert(self, rows, matched):
+        payload = self._payload if isinstance(self._payload, list) else [self._payload]
+        keys = [k.strip() for k in (self._on_conflict or 'id').split(',')]
+        for row in payload:
+            existing = [r for r in rows if all(r.get(k) == row.get(k) for k in keys)]
+            if existing:
+                existing[0].update(copy.deepcopy(row))
+            else:
+                row = copy.deepcopy(row)
+                row.setdefault('id', self._backend.next_id(self._table))
+                rows.append(row)
+        return FakeResponse(copy.deepcopy(payload))
+
+    def _execute_delete(self, rows, matched):
+        ids = {id(row) for row in matched}
+        self._backend.tables[self._table] = [row for row in rows if id(row) not in ids]
+        return FakeResponse(copy.deepcopy(matched))
+
+class FakeAuth:
+    """Authentification factice : tout mot de passe d'au moins 6 caractères est accepté"""
+
+    def __init__(self, backend):
+        self._backend = backend
+
+    def _session(self, user):
+        token = uuid.uuid4().hex
+        access_token = uuid.uuid4().hex
+        self._backend.refresh_tokens[token] = user.id
+        self._backend.access_tokens[access_token] = user
+        return SimpleNamespace(
+            access_token=access_token,
+            refresh_token=token,
+            expires_at=int(time.time()) + 3600,
+            user=user
+        )
+
+    def sign_up(self, credentials):
+        self._backend.simulate_latency()
+        email = credentials['email']
+        with self._backend.lock:
+            if email in self._backend.users:
+                raise Exception("User already registered")
+            user = SimpleNamespace(id=str(uuid.uuid4()), email=email)
+            self._backend.users[email] = (user, credentials['password'])
+        return SimpleNamespace(user=user, session=None)
+
+    def sign_in_with_password(self, credentials):
+        self._backend.simulate_latency()
+        email = credentials['email']
+        with self._backend.lock:
+            if email not in self._backend.users and self._backend.auto_register:
+                user = SimpleNamespace(id=str(uuid.uuid4()), email=email)
+                self._backend.users[email] = (user, credentials['password'])
+            user, password = self._backend.users.get(email, (None, None))
+            if user is None or password != credentials['password']:
+                raise Exception("Invalid login credentials")
+            return SimpleNamespace(user=user, session=self._session(user))
+
+    def refresh_session(self, refresh_token=None):
+        self._backend.simulate_latency()
+        with self._backend.lock:
+            user_id = self._backend.refresh_tokens.pop(refresh_token, None)
+            if user_id is None:
+                raise Exception("Invalid Refresh Token")
+            user = next(u for u, _ in self._backend.users.values() if u.id == user_id)
+            return SimpleNamespace(user=user, session=self._session(user))
+
+    def sign_out(self):
+        pass
+
+class FakeSupabase:
+    """Client Supabase factice ; une instance peut être partagée entre sessions"""
+
+    def __init__(self, latency=0.0, auto_register=True):
+        self.latency = latency
+        self.auto_register = auto_register
+        self.lock = threading.RLock()
+        self.tables = {}
+        self.users = {}
+        self.refresh_tokens = {}
+        self.app_sessions = {}
+        self.access_tokens = {}
+        self.current_user = None
+        self.views = {'leaderboard_top': self._leaderboard_top}
+        self._ids = {}
+        self.auth = FakeAuth(self)
+        self.postgrest = SimpleNamespace(auth=self._authenticate)
+        self.seed_demo_program()
+
+    def simulate_latency(self):
+        """Simule l'aller-retour réseau vers Supabase"""
+        if self.latency:
+            time.sleep(self.latency)
+
+    def next_id(self, table):
+        self._ids[table] = self._ids.get(table, len(self.tables.get(table, []))) + 1
+        return self._ids[table]
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params=None):
+        """Fonctions SQL de l'application (voir readme.md), exécutées en mémoire"""
+        return SimpleNamespace(execute=lambda: self._execute_rpc(name, params or {}))
+
+    def _execute_rpc(self, name, params):
+        self.simulate_latency()
+        with self.lock:
+            return FakeResponse(getattr(self, f"_rpc_{name}")(**params))
+
+    def _rpc_create_app_session(self, p_token_hash, p_refresh_token, p_ttl_seconds, p_replaces=None):
+        sessions = self.app_sessions
+        sessions.pop(p_replaces, None)
+        sessions[p_token_hash] = (p_refresh_token, time.time() + p_ttl_seconds)
+
+    def _rpc_consume_app_session(self, p_token_hash):
+        refresh_token, expires_at = self.app_sessions.pop(p_token_hash, (None, 0))
+        return refresh_token if expires_at > time.time() else None
+
+    def _rpc_revoke_app_session(self, p_token_hash):
+        self.app_sessions.pop(p_token_hash, None)
+
+    def _rpc_submit_leaderboard_values(self, p_values):
+        user = self.current_user
+        entries = self.tables.setdefault('leaderboard_entries', [])
+        for item in p_values:
+            key = (item['board'], item['period'], user.id)
+            entries[:] = [row for row in entries if (row['board'], row['period'], row['user_id']) != key]
+            if item['value'] > 0:
+                entries.append({
+                    'board': item['board'],
+                    'period': item['period'],
+                    'user_id': user.id,
+                    'username': user.email.split('@')[0],
+                    'value': item['value']
+                })
+
+    def _rpc_leave_leaderboards(self):
+        user_id = self.current_user.id
+        entries = self.tables.setdefault('leaderboard_entries', [])
+        entries[:] = [row for row in entries if row['user_id'] != user_id]
+
+    def _authenticate(self, access_token):
+        with self.lock:
+            self.current_user = self.access_tokens.get(access_token)
+
+    def _leaderboard_top(self, k=10):
+        """Vue leaderboard_top : top k de chaque classement et période"""
+        ranked = sorted(
+            self.tables.get('leaderboard_entries', []),
+            key=lambda row: (row['board'], row['period'], -row['value'], row['user_id'])
+        )
+        counts = {}
+        top = []
+        for row in ranked:
+            key = (row['board'], row['period'])
+            counts[key] = counts.get(key, 0) + 1
+            if counts[key] <= k:
+                top.append(row)
+        return top
+
+    def seed_demo_program(self, program_id=1, sets=3):
+        """Ajoute un programme PUSH/PULL/LEGS/Repos de démonstration"""
+        with self.lock:
+            self.tables.setdefault('programs', []).append({
+                'id': program_id,
+                'name': f"Programme démo {program_id}",
+                'description': "Programme de démonstration (backend factice)"
+            })
+            exercices = self.tables.setdefault('exercices', [])
+            for day_number, workout_type, names in DEMO_PROGRAM:
+                for name in names:
+                    exercices.append({
+                        'id': len(exercices) + 1,
+                        'program_id': program_id,
+                        'day_number': day_number,
+                        'workout_type': workout_type,
+                        'exercise_name': name,
+                        'sets': sets,
+                        'reps_rpe': "8-10 (RPE 8)",
+                        'notes': None
+                    })
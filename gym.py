@@ -0,0 +1,73 @@
+"""
+Mode salle : la séance du jour seule, pour un téléphone sur un Wi-Fi
+faible. Ni en-tête, ni barre latérale, ni graphique ; les poids sont
+saisis dans un formulaire envoyé en une fois (aucune relance par série).
+Activé par ?gym=1 dans l'URL, qui peut être ajoutée aux favoris.
+"""
+from datetime import datetime
+
+import streamlit as st
+
+import live
+from gymtracking import calendar
+
+QUERY_PARAM = "gym"
+
+def is_active():
+    return st.query_params.get(QUERY_PARAM) == "1"
+
+def enter():
+    st.query_params[QUERY_PARAM] = "1"
+
+def leave():
+    if QUERY_PARAM in st.query_params:
+        del st.query_params[QUERY_PARAM]
+
+def render(programme, record_session):
+    """Séance du jour : un champ par série, un bouton d'enregistrement"""
+    today = datetime.now().date()
+    date_str = today.strftime("%Y-%m-%d")
+    day_number = calendar.get_program_day(today, st.session_state.start_date, st.session_state.skipped_days)
+    day_workout = programme.day(day_number)
+    workout_type = day_workout.type
+
+    st.markdown(f"**{today.strftime('%d/%m')} · Jour {day_number} · {workout_type or '—'}**")
+
+    if date_str in st.session_state.skipped_days:
+        st.caption("⏭️ Jour skippé")
+    elif not day_workout or day_workout.is_rest:
+        st.caption("🧘‍♂️ Jour de repos")
+    else:
+        # Poids déjà enregistrés ce jour, complétés par les séries saisies en mode live
+        saved_weights = {
+            **st.session_state.history.get(date_str, {}).get('weights', {}),
+            **live.session_weights(date_str)
+        }
+        with st.form("gym_session", border=False):
+            weights = {}
+            for exercise in day_workout:
+                exercise_key = f"{date_str}_{exercise.name}"
+                if st.session_state.skipped_exercises.get(exercise_key, False):
+                    continue
+                st.markdown(f"**{exercise.name}** · {exercise.reps}")
+                cols = st.columns(exercise.sets)
+                for serie_num, col in enumerate(cols):
+                    key = f"{exercise_key}_{serie_num}"
+                    weights[key] = col.number_input(
+                        f"S{serie_num + 1}",
+                        min_value=0.0,
+                        max_value=500.0,
+                        value=float(saved_weights.get(key, 0.0)),
+                        step=0.5,
+                        key=f"gym_{key}"
+                    )
+            submitted = st.form_submit_button("✅ Enregistrer", type="primary", use_container_width=True)
+
+        if submitted:
+            weights = {key: weight for key, weight in weights.items() if weight > 0}
+            if record_session(date_str, workout_type, day_number, weights):
+                st.success("✅ Séance enregistrée")
+
+    if st.button("Mode complet"):
+        leave()
+        st.rerun()
@@ -0,0 +1,5 @@
+"""
+Cœur de GymTracking, utilisable sans Streamlit (tâches batch, ligne de
+commande) : calendrier du programme, stockage Supabase et statistiques.
+L'application Streamlit (app.py) n'est qu'une interface au-dessus.
+"""
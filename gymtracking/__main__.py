@@ -0,0 +1,3 @@
+from gymtracking.cli import main
+
+raise SystemExit(main())
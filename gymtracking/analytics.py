@@ -0,0 +1,389 @@
+"""Statistiques et recommandations calculées sur l'historique (sans Streamlit)"""
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+def normalize_name(name):
+    """Normalise un nom d'exercice (sans accents, casse ni espaces multiples)"""
+    text = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii')
+    return " ".join(text.casefold().split())
+
+def normalize_names(names):
+    """Version vectorisée de normalize_name pour une Series pandas"""
+    return (
+        names.astype(str)
+        .str.normalize('NFKD')
+        .str.encode('ascii', 'ignore')
+        .str.decode('ascii')
+        .str.casefold()
+        .str.split()
+        .str.join(' ')
+    )
+
+def get_exercises_stats(flat, exercise_names, current_date_str, archived_stats=None):
+    """
+    Charge maximale de la dernière séance et charge maximale all-time de
+    plusieurs exercices en une passe, pour les séances antérieures à une
+    date donnée : {exercice: (dernier max, record)}, (None, None) sans
+    donnée. archived_stats complète avec les mois d'historique non chargés.
+    """
+    archived_stats = archived_stats or {}
+    earlier = flat[flat['exercise'].isin(list(exercise_names)) & (flat['date'] < pd.Timestamp(current_date_str))]
+    session_max = earlier.groupby(['exercise', 'date'])['weight'].max()
+
+    stats = {}
+    for exercise, series in session_max.groupby(level='exercise'):
+        stats[exercise] = (float(series.iloc[-1]), float(series.max()))
+    for exercise in exercise_names:
+        archived = archived_stats.get(exercise)
+        if exercise in stats:
+            if archived:
+                stats[exercise] = (stats[exercise][0], max(stats[exercise][1], archived['max']))
+        elif archived:
+            stats[exercise] = (archived['last_max'], archived['max'])
+        else:
+            stats[exercise] = (None, None)
+    return stats
+
+# Groupe musculaire principal déduit du nom de l'exercice (mots-clés sans
+# accents, testés dans l'ordre) quand le programme ne le précise pas
+MUSCLE_GROUP_KEYWORDS = [
+    ('Pectoraux', ['developpe couche', 'developpe incline', 'developpe decline', 'pec', 'ecarte', 'pompe', 'butterfly', 'bench']),
+    ('Épaules', ['developpe militaire', 'militaire', 'epaule', 'elevation', 'oiseau', 'face pull', 'arnold', 'overhead']),
+    ('Triceps', ['dips', 'triceps', 'barre front', 'kickback', 'extension nuque', 'pushdown']),
+    ('Biceps', ['curl biceps', 'biceps', 'curl marteau', 'curl incline', 'curl pupitre', 'curl barre', 'curl halteres']),
+    # Avant le dos : « soulevé de terre roumain » / RDL travaillent surtout les ischios
+    ('Ischio-jambiers', ['leg curl', 'ischio', 'roumain', 'romanian', 'rdl', 'jambes tendues', 'stiff', 'good morning', 'nordic']),
+    ('Dos', ['traction', 'rowing', 'tirage', 'pull over', 'pullover', 'souleve de terre', 'deadlift', 'shrug', 'lombaire']),
+    ('Fessiers', ['hip thrust', 'fessier', 'glute', 'abduct']),
+    ('Quadriceps', ['squat', 'presse', 'leg extension', 'fente', 'hack', 'quadri', 'lunge']),
+    ('Mollets', ['mollet', 'calf']),
+    ('Abdominaux', ['abdo', 'crunch', 'gainage', 'planche', 'releve de jambes']),
+]
+
+OTHER_GROUP = 'Autre'
+
+def muscle_group(exercise_name):
+    """Groupe musculaire principal d'un exercice, d'après son nom"""
+    name = normalize_name(exercise_name)
+    for group, keywords in MUSCLE_GROUP_KEYWORDS:
+        if any(keyword in name for keyword in keywords):
+            return group
+    return OTHER_GROUP
+
+def muscle_group_mapping(exercise_names, df_programme=None):
+    """
+    Associe chaque exercice à un groupe musculaire. La colonne
+    'muscle_group' de la table exercices est prioritaire si elle existe.
+    """
+    mapping = {name: muscle_group(name) for name in set(exercise_names)}
+    if df_programme is not None and 'muscle_group' in df_programme.columns:
+        defined = df_programme.dropna(subset=['muscle_group'])
+        mapping.update(dict(zip(defined['Exercice'], defined['muscle_group'])))
+    return mapping
+
+def flatten_history(history):
+    """
+    Aplatit l'historique en une ligne par série :
+    date, exercise, set, weight, workout_type (poids > 0 uniquement).
+    """
+    dates, keys, weights, workout_types = [], [], [], []
+    for date_str, session in history.items():
+        workout_type = session.get('workout_type', '')
+        for key, weight in session.get('weights', {}).items():
+            dates.append(date_str)
+            keys.append(key)
+            weights.append(weight)
+            workout_types.append(workout_type)
+
+    df = pd.DataFrame({
+        'date': pd.Series(dates, dtype=object),
+        'key': pd.Series(keys, dtype=object),
+        'weight': pd.Series(weights, dtype=float),
+        'workout_type': pd.Series(workout_types, dtype=object)
+    })
+    df = df[(df['weight'] > 0) & (df['key'].str.count('_') >= 2)]
+
+    # Clé "date_exercice_série" : le nom peut lui-même contenir des "_"
+    name_and_set = df['key'].str.split('_', n=1).str[1].str.rsplit('_', n=1)
+    flat = pd.DataFrame({
+        'date': pd.to_datetime(df['date']),
+        'exercise': name_and_set.str[0],
+        'set': pd.to_numeric(name_and_set.str[1], errors='coerce'),
+        'weight': df['weight'],
+        'workout_type': df['workout_type']
+    })
+    return flat.dropna(subset=['set']).sort_values('date', kind='stable').reset_index(drop=True)
+
+def exercise_summary(flat):
+    """
+    Une ligne par exercice : séances, séries, volume, charge max et charge
+    max de la dernière séance (dernière date comprise).
+    """
+    if flat.empty:
+        return pd.DataFrame(columns=['exercise', 'sessions', 'sets', 'volume', 'max', 'last_date', 'last_max'])
+
+    per_session = flat.groupby(['exercise', 'date'])['weight'].max().reset_index()
+    last = per_session.sort_values('date', kind='stable').groupby('exercise').tail(1).set_index('exercise')
+    grouped = flat.groupby('exercise')['weight']
+    summary = pd.DataFrame({
+        'sessions': per_session.groupby('exercise').size(),
+        'sets': grouped.size(),
+        'volume': grouped.sum(),
+        'max': grouped.max(),
+        'last_date': last['date'].dt.strftime("%Y-%m-%d"),
+        'last_max': last['weight']
+    })
+    return summary.reset_index().rename(columns={'index': 'exercise'})
+
+def weekly_muscle_volume(flat, mapping):
+    """
+    Séries et volume par semaine et par groupe musculaire, calculés par un
+    seul groupby sur les combinaisons présentes puis dépliés en matrice
+    (semaines × groupes). Retourne (séries, volume).
+    """
+    if flat.empty:
+        empty = pd.DataFrame()
+        return empty, empty
+
+    weeks = flat['date'].dt.to_period('W-SUN').dt.start_time
+    groups = flat['exercise'].map(mapping).fillna(OTHER_GROUP)
+
+    pivot = flat.groupby([weeks.rename('week'), groups.rename('group')])['weight'].agg(['count', 'sum'])
+
+    # Toutes les semaines de la période, y compris celles sans séance
+    all_weeks = pd.date_range(weeks.min(), weeks.max(), freq='W-MON')
+    sets = pivot['count'].unstack(fill_value=0).reindex(all_weeks, fill_value=0)
+    volume = pivot['sum'].unstack(fill_value=0.0).reindex(all_weeks, fill_value=0.0)
+    return sets, volume
+
+# --- Charge aiguë / chronique (ACWR) ---
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+TOTAL_GROUP = 'Total'
+
+# Zones du ratio (borne haute exclue) : libellé et niveau d'alerte
+WORKLOAD_BANDS = [
+    (0.8, "Sous-charge", "info"),
+    (1.3, "Zone optimale", "success"),
+    (1.5, "Vigilance", "warning"),
+    (float('inf'), "Risque élevé", "error"),
+]
+
+def workload_band(ratio):
+    """(libellé, niveau) de la zone d'un ratio aigu/chronique (None si NaN)"""
+    for upper, label, level in WORKLOAD_BANDS:
+        if ratio < upper:
+            return label, level
+    return None
+
+def workload_ratio(flat, mapping, end=None):
+    """
+    Ratio charge aiguë (moyenne sur 7 jours) / chronique (moyenne sur 28
+    jours) de chaque jour, par groupe musculaire et au total (TOTAL_GROUP).
+    La charge est le volume journalier, placé dans un tableau dense
+    jours × groupes ; chaque moyenne glissante est une différence de sommes
+    cumulées, soit O(jours) quelle que soit la fenêtre. Le ratio est NaN
+    tant que la fenêtre chronique n'est pas complète ou qu'elle est vide.
+    Retourne (ratio, charge aiguë), indexés par jour jusqu'à end inclus.
+    """
+    if flat.empty:
+        empty = pd.DataFrame()
+        return empty, empty
+
+    first_day = flat['date'].min().normalize()
+    last_day = max(flat['date'].max(), pd.Timestamp(end) if end is not None else flat['date'].max()).normalize()
+    days = pd.date_range(first_day, last_day, freq='D')
+
+    group_codes, groups = pd.factorize(flat['exercise'].map(mapping).fillna(OTHER_GROUP))
+    n_days, n_groups = len(days), len(groups)
+    day_index = (flat['date'].dt.normalize() - first_day).dt.days.to_numpy()
+
+    # Volume par (jour, groupe) en un bincount, puis la colonne du total
+    load = np.bincount(
+        day_index * n_groups + group_codes, weights=flat['weight'].to_numpy(), minlength=n_days * n_groups
+    ).reshape(n_days, n_groups)
+    load = np.column_stack([load, load.sum(axis=1)])
+
+    cumulative = np.vstack([np.zeros((1, n_groups + 1)), np.cumsum(load, axis=0)])
+
+    def rolling_mean(window):
+        starts = np.maximum(np.arange(1, n_days + 1) - window, 0)
+        return (cumulative[1:] - cumulative[starts]) / window
+
+    acute = rolling_mean(ACUTE_DAYS)
+    chronic = rolling_mean(CHRONIC_DAYS)
+    ratio = np.divide(acute, chronic, out=np.full_like(acute, np.nan), where=chronic > 0)
+    ratio[:CHRONIC_DAYS - 1] = np.nan
+
+    columns = list(groups) + [TOTAL_GROUP]
+    return pd.DataFrame(ratio, index=days, columns=columns), pd.DataFrame(acute, index=days, columns=columns)
+
+# --- Recommandations de charge (surcharge progressive) ---
+
+WEIGHT_STEP = 0.5          # Pas de saisie des poids (kg)
+PROGRESSION_RATE = 0.025   # +2.5 % par séance réussie
+DELOAD_RATE = 0.9          # -10 % après une stagnation
+STALL_SESSIONS = 3         # Séances sans progrès avant décharge
+REPS_PER_SESSION = 2       # Répétitions gagnées par séance à charge égale (double progression)
+
+def parse_rep_target(text):
+    """
+    Extrait (répétitions min, répétitions max, RPE) d'un texte comme
+    "8-10 (RPE 8)" ; None pour les valeurs absentes.
+    """
+    text = str(text or "").upper().replace(',', '.')
+    reps_part, _, rpe_part = text.partition('RPE')
+    reps = [float(n) for n in re.findall(r"\d+(?:\.\d+)?", reps_part)]
+    rpes = [float(n) for n in re.findall(r"\d+(?:\.\d+)?", rpe_part)]
+    rep_low = min(reps) if reps else None
+    rep_high = max(reps) if reps else None
+    rpe = max(rpes) if rpes else None
+    return rep_low, rep_high, rpe
+
+def _round_weight(weight):
+    return max(WEIGHT_STEP, round(weight / WEIGHT_STEP) * WEIGHT_STEP)
+
+def _hold_sessions(rep_low, rep_high):
+    """
+    Double progression : séances à charge égale pour monter du bas au haut
+    de la fourchette de répétitions avant d'augmenter la charge
+    """
+    if rep_low is None:
+        return 0
+    return int(np.ceil((rep_high - rep_low) / REPS_PER_SESSION))
+
+def recommend_weights(flat, specs, current_date, lookback=6):
+    """
+    Suggère les charges de la prochaine séance pour tous les exercices du
+    jour en une passe. specs : {exercice: (nombre de séries, texte reps/RPE)}.
+    Retourne {exercice: {'weights': [...], 'reason': str}} pour les
+    exercices déjà pratiqués.
+    """
+    recent = flat[flat['exercise'].isin(list(specs)) & (flat['date'] < pd.Timestamp(current_date))]
+    if recent.empty:
+        return {}
+
+    targets = {exercise: parse_rep_target(reps_rpe) for exercise, (_, reps_rpe) in specs.items()}
+    holds = {exercise: _hold_sessions(rep_low, rep_high) for exercise, (rep_low, rep_high, _) in targets.items()}
+
+    # Charge max de chaque séance, limitée aux dernières séances par exercice
+    # (assez pour détecter une stagnation malgré les paliers de répétitions)
+    lookback = max(lookback, STALL_SESSIONS + max(holds.values()) + 1)
+    tops = recent.groupby(['exercise', 'date'])['weight'].max().groupby(level='exercise').tail(lookback)
+
+    # Séries de la dernière séance de chaque exercice
+    last_dates = tops.reset_index().groupby('exercise')['date'].max()
+    last_rows = recent[recent['date'] == recent['exercise'].map(last_dates)].sort_values('set')
+    last_sets = last_rows.groupby('exercise')['weight'].apply(list)
+
+    recommendations = {}
+    for exercise, series in tops.groupby(level='exercise'):
+        top_weights = series.to_numpy()
+        last_top = top_weights[-1]
+        best = top_weights.max()
+        n_sets = specs[exercise][0]
+        _, rep_high, rpe = targets[exercise]
+        hold = holds[exercise]
+        other_loads = np.flatnonzero(top_weights != last_top)
+        sessions_at_load = len(top_weights) - (other_loads[-1] + 1 if len(other_loads) else 0)
+
+        # Moins de marge à l'approche de l'échec
+        increment = _round_weight(last_top * PROGRESSION_RATE)
+        if rpe is not None and rpe >= 9:
+            increment = WEIGHT_STEP
+
+        stall_window = STALL_SESSIONS + hold
+        stalled = (
+            len(top_weights) > stall_window
+            and top_weights[-stall_window:].max() <= top_weights[-stall_window - 1]
+        )
+
+        if last_top < DELOAD_RATE * best:
+            # Reprise après une décharge : remonter progressivement vers le record
+            target_top = min(best, last_top + 2 * increment)
+            reason = "reprise après décharge"
+        elif stalled:
+            target_top = last_top * DELOAD_RATE
+            reason = f"stagnation sur {stall_window} séances : décharge"
+        elif sessions_at_load <= hold:
+            target_top = last_top
+            reason = f"même charge : viser {rep_high:g} répétitions"
+        else:
+            target_top = last_top + increment
+            trend = np.polyfit(np.arange(len(top_weights)), top_weights, 1)[0] if len(top_weights) > 1 else 0.0
+            reason = "progression" if trend >= 0 else "progression prudente"
+            if trend < 0:
+                target_top = last_top
+
+        # Même écart pour chaque série que lors de la dernière séance
+        previous = list(last_sets.get(exercise, [last_top]))
+        previous += [previous[-1]] * (int(n_sets) - len(previous))
+        delta = target_top - last_top
+        recommendations[exercise] = {
+            'weights': [_round_weight(w + delta) for w in previous[:int(n_sets)]],
+            'reason': reason
+        }
+
+    return recommendations
+
+# --- Prévision du poids du corps (Monte Carlo) ---
+
+FORECAST_SIMULATIONS = 2000
+FORECAST_POINTS = 60        # Dates simulées au plus (bruit indépendant : sous-échantillonnage exact)
+RATE_WINDOW_DAYS = 42       # Rythme récent estimé sur les 6 dernières semaines
+FORECAST_BAND = (10, 90)    # Percentiles de la bande de confiance
+
+def body_weight_forecast(body_weight_history, target_weight, target_date, today, n_simulations=FORECAST_SIMULATIONS, seed=0):
+    """
+    Prévision probabiliste du poids du corps jusqu'à target_date.
+    Le rythme récent est la pente des mesures des RATE_WINDOW_DAYS derniers
+    jours ; le bruit journalier est l'écart-type des mesures autour de cette
+    pente. Chaque trajectoire tire son propre rythme (selon l'incertitude de
+    la pente) puis un bruit pour chaque date : toutes les trajectoires sont
+    une seule opération sur un tableau simulations × dates.
+    Retourne None s'il y a moins de 3 mesures récentes ou si la date est passée.
+    """
+    measures = sorted((pd.Timestamp(date_str), weight) for date_str, weight in body_weight_history.items() if weight)
+    today, target_date = pd.Timestamp(today), pd.Timestamp(target_date)
+    if not measures or target_date <= today:
+        return None
+
+    dates = pd.DatetimeIndex([date for date, _ in measures])
+    weights = np.array([weight for _, weight in measures], dtype=float)
+    recent = dates >= dates[-1] - pd.Timedelta(days=RATE_WINDOW_DAYS)
+    days = (dates[recent] - dates[-1]).days.to_numpy().astype(float)
+    weights = weights[recent]
+    if len(weights) < 3 or np.ptp(days) == 0:
+        return None
+
+    # Pente et niveau actuel (tendance, sans le bruit de la dernière pesée)
+    rate, level = np.polyfit(days, weights, 1)
+    residuals = weights - (level + rate * days)
+    noise = float(np.sqrt(residuals @ residuals / max(len(weights) - 2, 1)))
+    rate_error = noise / np.sqrt(((days - days.mean()) ** 2).sum())
+
+    horizon = (target_date - dates[-1]).days
+    steps = np.unique(np.linspace(0, horizon, min(horizon, FORECAST_POINTS) + 1).round()).astype(int)
+
+    rng = np.random.default_rng(seed)
+    rates = rate + rate_error * rng.standard_normal((n_simulations, 1))
+    trajectories = level + rates * steps + noise * rng.standard_normal((n_simulations, len(steps)))
+
+    low, median, high = np.percentile(trajectories, [FORECAST_BAND[0], 50, FORECAST_BAND[1]], axis=0)
+    losing = target_weight < level
+    final = trajectories[:, -1]
+    reached = final <= target_weight if losing else final >= target_weight
+
+    return {
+        'dates': dates[-1] + pd.to_timedelta(steps, unit='D'),
+        'low': low,
+        'median': median,
+        'high': high,
+        'probability': float(reached.mean()),
+        'rate_per_week': float(rate * 7),
+        'noise': noise
+    }
@@ -0,0 +1,65 @@
+"""Calendrier du programme : jour du programme de chaque date, compte tenu des jours skippés"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+def get_program_day(date, start_date_str, skipped_days):
+    """
+    Calcule le jour du programme en fonction de la date de début
+    et des jours skippés. Le jour est absolu (pas de cycle).
+    """
+    start = datetime.strptime(start_date_str, "%Y-%m-%d").date()
+    
+    # Gérer les différents types de date (datetime, date, string)
+    if isinstance(date, str):
+        current = datetime.strptime(date, "%Y-%m-%d").date()
+    elif isinstance(date, datetime):
+        current = date.date()
+    else:
+        current = date
+    
+    if current < start:
+        return 1
+    
+    days_elapsed = (current - start).days
+    
+    skipped_before = len([d for d in skipped_days if d < str(current)])
+    effective_days = days_elapsed - skipped_before
+    
+    program_day = effective_days + 1
+    
+    return program_day
+
+def get_program_days(dates, start_date_str, skipped_days):
+    """
+    Version vectorisée de get_program_day : calcule le jour du programme
+    pour une série de dates en une seule passe (numpy).
+    """
+    start = np.datetime64(start_date_str, 'D')
+    current = pd.to_datetime(pd.Series(dates)).values.astype('datetime64[D]')
+    
+    days_elapsed = (current - start).astype(np.int64)
+    
+    # Nombre de jours skippés strictement antérieurs à chaque date
+    skipped = np.sort(np.array(list(skipped_days), dtype='datetime64[D]'))
+    skipped_before = np.searchsorted(skipped, current, side='left')
+    
+    program_days = days_elapsed - skipped_before + 1
+    return np.where(current < start, 1, program_days)
+
+def get_next_scheduled_day(start_date_str, skipped_days):
+    """Retourne la date et le jour du programme pour demain"""
+    tomorrow = (datetime.now() + timedelta(days=1)).date()
+    next_day = get_program_day(tomorrow, start_date_str, skipped_days)
+    return tomorrow, next_day
+
+def history_window_start(today, weeks):
+    """Premier mois (AAAA-MM) de la fenêtre d'historique chargée à la connexion"""
+    return (today - timedelta(weeks=weeks)).strftime("%Y-%m")
+
+def previous_month(month_str, count=1):
+    """Retourne le mois AAAA-MM situé `count` mois avant month_str"""
+    year, month = int(month_str[:4]), int(month_str[5:7])
+    index = year * 12 + (month - 1) - count
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
@@ -0,0 +1,158 @@
+"""
+Ligne de commande, sans Streamlit :
+
+    python -m gymtracking stats --user ID [--exercise NOM] [--input export.json]
+    python -m gymtracking export --user ID [--format json|csv] [--output FICHIER]
+    python -m gymtracking recompute --user ID [--dry-run]
+    python -m gymtracking reports [--week AAAA-Www] [--output DOSSIER] [--workers N]
+
+La connexion utilise SUPABASE_URL / SUPABASE_KEY (variables d'environnement
+ou .streamlit/secrets.toml) ; une clé service_role est nécessaire pour lire
+les données d'un autre utilisateur.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+
+from gymtracking import storage
+
+def _load_user_data(args):
+    """(blob, historique complet) depuis Supabase ou un fichier d'export"""
+    if getattr(args, 'input', None):
+        with open(args.input, encoding="utf-8") as f:
+            export = json.load(f)
+        return export.get('workout_data') or {}, export.get('history', {})
+
+    supabase = storage.connect()
+    data = storage.load_workout_data(supabase, args.user) or {}
+    if 'history' in data:
+        # Ancien format : tout l'historique est dans le blob
+        return data, data['history']
+    return data, storage.load_history_months(supabase, args.user)
+
+def cmd_stats(args):
+    from gymtracking import analytics
+
+    _, history = _load_user_data(args)
+    summary = analytics.exercise_summary(analytics.flatten_history(history))
+    if args.exercise:
+        names = analytics.normalize_names(summary['exercise'])
+        summary = summary[names == analytics.normalize_name(args.exercise)]
+        if summary.empty:
+            print(f"Aucune donnée pour l'exercice : {args.exercise}", file=sys.stderr)
+            return 1
+
+    if args.json:
+        print(summary.to_json(orient='records', force_ascii=False))
+    else:
+        print(f"{len(history)} séances")
+        print(summary.to_string(index=False))
+    return 0
+
+def export_rows(history, body_weight_history):
+    """Lignes CSV au format de l'import (séries numérotées à partir de 1)"""
+    from gymtracking import analytics
+
+    flat = analytics.flatten_history(history)
+    dates = flat['date'].dt.strftime("%Y-%m-%d")
+    return flat.assign(
+        date=dates,
+        set=flat['set'].astype(int) + 1,
+        body_weight=dates.map(body_weight_history)
+    )[['date', 'exercise', 'set', 'weight', 'body_weight']]
+
+def cmd_export(args):
+    data, history = _load_user_data(args)
+    output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        if args.format == 'csv':
+            export_rows(history, data.get('body_weight_history', {})).to_csv(output, index=False)
+        else:
+            blob = {key: value for key, value in data.items() if key != 'history'}
+            json.dump({
+                'user_id': args.user,
+                'exported_at': datetime.now().isoformat(),
+                'workout_data': blob,
+                'history': history
+            }, output, ensure_ascii=False)
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+def cmd_recompute(args):
+    """Compacte l'historique et recalcule le résumé de chaque mois"""
+    supabase = storage.connect()
+    data = storage.load_workout_data(supabase, args.user) or {}
+    legacy = 'history' in data
+    history = data.pop('history') if legacy else storage.load_history_months(supabase, args.user)
+    summaries = storage.load_history_summaries(supabase, args.user)
+
+    history, compacted, saved = storage.compact_workout_data(history, data)
+    months = storage.split_history_by_month(history)
+    months_to_write = {month: months.get(month, {}) for month in set(months) | set(summaries)}
+    new_summaries = {month: storage.summarize_sessions(sessions) for month, sessions in months_to_write.items()}
+    changed = sorted(month for month in months_to_write if new_summaries[month] != summaries.get(month))
+
+    print(f"{len(history)} séances, {len(months_to_write)} mois, {saved / 1024:.1f} Ko compactés")
+    print(f"Résumés modifiés : {', '.join(changed) or 'aucun'}")
+    if args.dry_run:
+        return 0
+
+    storage.save_history_months(supabase, args.user, months_to_write, new_summaries)
+    if legacy or compacted != data:
+        storage.save_workout_data(supabase, args.user, compacted)
+    return 0
+
+def cmd_reports(args):
+    from gymtracking import reports
+
+    week_start = reports.parse_week(args.week) if args.week else reports.last_complete_week(datetime.now().date())
+    stats = reports.run(storage.connect(), week_start, args.output, args.workers, args.page_size, args.user)
+    print(
+        f"{stats['generated']} rapports générés, {stats['skipped']} déjà faits, {stats['failed']} échecs "
+        f"en {stats['elapsed_s']:.1f} s ({stats['reports_per_s']:.1f} rapports/s) -> {stats['output']}"
+    )
+    return 1 if stats['failed'] else 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="gymtracking", description="Outils GymTracking sans interface")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stats = commands.add_parser("stats", help="Statistiques par exercice")
+    stats.add_argument("--user", required=True, help="Identifiant (UUID) de l'utilisateur")
+    stats.add_argument("--exercise", help="Limiter à un exercice (sans accents ni casse)")
+    stats.add_argument("--input", help="Fichier d'export JSON à utiliser au lieu de Supabase")
+    stats.add_argument("--json", action="store_true", help="Sortie JSON")
+    stats.set_defaults(func=cmd_stats)
+
+    export = commands.add_parser("export", help="Exporter l'historique")
+    export.add_argument("--user", required=True, help="Identifiant (UUID) de l'utilisateur")
+    export.add_argument("--format", choices=["json", "csv"], default="json",
+                        help="json : données complètes ; csv : séries, réimportables dans l'application")
+    export.add_argument("--output", help="Fichier de sortie (sortie standard par défaut)")
+    export.add_argument("--input", help="Fichier d'export JSON à utiliser au lieu de Supabase")
+    export.set_defaults(func=cmd_export)
+
+    recompute = commands.add_parser("recompute", help="Compacter l'historique et recalculer les résumés mensuels")
+    recompute.add_argument("--user", required=True, help="Identifiant (UUID) de l'utilisateur")
+    recompute.add_argument("--dry-run", action="store_true", help="Afficher les changements sans écrire")
+    recompute.set_defaults(func=cmd_recompute)
+
+    report = commands.add_parser("reports", help="Rapports hebdomadaires de tous les athlètes (reprise après interruption)")
+    report.add_argument("--week", help="Semaine ISO AAAA-Www (par défaut : la dernière semaine terminée)")
+    report.add_argument("--output", default="reports", help="Dossier de sortie")
+    report.add_argument("--workers", type=int, help="Processus de calcul (par défaut : nombre de cœurs)")
+    report.add_argument("--page-size", type=int, default=100, help="Utilisateurs lus par requête")
+    report.add_argument("--user", nargs="+", help="Limiter à ces identifiants")
+    report.set_defaults(func=cmd_reports)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except Exception as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
@@ -0,0 +1,267 @@
+"""
+Rapports hebdomadaires de progression, générés en lot pour tous les
+athlètes : séances, records, volume par groupe musculaire et évolution du
+poids du corps par rapport à l'objectif.
+
+Les utilisateurs sont lus par pages depuis le stockage ; chaque rapport
+est calculé dans un pool de processus avec les mêmes fonctions que la page
+Statistiques, puis écrit dans <sortie>/<semaine>/ (HTML imprimable en PDF
+et JSON). Un manifeste des rapports terminés permet de reprendre un lot
+interrompu sans refaire ce qui est déjà écrit.
+"""
+import html
+import json
+import os
+import sys
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date, datetime, timedelta
+
+from gymtracking import storage
+
+MANIFEST_FILE = "manifest.jsonl"
+BODY_WEIGHT_TREND_WEEKS = 4   # Évolution du poids du corps sur 4 semaines
+PENDING_PER_WORKER = 4        # Rapports en attente par processus (lecture en flux)
+
+def parse_week(text):
+    """Lundi d'une semaine ISO AAAA-Www"""
+    year, week = text.upper().split("-W")
+    return date.fromisocalendar(int(year), int(week), 1)
+
+def week_label(week_start):
+    year, week, _ = week_start.isocalendar()
+    return f"{year}-W{week:02d}"
+
+def last_complete_week(today):
+    """Lundi de la dernière semaine terminée"""
+    return today - timedelta(days=today.weekday() + 7)
+
+def build_report(user_id, blob, sessions, summaries, week_start, df_programme=None):
+    """
+    Rapport d'une semaine. sessions contient au moins les séances depuis le
+    premier jour du mois de week_start ; les mois antérieurs sont couverts
+    par leurs résumés (summaries).
+    """
+    import pandas as pd
+    from gymtracking import analytics
+
+    week_end = week_start + timedelta(days=6)
+    start_str, end_str = week_start.isoformat(), week_end.isoformat()
+
+    flat = analytics.flatten_history(sessions)
+    in_week = flat[(flat['date'] >= pd.Timestamp(week_start)) & (flat['date'] <= pd.Timestamp(week_end))]
+    before = flat[flat['date'] < pd.Timestamp(week_start)]
+
+    week_sessions = [
+        {'date': date_str, 'workout_type': session.get('workout_type', '')}
+        for date_str, session in sorted(sessions.items())
+        if start_str <= date_str <= end_str
+    ]
+
+    # Records : charge max de la semaine au-dessus de tout ce qui précède
+    archived = storage.combine_summaries(summaries, before_month=start_str[:7])
+    previous_max = before.groupby('exercise')['weight'].max()
+    records = []
+    for exercise, weight in in_week.groupby('exercise')['weight'].max().items():
+        previous = max(previous_max.get(exercise, 0.0), archived.get(exercise, {}).get('max', 0.0))
+        if weight > previous:
+            records.append({'exercise': exercise, 'weight': float(weight), 'previous': float(previous) or None})
+
+    # Séries et volume par groupe musculaire
+    mapping = analytics.muscle_group_mapping(in_week['exercise'].unique(), df_programme)
+    sets, volume = analytics.weekly_muscle_volume(in_week, mapping)
+    categories = [
+        {'group': group, 'sets': int(sets[group].sum()), 'volume': float(volume[group].sum())}
+        for group in sets.columns
+    ] if not sets.empty else []
+    categories.sort(key=lambda category: -category['volume'])
+
+    # Poids du corps : dernière mesure, évolution sur 4 semaines, écart à l'objectif
+    body_weights = sorted(
+        (date_str, weight) for date_str, weight in blob.get('body_weight_history', {}).items()
+        if date_str <= end_str and weight
+    )
+    body_weight = None
+    if body_weights:
+        last_date, last_weight = body_weights[-1]
+        trend_from = (week_end - timedelta(weeks=BODY_WEIGHT_TREND_WEEKS)).isoformat()
+        earlier = [weight for date_str, weight in body_weights if date_str <= trend_from]
+        target = blob.get('target_body_weight') or None
+        body_weight = {
+            'date': last_date,
+            'weight': last_weight,
+            'change': last_weight - earlier[-1] if earlier else None,
+            'target': target,
+            'target_date': blob.get('target_body_weight_date'),
+            'remaining': target - last_weight if target else None
+        }
+
+    return {
+        'user_id': user_id,
+        'week': week_label(week_start),
+        'week_start': start_str,
+        'week_end': end_str,
+        'sessions': week_sessions,
+        'sets': int(len(in_week)),
+        'volume': float(in_week['weight'].sum()),
+        'records': records,
+        'categories': categories,
+        'body_weight': body_weight
+    }
+
+def _kg(value, signed=False):
+    if value is None:
+        return "—"
+    return f"{value:+.1f} kg" if signed else f"{value:.1f} kg"
+
+def render_html(report):
+    """Page HTML autonome, mise en page A4 pour l'impression en PDF"""
+    esc = html.escape
+    rows = lambda cells: "".join(f"<tr>{''.join(f'<td>{cell}</td>' for cell in row)}</tr>" for row in cells)
+
+    sessions = rows([(esc(s['date']), esc(s['workout_type'])) for s in report['sessions']]) \
+        or "<tr><td colspan='2'>Aucune séance</td></tr>"
+    records = rows([(esc(r['exercise']), _kg(r['weight']), _kg(r['previous'])) for r in report['records']]) \
+        or "<tr><td colspan='3'>Aucun record cette semaine</td></tr>"
+    categories = rows([(esc(c['group']), c['sets'], _kg(c['volume'])) for c in report['categories']]) \
+        or "<tr><td colspan='3'>—</td></tr>"
+
+    bw = report['body_weight']
+    if bw:
+        body_weight = (
+            f"<p>{_kg(bw['weight'])} au {esc(bw['date'])} "
+            f"({_kg(bw['change'], signed=True)} sur {BODY_WEIGHT_TREND_WEEKS} semaines)</p>"
+        )
+        if bw['target']:
+            target_date = f" pour le {esc(bw['target_date'])}" if bw['target_date'] else ""
+            body_weight += f"<p>Objectif : {_kg(bw['target'])}{target_date}, reste {_kg(bw['remaining'], signed=True)}</p>"
+    else:
+        body_weight = "<p>Aucune mesure</p>"
+
+    return f"""<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8">
+<title>Rapport {esc(report['week'])}</title>
+<style>
+@page {{ size: A4; margin: 15mm; }}
+body {{ font-family: sans-serif; color: #222; }}
+table {{ border-collapse: collapse; width: 100%; margin-bottom: 1em; }}
+td, th {{ border-bottom: 1px solid #ddd; padding: 4px 8px; text-align: left; }}
+h2 {{ page-break-after: avoid; }}
+</style></head><body>
+<h1>Rapport hebdomadaire {esc(report['week'])}</h1>
+<p>Athlète {esc(report['user_id'])} — du {esc(report['week_start'])} au {esc(report['week_end'])}</p>
+<p><strong>{len(report['sessions'])} séance(s)</strong>, {report['sets']} séries, volume {_kg(report['volume'])}</p>
+<h2>Séances</h2><table><tr><th>Date</th><th>Séance</th></tr>{sessions}</table>
+<h2>Records</h2><table><tr><th>Exercice</th><th>Charge</th><th>Précédent</th></tr>{records}</table>
+<h2>Volume par groupe musculaire</h2><table><tr><th>Groupe</th><th>Séries</th><th>Volume</th></tr>{categories}</table>
+<h2>Poids du corps</h2>{body_weight}
+</body></html>
+"""
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def generate_report(user_id, blob, sessions, summaries, week_start, df_programme, week_dir):
+    """Tâche d'un processus du pool : calcule et écrit le rapport d'un utilisateur"""
+    report = build_report(user_id, blob, sessions, summaries, week_start, df_programme)
+    _write_atomic(os.path.join(week_dir, f"{user_id}.json"), json.dumps(report, ensure_ascii=False))
+    _write_atomic(os.path.join(week_dir, f"{user_id}.html"), render_html(report))
+    return len(report['sessions'])
+
+def read_manifest(path):
+    """Utilisateurs dont le rapport est déjà écrit"""
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)['user_id'])
+            except (ValueError, KeyError):
+                continue  # Ligne tronquée par une interruption
+    return done
+
+def run(supabase, week_start, output_dir, workers=None, page_size=100, user_ids=None, log=None):
+    """
+    Génère les rapports de la semaine pour tous les utilisateurs (ou
+    user_ids) ; les rapports déjà présents dans le manifeste sont sautés.
+    Retourne les compteurs et le débit (rapports/s).
+    """
+    log = log or (lambda message: print(message, file=sys.stderr))
+    workers = workers or os.cpu_count() or 1
+    week_dir = os.path.join(output_dir, week_label(week_start))
+    os.makedirs(week_dir, exist_ok=True)
+    manifest_path = os.path.join(week_dir, MANIFEST_FILE)
+    done = read_manifest(manifest_path)
+
+    stats = {'generated': 0, 'skipped': 0, 'failed': 0}
+    programs = {}
+    since_month = week_start.isoformat()[:7]
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(manifest_path, "a", encoding="utf-8") as manifest:
+        if manifest.tell():
+            # Une interruption a pu laisser une ligne incomplète
+            manifest.write("\n")
+        pending = {}
+
+        def collect(return_when):
+            finished, _ = wait(pending, return_when=return_when)
+            for future in finished:
+                user_id = pending.pop(future)
+                try:
+                    session_count = future.result()
+                except Exception as e:
+                    stats['failed'] += 1
+                    log(f"Échec du rapport {user_id} : {e}")
+                    continue
+                manifest.write(json.dumps({'user_id': user_id, 'sessions': session_count, 'at': datetime.now().isoformat()}) + "\n")
+                manifest.flush()
+                stats['generated'] += 1
+
+        def log_progress():
+            # Rapports terminés ; ceux encore en cours sont comptés à part
+            elapsed = time.perf_counter() - started
+            in_flight = f", {len(pending)} en cours" if pending else ""
+            log(f"{stats['generated']} rapports ({stats['generated'] / elapsed:.1f}/s), {stats['failed']} échecs{in_flight}")
+
+        for page in storage.iter_user_data(supabase, page_size, user_ids):
+            todo = [(user_id, blob) for user_id, blob in page if user_id not in done]
+            stats['skipped'] += len(page) - len(todo)
+            if not todo:
+                continue
+
+            # Une requête d'historique par page, et chaque programme chargé une fois
+            histories = storage.load_users_history(supabase, [user_id for user_id, _ in todo], since_month)
+            missing = {blob.get('selected_program_id', 1) for _, blob in todo} - set(programs)
+            if missing:
+                catalog = storage.load_programs_by_ids(supabase, missing)
+                for program_id in missing:
+                    programs[program_id] = catalog[catalog['program_id'] == program_id] if not catalog.empty else None
+
+            for user_id, blob in todo:
+                summaries, sessions = histories[user_id]
+                if 'history' in blob:
+                    # Ancien format : tout l'historique est dans le blob
+                    summaries, sessions = {}, blob['history']
+                future = pool.submit(
+                    generate_report, user_id, blob, sessions, summaries, week_start,
+                    programs[blob.get('selected_program_id', 1)], week_dir
+                )
+                pending[future] = user_id
+                if len(pending) >= workers * PENDING_PER_WORKER:
+                    collect(FIRST_COMPLETED)
+
+            log_progress()
+
+        if pending:
+            collect(ALL_COMPLETED)
+        log_progress()
+
+    stats['elapsed_s'] = time.perf_counter() - started
+    stats['reports_per_s'] = stats['generated'] / stats['elapsed_s'] if stats['elapsed_s'] else 0.0
+    stats['output'] = week_dir
+    return stats
@@ -0,0 +1,277 @@
+"""
+Stockage des données d'un utilisateur dans Supabase, sans Streamlit.
+
+Blob user_data (réglages, skips, poids du corps) et table user_history
+(une ligne par mois : séances et résumé). Les requêtes lèvent une
+exception en cas d'erreur : l'appelant choisit comment la signaler.
+"""
+import json
+import os
+from datetime import datetime
+
+SECRETS_FILE = os.path.join(".streamlit", "secrets.toml")
+
+def connect(url=None, key=None):
+    """
+    Client Supabase : paramètres, sinon variables d'environnement
+    SUPABASE_URL / SUPABASE_KEY, sinon .streamlit/secrets.toml
+    """
+    url = url or os.environ.get("SUPABASE_URL")
+    key = key or os.environ.get("SUPABASE_KEY")
+    if not (url and key) and os.path.exists(SECRETS_FILE):
+        import tomllib
+        with open(SECRETS_FILE, "rb") as f:
+            secrets = tomllib.load(f)
+        url = url or secrets.get("SUPABASE_URL")
+        key = key or secrets.get("SUPABASE_KEY")
+    if not (url and key):
+        raise RuntimeError("Configuration Supabase manquante (SUPABASE_URL / SUPABASE_KEY)")
+
+    from supabase import create_client
+    return create_client(url, key)
+
+def load_workout_data(supabase, user_id):
+    """Blob des données d'entraînement de l'utilisateur (None s'il n'existe pas)"""
+    result = supabase.table('user_data').select("workout_data").eq('user_id', user_id).execute()
+    if len(result.data) > 0:
+        return result.data[0]['workout_data']
+    return None
+
+def save_workout_data(supabase, user_id, data):
+    """Crée ou remplace le blob des données d'entraînement"""
+    result = supabase.table('user_data').select("user_id").eq('user_id', user_id).execute()
+    now = datetime.now().isoformat()
+    if len(result.data) > 0:
+        supabase.table('user_data').update({
+            'workout_data': data,
+            'updated_at': now
+        }).eq('user_id', user_id).execute()
+    else:
+        supabase.table('user_data').insert({
+            'user_id': user_id,
+            'workout_data': data,
+            'created_at': now,
+            'updated_at': now
+        }).execute()
+
+def load_history_summaries(supabase, user_id):
+    """Résumé de chaque mois d'historique (sans les séances)"""
+    result = supabase.table('user_history').select("month, summary").eq('user_id', user_id).execute()
+    return {row['month']: row['summary'] or {} for row in result.data}
+
+def load_history_months(supabase, user_id, since_month=None, until_month=None):
+    """
+    Séances des mois compris entre since_month (inclus) et until_month
+    (exclu) ; None signifie sans borne.
+    """
+    query = supabase.table('user_history').select("month, sessions").eq('user_id', user_id)
+    if since_month:
+        query = query.gte('month', since_month)
+    if until_month:
+        query = query.lt('month', until_month)
+    result = query.execute()
+    sessions = {}
+    for row in result.data:
+        sessions.update(row['sessions'] or {})
+    return sessions
+
+def save_history_months(supabase, user_id, months, summaries):
+    """Enregistre plusieurs mois d'historique en une seule requête"""
+    if not months:
+        return
+    now = datetime.now().isoformat()
+    supabase.table('user_history').upsert([
+        {
+            'user_id': user_id,
+            'month': month,
+            'sessions': sessions,
+            'summary': summaries[month],
+            'updated_at': now
+        }
+        for month, sessions in months.items()
+    ], on_conflict='user_id,month').execute()
+
+def delete_history(supabase, user_id):
+    """Supprime tout l'historique de séances de l'utilisateur"""
+    supabase.table('user_history').delete().eq('user_id', user_id).execute()
+
+def iter_user_data(supabase, page_size=100, user_ids=None):
+    """Blobs de tous les utilisateurs (ou de user_ids), par pages : [(user_id, blob)]"""
+    start = 0
+    while True:
+        query = supabase.table('user_data').select("user_id, workout_data").order('user_id')
+        if user_ids:
+            query = query.in_('user_id', list(user_ids))
+        rows = query.range(start, start + page_size - 1).execute().data
+        if rows:
+            yield [(row['user_id'], row['workout_data'] or {}) for row in rows]
+        if len(rows) < page_size:
+            return
+        start += page_size
+
+def load_exercise_names(supabase, page_size=1000):
+    """Noms distincts des exercices de tous les programmes, lus par pages"""
+    names = {}
+    start = 0
+    while True:
+        rows = supabase.table('exercices').select("exercise_name").order('id').range(start, start + page_size - 1).execute().data
+        names.update(dict.fromkeys(row['exercise_name'] for row in rows))
+        if len(rows) < page_size:
+            return list(names)
+        start += page_size
+
+def _select_pages(make_query, page_size):
+    """
+    Toutes les lignes d'une requête, lues par pages de page_size (limite
+    PostgREST) ; make_query() construit la requête de chaque page
+    """
+    start = 0
+    while True:
+        rows = make_query().range(start, start + page_size - 1).execute().data
+        yield from rows
+        if len(rows) < page_size:
+            return
+        start += page_size
+
+def load_users_history(supabase, user_ids, since_month=None, page_size=1000):
+    """
+    Résumés de tous les mois et séances des mois >= since_month de
+    plusieurs utilisateurs : {user_id: (résumés, séances)}. Deux requêtes
+    lues par pages : les résumés, puis les séances des seuls mois utiles.
+    """
+    user_ids = list(user_ids)
+    users = {user_id: ({}, {}) for user_id in user_ids}
+
+    def summaries():
+        return (
+            supabase.table('user_history').select("user_id, month, summary")
+            .in_('user_id', user_ids).order('user_id').order('month')
+        )
+
+    def sessions():
+        query = supabase.table('user_history').select("user_id, month, sessions").in_('user_id', user_ids)
+        if since_month is not None:
+            query = query.gte('month', since_month)
+        return query.order('user_id').order('month')
+
+    for row in _select_pages(summaries, page_size):
+        users[row['user_id']][0][row['month']] = row['summary'] or {}
+    # Les séances sont volumineuses : pages plus petites
+    for row in _select_pages(sessions, max(1, page_size // 10)):
+        users[row['user_id']][1].update(row['sessions'] or {})
+    return users
+
+def rename_program_columns(df):
+    """Renomme les colonnes pour correspondre à ce que l'app attend (format CSV original)"""
+    return df.rename(columns={
+        'day_number': 'Jour',
+        'workout_type': 'Type',
+        'exercise_name': 'Exercice',
+        'sets': 'Séries',
+        'reps_rpe': 'Répétitions (RPE)',
+        'notes': 'Notes'
+    })
+
+def load_programs_by_ids(supabase, program_ids):
+    """Exercices de plusieurs programmes en une seule requête (DataFrame)"""
+    import pandas as pd
+
+    response = supabase.table('exercices').select("*").in_('program_id', list(program_ids)).order('id').execute()
+    df = pd.DataFrame(response.data)
+    if not df.empty:
+        df = rename_program_columns(df)
+    return df
+
+def split_history_by_month(history):
+    """Regroupe les séances par mois : {AAAA-MM: {date: séance}}"""
+    months = {}
+    for date_str, session in history.items():
+        months.setdefault(date_str[:7], {})[date_str] = session
+    return months
+
+def summarize_sessions(sessions):
+    """
+    Résumé d'un ensemble de séances (un mois) : dates des séances, volume
+    et, par exercice, charge max et charge max de la dernière séance.
+    """
+    exercises = {}
+    volume = 0.0
+    
+    for date_str, session in sorted(sessions.items()):
+        for key, weight in session.get('weights', {}).items():
+            parts = key.split('_')
+            if len(parts) < 3 or weight <= 0:
+                continue
+            ex_name = "_".join(parts[1:-1])
+            volume += weight
+            
+            stats = exercises.setdefault(ex_name, {'max': 0.0, 'last_date': None, 'last_max': 0.0})
+            stats['max'] = max(stats['max'], weight)
+            if stats['last_date'] != date_str:
+                stats['last_date'] = date_str
+                stats['last_max'] = weight
+            else:
+                stats['last_max'] = max(stats['last_max'], weight)
+    
+    return {'sessions': len(sessions), 'dates': sorted(sessions), 'volume': volume, 'exercises': exercises}
+
+def combine_summaries(summaries, before_month=None):
+    """Agrège les résumés mensuels antérieurs à before_month, par exercice"""
+    combined = {}
+    for month in sorted(summaries):
+        if before_month and month >= before_month:
+            continue
+        for ex_name, stats in summaries[month].get('exercises', {}).items():
+            current = combined.setdefault(ex_name, dict(stats))
+            current['max'] = max(current['max'], stats['max'])
+            if stats['last_date'] and stats['last_date'] >= (current['last_date'] or ""):
+                current['last_date'] = stats['last_date']
+                current['last_max'] = stats['last_max']
+    return combined
+
+def json_size(obj):
+    """Taille en octets d'un objet une fois sérialisé en JSON"""
+    return len(json.dumps(obj, ensure_ascii=False).encode('utf-8'))
+
+def compact_history(history, skipped_exercises):
+    """
+    Retire des séances les poids nuls et les poids orphelins (clé mal
+    formée, d'une autre date ou d'un exercice skippé ce jour-là).
+    Les séances inchangées sont conservées telles quelles (même objet).
+    """
+    compacted = {}
+    for date_str, session in history.items():
+        prefix = f"{date_str}_"
+        weights = {
+            key: weight
+            for key, weight in session.get('weights', {}).items()
+            if weight and weight > 0
+            and key.startswith(prefix) and key.count('_') >= 2
+            and not skipped_exercises.get(key.rsplit('_', 1)[0], False)
+        }
+        if 'weights' in session and len(weights) == len(session['weights']):
+            compacted[date_str] = session
+        else:
+            compacted[date_str] = {**session, 'weights': weights}
+    return compacted
+
+def compact_workout_data(history, data, measure=True):
+    """
+    Compacte l'historique et les données du blob (skips à False retirés,
+    poids du corps nuls retirés, jours skippés triés sans doublons).
+    Retourne (historique, données, octets économisés) ; sans measure, les
+    octets économisés (deux sérialisations complètes) valent None.
+    """
+    skipped_exercises = {key: True for key, skipped in data.get('skipped_exercises', {}).items() if skipped}
+    compacted = dict(data)
+    compacted['skipped_exercises'] = skipped_exercises
+    compacted['skipped_days'] = sorted(set(data.get('skipped_days', [])))
+    compacted['body_weight_history'] = {
+        date_str: weight
+        for date_str, weight in data.get('body_weight_history', {}).items()
+        if weight and weight > 0
+    }
+    compacted_history = compact_history(history, skipped_exercises)
+
+    saved = json_size([history, data]) - json_size([compacted_history, compacted]) if measure else None
+    return compacted_history, compacted, saved
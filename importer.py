@@ -0,0 +1,174 @@
+import pandas as pd
+from datetime import datetime
+
+from gymtracking import analytics, calendar
+
+# Colonnes attendues dans le CSV (les alias français sont acceptés)
+REQUIRED_COLUMNS = ['date', 'exercise', 'set', 'weight']
+COLUMN_ALIASES = {
+    'exercice': 'exercise',
+    'serie': 'set',
+    'série': 'set',
+    'poids': 'weight',
+    'charge': 'weight',
+    'poids_du_corps': 'body_weight',
+    'poids du corps': 'body_weight',
+    'bodyweight': 'body_weight',
+}
+
+MAX_WEIGHT = 500.0  # Même borne que la saisie manuelle
+
+def read_history_csv(file):
+    """Lit un CSV d'historique et normalise le nom des colonnes"""
+    try:
+        df = pd.read_csv(file, sep=None, engine='python', dtype=str)
+    except Exception as e:
+        raise ValueError(f"Fichier CSV illisible : {e}")
+
+    columns = {}
+    for col in df.columns:
+        name = col.strip().lower()
+        columns[col] = COLUMN_ALIASES.get(name, name)
+    df = df.rename(columns=columns)
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes : {', '.join(missing)}")
+
+    if 'body_weight' not in df.columns:
+        df['body_weight'] = None
+
+    return df[REQUIRED_COLUMNS + ['body_weight']]
+
+def _to_number(values):
+    """Convertit une colonne texte en nombres (accepte la virgule décimale)"""
+    return pd.to_numeric(values.astype(str).str.strip().str.replace(',', '.', regex=False), errors='coerce')
+
+def validate_import(raw, df_programme, start_date_str, skipped_days):
+    """
+    Valide et normalise les lignes importées en une seule passe vectorisée.
+    Retourne (acceptées, rejetées, doublons) ; les lignes rejetées portent
+    un motif, doublons compte les lignes valides remplacées par une suivante.
+    """
+    df = raw.copy()
+    if df_programme.empty or df_programme['Jour'].isna().all():
+        # Programme vide ou non chargé : aucune séance ne peut être rattachée à un jour
+        rejected = raw.assign(motif="Programme indisponible")
+        accepted = pd.DataFrame(columns=['date', 'exercise', 'set', 'weight', 'body_weight', 'day_number', 'workout_type'])
+        return accepted, rejected, 0
+
+    motif = pd.Series(None, index=df.index, dtype=object)
+
+    # Dates (ISO, sinon format français JJ/MM/AAAA)
+    date_text = df['date'].astype(str).str.strip()
+    dates = pd.to_datetime(date_text, errors='coerce', format="%Y-%m-%d")
+    dates = dates.fillna(pd.to_datetime(date_text, errors='coerce', format="%d/%m/%Y"))
+    motif = motif.mask(motif.isna() & dates.isna(), "Date invalide")
+
+    # Exercices : correspondance sans accents ni casse avec le programme actif
+    program_exercises = df_programme[df_programme['Type'] != 'Repos']['Exercice'].drop_duplicates()
+    canonical = dict(zip(analytics.normalize_names(program_exercises), program_exercises))
+    exercises = analytics.normalize_names(df['exercise']).map(canonical)
+    motif = motif.mask(motif.isna() & exercises.isna(), "Exercice inconnu")
+
+    # Séries (1, 2, 3... dans le CSV, stockées à partir de 0)
+    sets = _to_number(df['set'])
+    valid_sets = sets.notna() & (sets >= 1) & (sets == sets.round())
+    motif = motif.mask(motif.isna() & ~valid_sets, "Série invalide")
+
+    # Poids de travail
+    weights = _to_number(df['weight'])
+    valid_weights = weights.notna() & (weights > 0) & (weights <= MAX_WEIGHT)
+    motif = motif.mask(motif.isna() & ~valid_weights, "Poids invalide")
+
+    rejected = raw[motif.notna()].assign(motif=motif[motif.notna()])
+    ok = motif.isna()
+
+    accepted = pd.DataFrame({
+        'date': dates[ok].dt.strftime("%Y-%m-%d"),
+        'exercise': exercises[ok],
+        'set': sets[ok].astype(int) - 1,
+        'weight': weights[ok].astype(float),
+        'body_weight': _to_number(df.loc[ok, 'body_weight']),
+    })
+
+    # Jour du programme et type de séance pour chaque date
+    program_length = int(df_programme['Jour'].max())
+    day_types = df_programme.drop_duplicates('Jour').set_index('Jour')['Type']
+    accepted['day_number'] = calendar.get_program_days(accepted['date'], start_date_str, skipped_days)
+    accepted['workout_type'] = ((accepted['day_number'] - 1) % program_length + 1).map(day_types).fillna("")
+
+    # Une même série présente plusieurs fois : la dernière ligne l'emporte
+    valid_count = len(accepted)
+    accepted = accepted.drop_duplicates(subset=['date', 'exercise', 'set'], keep='last')
+
+    return accepted, rejected, valid_count - len(accepted)
+
+def merge_into_history(history, body_weight_history, accepted, program_id):
+    """
+    Fusionne les lignes validées dans l'historique (en place).
+    Retourne le nombre de séances créées et mises à jour.
+    """
+    created, updated = 0, 0
+    if accepted.empty:
+        return created, updated
+
+    accepted = accepted.sort_values('date', kind='stable')
+    keys = accepted['date'] + "_" + accepted['exercise'] + "_" + accepted['set'].astype(str)
+    timestamp = datetime.now().isoformat()
+
+    # Regrouper les poids par date en une passe
+    sessions = {}
+    for date_str, key, weight, day_number, workout_type in zip(
+        accepted['date'].tolist(), keys.tolist(), accepted['weight'].tolist(),
+        accepted['day_number'].tolist(), accepted['workout_type'].tolist()
+    ):
+        if date_str not in sessions:
+            sessions[date_str] = (int(day_number), workout_type, {})
+        sessions[date_str][2][key] = weight
+
+    for date_str, (day_number, workout_type, weights) in sessions.items():
+        if date_str in history:
+            session = history[date_str]
+            history[date_str] = {**session, 'weights': {**session.get('weights', {}), **weights}}
+            updated += 1
+        else:
+            history[date_str] = {
+                'workout_type': workout_type,
+                'day_number': day_number,
+                'program_id': program_id,
+                'weights': weights,
+                'timestamp': timestamp
+            }
+            created += 1
+
+    # Poids du corps : dernière valeur renseignée pour chaque date
+    body_weights = accepted.dropna(subset=['body_weight'])
+    body_weights = body_weights[body_weights['body_weight'] > 0].drop_duplicates('date', keep='last')
+    body_weight_history.update(dict(zip(body_weights['date'], body_weights['body_weight'].astype(float))))
+
+    return created, updated
+
+def import_history(raw, history, body_weight_history, df_programme, start_date_str, skipped_days, program_id, before_merge=None):
+    """
+    Valide puis fusionne un import ; retourne un rapport.
+    before_merge(date_min) est appelé avant la fusion, par exemple pour
+    charger les mois d'historique concernés.
+    """
+    accepted, rejected, duplicates = validate_import(raw, df_programme, start_date_str, skipped_days)
+    if before_merge is not None and not accepted.empty:
+        before_merge(accepted['date'].min())
+    created, updated = merge_into_history(history, body_weight_history, accepted, program_id)
+
+    return {
+        'accepted': len(accepted),
+        'rejected': len(rejected),
+        'duplicates': duplicates,
+        'sessions_created': created,
+        'sessions_updated': updated,
+        # Séances et exercices touchés (mise à jour des classements)
+        'dates': sorted(set(accepted['date'])),
+        'exercises': set(accepted['exercise']),
+        'reasons': rejected['motif'].value_counts().to_dict(),
+        'rejected_rows': rejected
+    }
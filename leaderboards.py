@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import database
+
+# Classements : charge max par exercice (toutes périodes), volume par
+# semaine ISO, série de semaines consécutives avec au moins une séance
+ALL_TIME = 'all'
+VOLUME_BOARD = 'volume'
+STREAK_BOARD = 'streak'
+
+def max_board(exercise):
+    return f"max:{exercise}"
+
+def week_period(date_value):
+    """Semaine ISO d'une date (AAAA-Www)"""
+    year, week, _ = date_value.isocalendar()
+    return f"{year}-W{week:02d}"
+
+def weekly_streak(session_dates, today):
+    """Semaines consécutives avec au moins une séance, jusqu'à la semaine en cours (ou la précédente)"""
+    weeks = {week_period(datetime.strptime(date_str, "%Y-%m-%d").date()) for date_str in session_dates}
+    week_start = today - timedelta(days=today.weekday())
+    if week_period(week_start) not in weeks:
+        # La semaine en cours n'est pas terminée : la série peut encore continuer
+        week_start -= timedelta(weeks=1)
+
+    streak = 0
+    while week_period(week_start) in weeks:
+        streak += 1
+        week_start -= timedelta(weeks=1)
+    return streak
+
+def session_exercises(session):
+    """Exercices d'une séance ayant au moins un poids"""
+    return {
+        "_".join(key.split('_')[1:-1])
+        for key, weight in session.get('weights', {}).items()
+        if weight > 0 and key.count('_') >= 2
+    }
+
+def session_values(flat, archived_stats, session_dates, today, dates=(), exercises=None):
+    """
+    Valeurs de l'utilisateur touchées par les séances des dates données :
+    {(classement, période): valeur}. La série de semaines est calculée sur
+    toutes les dates de séance (session_dates), les charges max sur les
+    exercises donnés (tous si None) et le volume sur les semaines des dates
+    (la semaine en cours sans date). Une valeur nulle retire l'entrée.
+    """
+    values = {(STREAK_BOARD, ALL_TIME): weekly_streak(session_dates, today)}
+
+    # Charge max de chaque exercice, archives comprises
+    if exercises is None:
+        exercises = set(flat['exercise']) | set(archived_stats)
+    if exercises:
+        maxima = flat[flat['exercise'].isin(exercises)].groupby('exercise')['weight'].max()
+        for exercise in exercises:
+            value = max(maxima.get(exercise, 0.0), archived_stats.get(exercise, {}).get('max', 0.0))
+            values[(max_board(exercise), ALL_TIME)] = float(value)
+
+    # Volume de chaque semaine touchée
+    session_days = [datetime.strptime(date_str, "%Y-%m-%d").date() for date_str in dates] or [today]
+    for week_start in {day - timedelta(days=day.weekday()) for day in session_days}:
+        volume = 0.0
+        if not flat.empty:
+            in_week = (flat['date'] >= pd.Timestamp(week_start)) & (flat['date'] < pd.Timestamp(week_start + timedelta(days=7)))
+            volume = float(flat.loc[in_week, 'weight'].sum())
+        values[(VOLUME_BOARD, week_period(week_start))] = volume
+
+    return values
+
+def update_user(supabase, flat, archived_stats, session_dates, today, dates=(), exercises=None):
+    """
+    Répercute des séances (ou toutes les données) dans les classements :
+    les valeurs de l'utilisateur connecté sont envoyées en un seul appel,
+    qui met à jour ses seules lignes de façon atomique côté base.
+    """
+    values = session_values(flat, archived_stats, session_dates, today, dates, exercises)
+    return database.submit_leaderboard_values(supabase, values)
+
+def remove_user(supabase):
+    """Retire l'utilisateur connecté de tous les classements (désinscription)"""
+    return database.leave_leaderboards(supabase)
+
+def current_boards(supabase, today):
+    """Top 10 des classements de tous temps et de la semaine en cours"""
+    return database.load_leaderboards(supabase, periods=[ALL_TIME, week_period(today)])
@@ -0,0 +1,69 @@
+import streamlit as st
+import database
+
+# Nombre de séries enregistrées avant de replier le journal dans le snapshot
+LIVE_FOLD_EVERY = 20
+
+def restore(supabase, user_id, data):
+    """
+    Reconstruit les séances en cours : snapshot du blob (live_sessions)
+    puis événements du journal non encore repliés.
+    """
+    sessions = {date_str: dict(weights) for date_str, weights in (data or {}).get('live_sessions', {}).items()}
+    last_event_id = (data or {}).get('live_folded_event_id', 0)
+
+    events = database.load_workout_events(supabase, user_id, after_id=last_event_id) or []
+    for event in events:
+        _apply(sessions, event['date'], f"{event['date']}_{event['exercise']}_{event['set_num']}", event['weight'])
+        last_event_id = max(last_event_id, event['id'])
+
+    st.session_state.live_sessions = sessions
+    st.session_state.live_last_event_id = last_event_id
+    st.session_state.live_pending_events = len(events)
+
+def _apply(sessions, date_str, key, weight):
+    weights = sessions.setdefault(date_str, {})
+    if weight > 0:
+        weights[key] = weight
+    else:
+        weights.pop(key, None)
+    if not weights:
+        del sessions[date_str]
+
+def session_weights(date_str):
+    """Poids saisis en mode live pour cette date (séance non encore enregistrée)"""
+    return st.session_state.live_sessions.get(date_str, {})
+
+def record_set(supabase, user_id, date_str, exercise, set_num, widget_key, save_snapshot):
+    """
+    Callback d'une série : ajoute un événement de taille constante au
+    journal, et replie le journal dans le snapshot tous les
+    LIVE_FOLD_EVERY événements.
+    """
+    weight = float(st.session_state[widget_key])
+    event_id = database.append_workout_event(supabase, user_id, date_str, exercise, set_num, weight)
+    if event_id is None:
+        return
+
+    _apply(st.session_state.live_sessions, date_str, widget_key, weight)
+    st.session_state.live_last_event_id = max(st.session_state.live_last_event_id, event_id)
+    st.session_state.live_pending_events += 1
+
+    if st.session_state.live_pending_events >= LIVE_FOLD_EVERY and save_snapshot():
+        folded(supabase, user_id)
+
+def finish_session(date_str):
+    """La séance est enregistrée dans l'historique : elle n'est plus en cours"""
+    st.session_state.live_sessions.pop(date_str, None)
+
+def snapshot_fields():
+    """Champs du blob décrivant les séances en cours (le snapshot)"""
+    return {
+        'live_sessions': st.session_state.live_sessions,
+        'live_folded_event_id': st.session_state.live_last_event_id
+    }
+
+def folded(supabase, user_id):
+    """Le snapshot a été sauvegardé : les événements qu'il contient peuvent être supprimés"""
+    if st.session_state.live_pending_events and database.delete_workout_events(supabase, user_id, st.session_state.live_last_event_id):
+        st.session_state.live_pending_events = 0
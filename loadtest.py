@@ -0,0 +1,231 @@
+"""
+Test de charge : simule N sessions simultanées sur le vrai app.py
+(connexion, séance du jour, saisie des poids, sauvegarde, statistiques)
+avec le testeur headless de Streamlit et un backend Supabase factice.
+Avec --gym, le parcours utilise le mode salle (?gym=1) ; les volumes
+envoyés par relance (Ko, widgets) permettent de comparer les deux.
+
+Usage :
+    python loadtest.py --sessions 1 2 4 8 --rounds 3 --latency-ms 20
+    python loadtest.py --sessions 1 4 --gym
+"""
+import argparse
+import json
+import os
+import resource
+import threading
+import time
+
+import numpy as np
+
+# Les relances headless journalisent des avertissements sans intérêt ici
+os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+# Volume envoyé par relance (profiling.start_payload_meter)
+os.environ["PAYLOAD_METER"] = "1"
+
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+
+from fake_supabase import FakeSupabase
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+SECRETS = {"SUPABASE_URL": "http://fake.local", "SUPABASE_KEY": "fake-key"}
+
+# AppTest recompile le script à chaque relance, alors que le serveur réel le
+# compile une seule fois par processus : on partage le bytecode, ce qui évite
+# aussi les compilations concurrentes (ast.parse n'est pas sûr entre threads).
+_bytecode = {}
+_compile_lock = threading.Lock()
+_original_get_bytecode = ScriptCache.get_bytecode
+
+def _shared_get_bytecode(self, script_path):
+    with _compile_lock:
+        if script_path not in _bytecode:
+            _bytecode[script_path] = _original_get_bytecode(self, script_path)
+        return _bytecode[script_path]
+
+ScriptCache.get_bytecode = _shared_get_bytecode
+
+# AppTest installe puis retire un Runtime global autour de chaque relance,
+# ce qui n'est pas prévu pour plusieurs sessions simultanées : on garde le
+# dernier Runtime vu pour que les relances concurrentes le trouvent toujours.
+_last_runtime = []
+
+def _sticky_instance(cls):
+    if cls._instance is not None:
+        _last_runtime[:] = [cls._instance]
+    if not _last_runtime:
+        raise RuntimeError("Runtime hasn't been created!")
+    return _last_runtime[0]
+
+Runtime.instance = classmethod(_sticky_instance)
+Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(_last_runtime))
+
+def current_rss_mb():
+    """Mémoire résidente actuelle du processus (Mo)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+class SimulatedUser:
+    """Un utilisateur qui déroule le parcours type de l'application"""
+
+    def __init__(self, backend, username, timeout, gym=False):
+        self.username = username
+        self.gym = gym
+        self.latencies = []
+        self.payloads = []
+        self.errors = []
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.at.secrets.update(SECRETS)
+        self.at.session_state["supabase_client"] = backend
+        if gym:
+            self.at.query_params["gym"] = "1"
+
+    def _run(self, step, action=None):
+        if action is not None:
+            action()
+        start = time.perf_counter()
+        self.at.run()
+        self.latencies.append(time.perf_counter() - start)
+        if self.at.exception:
+            self.errors.append(f"{step}: {self.at.exception[0].value}")
+        elif "payload_stats" in self.at.session_state:
+            layout = "salle" if self.gym else "normale"
+            self.payloads.append(self.at.session_state["payload_stats"].get(layout))
+
+    def _goto(self, page):
+        self._run(page, lambda: self.at.sidebar.radio[0].set_value(page))
+
+    def login(self):
+        self._run("démarrage")
+        self.at.text_input[0].input(self.username)
+        self.at.text_input[1].input("loadtest-password")
+        self._run("connexion", lambda: self.at.button[0].click())
+
+    def gym_round(self, round_num):
+        # Formulaire : les poids sont envoyés en une seule relance
+        for i, widget in enumerate(self.at.number_input):
+            widget.set_value(40.0 + 2.5 * round_num + i)
+        save_buttons = [b for b in self.at.button if "Enregistrer" in b.label]
+        if save_buttons:
+            self._run("sauvegarde", lambda: save_buttons[0].click())
+
+    def workout_round(self, round_num):
+        if self.gym:
+            return self.gym_round(round_num)
+
+        self._goto("📅 Séance du jour")
+
+        # Une relance par série saisie, comme dans le navigateur
+        set_inputs = [ni for ni in self.at.number_input if ni.label.startswith("Série")]
+        for i, _ in enumerate(set_inputs):
+            widget = [ni for ni in self.at.number_input if ni.label.startswith("Série")][i]
+            self._run("saisie", lambda w=widget: w.set_value(40.0 + 2.5 * round_num + i))
+
+        save_buttons = [b for b in self.at.button if "Enregistrer la séance" in b.label]
+        if save_buttons:
+            self._run("sauvegarde", lambda: save_buttons[0].click())
+
+        self._goto("📈 Statistiques")
+
+    def run(self, rounds, barrier):
+        try:
+            self.login()
+            barrier.wait()
+            for round_num in range(rounds):
+                self.workout_round(round_num)
+        except Exception as e:
+            self.errors.append(f"{type(e).__name__}: {e}")
+
+def run_level(backend, concurrency, rounds, timeout, level_index, gym=False):
+    """Lance `concurrency` sessions simultanées et agrège leurs mesures"""
+    users = [
+        SimulatedUser(backend, f"loadtest_{level_index}_{i}", timeout, gym)
+        for i in range(concurrency)
+    ]
+    # Le chronomètre démarre quand toutes les sessions sont connectées
+    barrier = threading.Barrier(concurrency + 1)
+    threads = [threading.Thread(target=u.run, args=(rounds, barrier)) for u in users]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    # Les relances de connexion (avant la barrière) sont exclues
+    latencies = np.array([lat for u in users for lat in u.latencies[2:]]) * 1000
+    errors = [e for u in users for e in u.errors]
+    payloads = [p for u in users for p in u.payloads[2:] if p]
+
+    return {
+        'concurrency': concurrency,
+        'reruns': int(latencies.size),
+        'p50_ms': float(np.percentile(latencies, 50)) if latencies.size else None,
+        'p95_ms': float(np.percentile(latencies, 95)) if latencies.size else None,
+        'p99_ms': float(np.percentile(latencies, 99)) if latencies.size else None,
+        'throughput_rps': latencies.size / elapsed if elapsed > 0 else None,
+        'rss_mb': current_rss_mb(),
+        'kb_per_rerun': float(np.mean([p['bytes'] for p in payloads])) / 1024 if payloads else None,
+        'widgets_per_rerun': float(np.mean([p['widgets'] for p in payloads])) if payloads else None,
+        'errors': errors,
+    }
+
+def print_report(results):
+    header = f"{'sessions':>8} {'relances':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'relances/s':>11} {'RSS Mo':>8} {'Ko/rel.':>8} {'widgets':>8} {'erreurs':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['concurrency']:>8} {r['reruns']:>9} "
+            f"{r['p50_ms'] or 0:>9.1f} {r['p95_ms'] or 0:>9.1f} {r['p99_ms'] or 0:>9.1f} "
+            f"{r['throughput_rps'] or 0:>11.1f} {r['rss_mb']:>8.1f} "
+            f"{r['kb_per_rerun'] or 0:>8.1f} {r['widgets_per_rerun'] or 0:>8.1f} {len(r['errors']):>8}"
+        )
+    for r in results:
+        for error in r['errors'][:5]:
+            print(f"[{r['concurrency']} sessions] {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de l'application Streamlit")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="Niveaux de concurrence à tester")
+    parser.add_argument("--rounds", type=int, default=3,
+                        help="Nombre de parcours complets par session")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Latence simulée de chaque appel au backend")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="Délai maximal d'une relance (s)")
+    parser.add_argument("--gym", action="store_true",
+                        help="Parcours en mode salle (?gym=1) au lieu de la mise en page normale")
+    parser.add_argument("--json", help="Écrit aussi les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    backend = FakeSupabase(latency=args.latency_ms / 1000)
+
+    # Relance de chauffe : imports, compilation du script et Runtime global
+    warmup = SimulatedUser(backend, "loadtest_warmup", args.timeout)
+    warmup.login()
+    if warmup.errors:
+        raise SystemExit(f"Échec de la relance de chauffe : {warmup.errors[0]}")
+
+    results = []
+    for level_index, concurrency in enumerate(args.sessions):
+        results.append(run_level(backend, concurrency, args.rounds, args.timeout, level_index, args.gym))
+
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
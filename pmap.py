@@ -0,0 +1,241 @@
+"""
+Dictionnaire persistant (HAMT : hash array mapped trie).
+
+Chaque modification retourne une nouvelle version qui partage avec la
+précédente tous les nœuds non modifiés : une version coûte O(log n) en
+mémoire par clé changée, et deux versions se comparent en ne parcourant
+que leurs branches différentes.
+"""
+
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+HASH_BITS = 32
+
+_MISSING = object()
+
+def _hash(key):
+    return hash(key) & 0xFFFFFFFF
+
+def _bit_index(bitmap, bit):
+    return bin(bitmap & (bit - 1)).count('1')
+
+class _Node:
+    """Nœud indexé par bitmap : chaque entrée est une feuille (hash, clé, valeur), un _Node ou une _Collision"""
+    __slots__ = ('bitmap', 'entries')
+
+    def __init__(self, bitmap, entries):
+        self.bitmap = bitmap
+        self.entries = entries
+
+class _Collision:
+    """Clés dont les 32 bits de hash sont identiques"""
+    __slots__ = ('hash', 'items')
+
+    def __init__(self, key_hash, items):
+        self.hash = key_hash
+        self.items = items
+
+_EMPTY = _Node(0, ())
+
+def _pair_node(shift, leaf1, leaf2):
+    """Nœud contenant deux feuilles de hash différents"""
+    if shift >= HASH_BITS:
+        return _Collision(leaf1[0], ((leaf1[1], leaf1[2]), (leaf2[1], leaf2[2])))
+    idx1 = (leaf1[0] >> shift) & MASK
+    idx2 = (leaf2[0] >> shift) & MASK
+    if idx1 == idx2:
+        return _Node(1 << idx1, (_pair_node(shift + BITS, leaf1, leaf2),))
+    entries = (leaf1, leaf2) if idx1 < idx2 else (leaf2, leaf1)
+    return _Node((1 << idx1) | (1 << idx2), entries)
+
+def _assoc(node, shift, key_hash, key, value):
+    """Retourne (nœud, clé ajoutée ?) ; le nœud d'origine si rien ne change"""
+    if isinstance(node, _Collision):
+        if node.hash != key_hash:
+            # Nouvelle clé d'un autre hash : descendre d'un niveau
+            parent = _Node(1 << ((node.hash >> shift) & MASK), (node,))
+            return _assoc(parent, shift, key_hash, key, value)
+        for i, (k, v) in enumerate(node.items):
+            if k == key:
+                if v is value:
+                    return node, False
+                return _Collision(key_hash, node.items[:i] + ((key, value),) + node.items[i + 1:]), False
+        return _Collision(key_hash, node.items + ((key, value),)), True
+
+    bit = 1 << ((key_hash >> shift) & MASK)
+    idx = _bit_index(node.bitmap, bit)
+    if not node.bitmap & bit:
+        entries = node.entries[:idx] + ((key_hash, key, value),) + node.entries[idx:]
+        return _Node(node.bitmap | bit, entries), True
+
+    entry = node.entries[idx]
+    if isinstance(entry, tuple):
+        entry_hash, entry_key, entry_value = entry
+        if entry_key == key:
+            if entry_value is value:
+                return node, False
+            new_entry, added = (key_hash, key, value), False
+        elif entry_hash == key_hash:
+            new_entry, added = _Collision(key_hash, ((entry_key, entry_value), (key, value))), True
+        else:
+            new_entry, added = _pair_node(shift + BITS, entry, (key_hash, key, value)), True
+    else:
+        new_entry, added = _assoc(entry, shift + BITS, key_hash, key, value)
+        if new_entry is entry:
+            return node, False
+
+    return _Node(node.bitmap, node.entries[:idx] + (new_entry,) + node.entries[idx + 1:]), added
+
+def _dissoc(node, shift, key_hash, key):
+    """Retourne le nœud sans la clé (None s'il devient vide) ; le nœud d'origine si elle est absente"""
+    if isinstance(node, _Collision):
+        items = tuple((k, v) for k, v in node.items if k != key)
+        if len(items) == len(node.items):
+            return node
+        return _Collision(key_hash, items) if items else None
+
+    bit = 1 << ((key_hash >> shift) & MASK)
+    if not node.bitmap & bit:
+        return node
+    idx = _bit_index(node.bitmap, bit)
+    entry = node.entries[idx]
+    if isinstance(entry, tuple):
+        if entry[1] != key:
+            return node
+        new_entry = None
+    else:
+        new_entry = _dissoc(entry, shift + BITS, key_hash, key)
+        if new_entry is entry:
+            return node
+
+    if new_entry is None:
+        if node.bitmap == bit:
+            return None
+        return _Node(node.bitmap & ~bit, node.entries[:idx] + node.entries[idx + 1:])
+    return _Node(node.bitmap, node.entries[:idx] + (new_entry,) + node.entries[idx + 1:])
+
+def _get(node, key_hash, key, default):
+    shift = 0
+    while True:
+        if isinstance(node, _Collision):
+            for k, v in node.items:
+                if k == key:
+                    return v
+            return default
+        bit = 1 << ((key_hash >> shift) & MASK)
+        if not node.bitmap & bit:
+            return default
+        entry = node.entries[_bit_index(node.bitmap, bit)]
+        if isinstance(entry, tuple):
+            return entry[2] if entry[1] == key else default
+        node = entry
+        shift += BITS
+
+def _items(node):
+    if isinstance(node, _Collision):
+        yield from node.items
+        return
+    for entry in node.entries:
+        if isinstance(entry, tuple):
+            yield entry[1], entry[2]
+        else:
+            yield from _items(entry)
+
+def _as_dict(entry):
+    if isinstance(entry, tuple):
+        return {entry[1]: entry[2]}
+    return dict(_items(entry))
+
+def _diff(a, b):
+    """Différences entre deux sous-arbres, sans descendre dans les branches partagées"""
+    if a is b:
+        return
+    if isinstance(a, _Node) and isinstance(b, _Node):
+        for i in range(WIDTH):
+            bit = 1 << i
+            entry_a = a.entries[_bit_index(a.bitmap, bit)] if a.bitmap & bit else None
+            entry_b = b.entries[_bit_index(b.bitmap, bit)] if b.bitmap & bit else None
+            if entry_a is entry_b:
+                continue
+            if isinstance(entry_a, _Node) and isinstance(entry_b, _Node):
+                yield from _diff(entry_a, entry_b)
+            else:
+                yield from _diff_dicts(
+                    _as_dict(entry_a) if entry_a is not None else {},
+                    _as_dict(entry_b) if entry_b is not None else {}
+                )
+        return
+    yield from _diff_dicts(dict(_items(a)), dict(_items(b)))
+
+def _diff_dicts(a, b):
+    for key in a.keys() | b.keys():
+        old, new = a.get(key, _MISSING), b.get(key, _MISSING)
+        if old is not new:
+            yield key, old, new
+
+class PMap:
+    """Dictionnaire immuable à partage structurel"""
+    __slots__ = ('_root', '_count')
+
+    def __init__(self, root=_EMPTY, count=0):
+        self._root = root
+        self._count = count
+
+    @classmethod
+    def from_dict(cls, mapping):
+        return cls().update(mapping)
+
+    def set(self, key, value):
+        """Nouvelle version où key vaut value"""
+        root, added = _assoc(self._root, 0, _hash(key), key, value)
+        if root is self._root:
+            return self
+        return PMap(root, self._count + added)
+
+    def delete(self, key):
+        """Nouvelle version sans key"""
+        root = _dissoc(self._root, 0, _hash(key), key)
+        if root is self._root:
+            return self
+        return PMap(root if root is not None else _EMPTY, self._count - 1)
+
+    def update(self, mapping):
+        result = self
+        for key, value in mapping.items():
+            result = result.set(key, value)
+        return result
+
+    def get(self, key, default=None):
+        return _get(self._root, _hash(key), key, default)
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return (key for key, _ in _items(self._root))
+
+    def items(self):
+        return _items(self._root)
+
+    def to_dict(self):
+        return dict(_items(self._root))
+
+    def diff(self, other):
+        """
+        (clé, ancienne valeur, nouvelle valeur) pour chaque clé dont la
+        valeur diffère (par identité) entre self et other ; les valeurs
+        absentes valent pmap.MISSING.
+        """
+        return _diff(self._root, other._root)
+
+MISSING = _MISSING
@@ -0,0 +1,91 @@
+"""
+Préchargement spéculatif des vues suivantes probables. Après la séance du
+jour, on consulte presque toujours la séance de demain, l'historique ou
+les statistiques des exercices du jour : ces vues sont calculées dans un
+thread une fois la relance terminée, et la navigation suivante les
+retrouve prêtes. Les succès, échecs et préchargements inutilisés sont
+comptés par session.
+
+Les calculs lancés ici ne doivent pas lire st.session_state (pas de
+contexte Streamlit dans le thread) : les données sont capturées avant.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+import state
+
+# Vues que le préchargement cherche à anticiper (premier élément de la clé)
+PREDICTED_VIEWS = {'recommendations', 'exercise', 'volume', 'history_page'}
+MAX_PENDING = 16
+
+# Partagé par toutes les sessions du processus : peu de threads pour ne pas
+# ralentir les relances en cours
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+
+MISSING = object()
+
+def init():
+    if 'prefetch' not in st.session_state:
+        # Clé de cache -> (Future, sections dont dépend la vue)
+        st.session_state.prefetch = {}
+        st.session_state.prefetch_stats = {'hits': 0, 'misses': 0, 'wasted': 0}
+
+def _discard_stale(pending):
+    """Oublie les préchargements périmés (données modifiées depuis) ou en trop"""
+    stats = st.session_state.prefetch_stats
+    for cache_key, (future, sections) in list(pending.items()):
+        if cache_key[-len(sections):] != state.generation(*sections):
+            future.cancel()
+            del pending[cache_key]
+            stats['wasted'] += 1
+    while len(pending) > MAX_PENDING:
+        future, _ = pending.pop(next(iter(pending)))
+        future.cancel()
+        stats['wasted'] += 1
+
+def needed(key, sections=('history',)):
+    """La vue n'est ni en cache ni déjà lancée"""
+    init()
+    cache_key = key + state.generation(*sections)
+    return cache_key not in st.session_state.prefetch and cache_key not in st.session_state.figure_cache
+
+def schedule(key, builder, sections=('history',)):
+    """Calcule une vue en arrière-plan si elle n'est ni en cache ni déjà lancée"""
+    if not needed(key, sections):
+        return
+    pending = st.session_state.prefetch
+    pending[key + state.generation(*sections)] = (_executor.submit(builder), sections)
+    _discard_stale(pending)
+
+def take(cache_key):
+    """
+    Vue préchargée pour cette clé (attend la fin du calcul s'il est déjà
+    en cours), ou MISSING si elle n'a pas été préchargée, a échoué ou
+    attend encore un thread libre : elle est alors annulée et calculée
+    dans la relance plutôt que derrière les autres préchargements
+    """
+    init()
+    entry = st.session_state.prefetch.pop(cache_key, None)
+    if entry is None:
+        return MISSING
+    future = entry[0]
+    if future.cancel():
+        return MISSING
+    try:
+        view = future.result()
+    except Exception:
+        return MISSING
+    st.session_state.prefetch_stats['hits'] += 1
+    return view
+
+def record_miss(key):
+    """Une vue anticipable a dû être calculée pendant la relance"""
+    init()
+    if key[0] in PREDICTED_VIEWS:
+        st.session_state.prefetch_stats['misses'] += 1
+
+def hit_ratio():
+    stats = st.session_state.get('prefetch_stats', {})
+    served = stats.get('hits', 0) + stats.get('misses', 0)
+    return stats.get('hits', 0) / served if served else None
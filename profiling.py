@@ -0,0 +1,228 @@
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import prefetch
+import programs
+import shared_cache
+
+SAMPLE_INTERVAL = 0.005  # Échantillonnage de la pile toutes les 5 ms
+MAX_CAPTURES = 5         # Captures conservées par session
+
+def is_admin():
+    """L'utilisateur connecté fait-il partie de ADMIN_USERS (secrets) ?"""
+    try:
+        admins = st.secrets.get("ADMIN_USERS", [])
+    except Exception:
+        return False
+    if isinstance(admins, str):
+        admins = [name.strip() for name in admins.split(',')]
+    return st.session_state.get('username') in admins
+
+class StackSampler(threading.Thread):
+    """
+    Échantillonne la pile d'un thread à intervalle fixe et compte les piles
+    au format "replié" (fichier:fonction;...;fichier:fonction N) attendu
+    par flamegraph.pl et speedscope.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self):
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+def request_capture():
+    """Profile la prochaine relance du script"""
+    st.session_state.profile_next_rerun = True
+
+def _stop_capture(active):
+    active['profiler'].disable()
+    active['sampler'].stop()
+
+def start_capture_if_requested():
+    """
+    Démarre le profilage de cette relance si un administrateur l'a demandé
+    (bouton de la barre latérale ou paramètre d'URL ?profile=1).
+    """
+    # Capture d'une relance interrompue (st.rerun, st.stop) avant finish_capture
+    stale = st.session_state.pop('active_profile', None)
+    if stale is not None:
+        _stop_capture(stale)
+
+    requested = st.session_state.pop('profile_next_rerun', False)
+    if st.query_params.get("profile") == "1":
+        requested = True
+        del st.query_params["profile"]
+    if not requested or not is_admin():
+        return
+
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident())
+    st.session_state.active_profile = {
+        'profiler': profiler,
+        'sampler': sampler,
+        'started_at': time.perf_counter()
+    }
+    sampler.start()
+    profiler.enable()
+
+def finish_capture(page, history_size):
+    """Arrête le profilage en cours et conserve la capture, étiquetée par page et taille d'historique"""
+    active = st.session_state.pop('active_profile', None)
+    if active is None:
+        return
+
+    _stop_capture(active)
+    duration = time.perf_counter() - active['started_at']
+
+    summary = io.StringIO()
+    stats = pstats.Stats(active['profiler'], stream=summary)
+    stats.sort_stats('cumulative').print_stats(25)
+
+    captures = st.session_state.setdefault('profile_captures', [])
+    captures.append({
+        'page': page,
+        'history_size': history_size,
+        'captured_at': datetime.now().strftime("%Y-%m-%d_%H%M%S"),
+        'duration': duration,
+        # Même format que pstats.Stats.dump_stats, relisible par pstats/snakeviz
+        'pstats': marshal.dumps(stats.stats),
+        'collapsed': active['sampler'].collapsed(),
+        'summary': summary.getvalue()
+    })
+    del captures[:-MAX_CAPTURES]
+
+class PayloadMeter:
+    """Messages envoyés au navigateur pendant une relance : octets, éléments et widgets"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.bytes = 0
+        self.messages = 0
+        self.elements = 0
+        self.widgets = 0
+
+    def count(self, msg):
+        self.messages += 1
+        self.bytes += msg.ByteSize()
+        if msg.WhichOneof('type') == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+            self.elements += 1
+            element = msg.delta.new_element
+            kind = element.WhichOneof('type')
+            # Les widgets sont les éléments porteurs d'un identifiant
+            if kind and getattr(getattr(element, kind), 'id', ''):
+                self.widgets += 1
+
+def payload_meter_enabled():
+    """Mesure réservée aux administrateurs et au test de charge (PAYLOAD_METER=1)"""
+    return is_admin() or os.environ.get("PAYLOAD_METER") == "1"
+
+def start_payload_meter():
+    """
+    Compte les messages de cette relance (enveloppe l'envoi, interne à
+    Streamlit, du contexte d'exécution de cette session uniquement)
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None or not hasattr(ctx, '_enqueue') or not payload_meter_enabled():
+        return
+    meter = getattr(ctx, 'payload_meter', None)
+    if meter is None:
+        meter = PayloadMeter()
+        send = ctx._enqueue
+
+        def enqueue(msg):
+            meter.count(msg)
+            send(msg)
+
+        ctx._enqueue = enqueue
+        ctx.payload_meter = meter
+    meter.reset()
+
+def finish_payload_meter(layout):
+    """Conserve les mesures de la relance, par mise en page (normale ou salle)"""
+    meter = getattr(get_script_run_ctx(), 'payload_meter', None)
+    if meter is None:
+        return
+    st.session_state.setdefault('payload_stats', {})[layout] = {
+        'bytes': meter.bytes,
+        'messages': meter.messages,
+        'elements': meter.elements,
+        'widgets': meter.widgets
+    }
+
+def render_sidebar():
+    """Bouton de capture et téléchargement des profils (administrateurs uniquement)"""
+    if not is_admin():
+        return
+
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### 🔬 Profilage")
+    if st.sidebar.button("Profiler la prochaine relance", key="profile_button"):
+        request_capture()
+        st.rerun()
+
+    # Taux de succès des caches, pour les dimensionner
+    cache_lines = [f"Programmes (processus) : {programs._program_cache.hit_ratio:.0%} de {programs._program_cache.hits + programs._program_cache.misses} accès"]
+    cache = shared_cache.get_shared_cache()
+    if cache is not None:
+        for category, stats in cache.stats().items():
+            cache_lines.append(f"Partagé · {category} : {stats['hit_ratio']:.0%} de {stats['hits'] + stats['misses']} accès")
+        if cache.errors:
+            cache_lines.append(f"Partagé · erreurs : {cache.errors}")
+    prefetch_stats = st.session_state.get('prefetch_stats')
+    if prefetch_stats and prefetch.hit_ratio() is not None:
+        cache_lines.append(
+            f"Préchargement : {prefetch.hit_ratio():.0%} de {prefetch_stats['hits'] + prefetch_stats['misses']} vues "
+            f"({prefetch_stats['wasted']} inutilisées)"
+        )
+    st.sidebar.caption("  \n".join(cache_lines))
+
+    # Volume envoyé au navigateur par la dernière relance de chaque mise en page
+    payload_lines = [
+        f"Relance · {layout} : {stats['bytes'] / 1024:.1f} Ko, {stats['widgets']} widgets, {stats['elements']} éléments"
+        for layout, stats in st.session_state.get('payload_stats', {}).items()
+    ]
+    if payload_lines:
+        st.sidebar.caption("  \n".join(payload_lines))
+
+    captures = st.session_state.get('profile_captures', [])
+    for position, capture in reversed(list(enumerate(captures))):
+        page_slug = ''.join(c for c in capture['page'] if c.isalnum()) or 'page'
+        name = f"profile_{page_slug}_{capture['history_size']}s_{capture['captured_at']}"
+        with st.sidebar.expander(f"{capture['page']} — {capture['duration'] * 1000:.0f} ms"):
+            st.caption(f"{capture['history_size']} séances chargées · {capture['captured_at']}")
+            st.download_button("pstats", capture['pstats'], file_name=f"{name}.pstats", key=f"profile_pstats_{position}_{name}")
+            st.download_button("Piles repliées", capture['collapsed'], file_name=f"{name}.folded", key=f"profile_folded_{position}_{name}")
+            st.code(capture['summary'][:3000])
@@ -0,0 +1,183 @@
+import threading
+import time
+
+import pandas as pd
+
+import database
+import shared_cache
+from cache import LRUCache
+
+PROGRAM_COLUMNS = ['Jour', 'Type', 'Exercice', 'Séries', 'Répétitions (RPE)', 'Notes']
+
+# Programmes chargés, partagés entre toutes les sessions du processus,
+# indexés par (id, version du catalogue)
+_program_cache = LRUCache(maxsize=16)
+
+# Dernière version du catalogue lue par le processus et date de lecture
+_catalog_lock = threading.Lock()
+_catalog_state = {'version': None, 'checked_at': 0.0}
+
+# Incrémenté quand la structure des objets Program change (picklés dans le cache partagé)
+CACHE_FORMAT = 2
+
+class _Record:
+    """Enregistrement immuable à attributs fixes (__slots__)"""
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} est immuable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} est immuable")
+
+    def __reduce__(self):
+        # Pickle sans passer par __setattr__
+        return (type(self), tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+class ExerciseSpec(_Record):
+    """Exercice prévu un jour du programme : nom, séries, répétitions (RPE), notes"""
+    __slots__ = ('name', 'sets', 'reps', 'notes')
+
+class ProgramDay(_Record):
+    """Exercices d'un jour du cycle, dans l'ordre du programme"""
+    __slots__ = ('day', 'type', 'exercises', 'max_sets', 'is_rest')
+
+    def __init__(self, day, workout_type, exercises):
+        super().__init__(
+            day,
+            workout_type,
+            exercises,
+            max((exercise.sets for exercise in exercises), default=0),
+            workout_type == 'Repos'
+        )
+
+    def __reduce__(self):
+        return (ProgramDay, (self.day, self.type, self.exercises))
+
+    def __iter__(self):
+        return iter(self.exercises)
+
+    def __len__(self):
+        return len(self.exercises)
+
+EMPTY_DAY = ProgramDay(0, None, ())
+
+def compile_days(df):
+    """
+    Regroupe les lignes du programme en ProgramDay par jour du cycle, avec
+    les types et nombres de séries déjà convertis (une seule passe)
+    """
+    rows = {}
+    notes = df['Notes'] if 'Notes' in df.columns else pd.Series("", index=df.index)
+    for jour, workout_type, name, sets, reps, note in zip(
+        df['Jour'].tolist(), df['Type'].tolist(), df['Exercice'].tolist(),
+        df['Séries'].tolist(), df['Répétitions (RPE)'].tolist(), notes.tolist()
+    ):
+        # Les lignes 'Repos' n'ont pas de nombre de séries
+        spec = ExerciseSpec(name, int(sets) if pd.notna(sets) else 0, reps, note if pd.notna(note) and note else "")
+        rows.setdefault(int(jour), (workout_type, []))[1].append(spec)
+    return {jour: ProgramDay(jour, workout_type, tuple(specs)) for jour, (workout_type, specs) in rows.items()}
+
+class Program:
+    """
+    Définition d'un programme chargée. Les pages parcourent les ProgramDay
+    de chaque jour du cycle ; le DataFrame reste disponible pour les calculs
+    groupés (import, statistiques).
+    """
+
+    def __init__(self, program_id, df):
+        if df.empty:
+            df = pd.DataFrame(columns=PROGRAM_COLUMNS)
+        self.id = program_id
+        self.df = df
+        self.length = int(df['Jour'].max()) if not df.empty else 1
+        self.days = compile_days(df) if not df.empty else {}
+
+    @property
+    def empty(self):
+        return self.df.empty
+
+    def day_in_cycle(self, day_number):
+        """Ramène un jour absolu du programme au jour du cycle"""
+        return (day_number - 1) % self.length + 1
+
+    def day(self, day_number):
+        """Retourne le ProgramDay prévu pour un jour absolu du programme"""
+        return self.days.get(self.day_in_cycle(day_number), EMPTY_DAY)
+
+    def day_type(self, day_number):
+        """Retourne le type de séance d'un jour absolu du programme"""
+        return self.day(day_number).type
+
+def catalog_version(supabase):
+    """
+    Version du catalogue d'exercices, relue au plus toutes les
+    CATALOG_VERSION_TTL secondes par processus (une erreur n'est pas retenue)
+    """
+    with _catalog_lock:
+        if time.monotonic() - _catalog_state['checked_at'] < shared_cache.CATALOG_VERSION_TTL:
+            return _catalog_state['version']
+    version = database.get_exercise_catalog_version(supabase)
+    if version is not None:
+        with _catalog_lock:
+            _catalog_state['version'] = version
+            _catalog_state['checked_at'] = time.monotonic()
+    return version
+
+def get_programs(supabase, program_ids):
+    """
+    Retourne {id: Program} pour les ids demandés. Les programmes absents
+    du cache sont chargés ensemble en une seule requête.
+    """
+    version = catalog_version(supabase)
+    result = {}
+    missing = []
+    for program_id in set(program_ids):
+        program = _program_cache.get((program_id, version))
+        if program is None:
+            missing.append(program_id)
+        else:
+            result[program_id] = program
+
+    # Puis le cache partagé entre réplicas, par version du catalogue
+    cache = shared_cache.get_shared_cache() if missing else None
+    if cache is not None:
+        for program_id in list(missing):
+            program = cache.get('programs', f"{program_id}@{version}.v{CACHE_FORMAT}")
+            if program is not None:
+                _program_cache.put((program_id, version), program)
+                result[program_id] = program
+                missing.remove(program_id)
+
+    if missing:
+        df_all = database.load_programs_by_ids(supabase, missing)
+        for program_id in missing:
+            if df_all.empty:
+                df = pd.DataFrame()
+            else:
+                df = df_all[df_all['program_id'] == program_id].reset_index(drop=True)
+            program = Program(program_id, df)
+            # Ne pas garder en cache un programme vide (erreur ou id inconnu)
+            if not program.empty:
+                _program_cache.put((program_id, version), program)
+                if cache is not None:
+                    cache.set('programs', f"{program_id}@{version}.v{CACHE_FORMAT}", program)
+            result[program_id] = program
+
+    return result
+
+def get_program(supabase, program_id):
+    """Retourne le Program correspondant à un id"""
+    return get_programs(supabase, [program_id])[program_id]
+
+def session_program_id(session, default_program_id):
+    """Programme suivi lors d'une séance (programme actif pour les anciennes séances)"""
+    return session.get('program_id', default_program_id)
@@ -0,0 +1,124 @@
+import bisect
+import threading
+import time
+
+import database
+from gymtracking import analytics
+
+CATALOG_CHECK_INTERVAL = 300  # Vérifier la version du catalogue toutes les 5 min
+MIN_FUZZY_SCORE = 0.35
+
+def _trigrams(text):
+    """Trigrammes d'un nom normalisé (avec bornes de début et de fin)"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class ExerciseIndex:
+    """
+    Index de recherche sur les noms d'exercices, insensible aux accents et
+    à la casse : préfixe du nom, préfixe de chaque mot, puis approximatif
+    (trigrammes) pour les fautes de frappe.
+    """
+
+    def __init__(self, names):
+        self.names = sorted(set(names), key=analytics.normalize_name)
+        self.normalized = [analytics.normalize_name(name) for name in self.names]
+
+        # Mots de chaque nom, triés pour la recherche par préfixe
+        self.words = sorted(
+            (word, i)
+            for i, normalized in enumerate(self.normalized)
+            for word in normalized.split()
+        )
+        self.word_keys = [word for word, _ in self.words]
+
+        # Index inversé trigramme -> noms
+        self.trigrams = {}
+        self.trigram_counts = []
+        for i, normalized in enumerate(self.normalized):
+            grams = _trigrams(normalized)
+            self.trigram_counts.append(len(grams))
+            for gram in grams:
+                self.trigrams.setdefault(gram, []).append(i)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _word_prefix_matches(self, word):
+        start = bisect.bisect_left(self.word_keys, word)
+        end = bisect.bisect_left(self.word_keys, word + "￿")
+        return {i for _, i in self.words[start:end]}
+
+    def search(self, query, limit=20):
+        """Retourne les noms d'exercices correspondant à la requête, les meilleurs en premier"""
+        query = analytics.normalize_name(query)
+        if not query:
+            return []
+
+        results = []
+        seen = set()
+
+        def add(indexes):
+            for i in sorted(indexes, key=lambda i: self.normalized[i]):
+                if i not in seen and len(results) < limit:
+                    seen.add(i)
+                    results.append(self.names[i])
+
+        # 1. Le nom commence par la requête
+        start = bisect.bisect_left(self.normalized, query)
+        end = bisect.bisect_left(self.normalized, query + "￿")
+        add(range(start, end))
+
+        # 2. Chaque mot de la requête est le début d'un mot du nom
+        if len(results) < limit:
+            matches = None
+            for word in query.split():
+                word_matches = self._word_prefix_matches(word)
+                matches = word_matches if matches is None else matches & word_matches
+            add(matches or [])
+
+        # 3. Recherche approximative (coefficient de Dice sur les trigrammes)
+        if len(results) < limit:
+            query_grams = _trigrams(query)
+            shared = {}
+            for gram in query_grams:
+                for i in self.trigrams.get(gram, ()):
+                    shared[i] = shared.get(i, 0) + 1
+            scored = [
+                (2 * count / (len(query_grams) + self.trigram_counts[i]), i)
+                for i, count in shared.items()
+                if i not in seen
+            ]
+            scored.sort(key=lambda item: (-item[0], self.normalized[item[1]]))
+            for score, i in scored:
+                if score < MIN_FUZZY_SCORE or len(results) >= limit:
+                    break
+                seen.add(i)
+                results.append(self.names[i])
+
+        return results
+
+# Index partagé entre les sessions, reconstruit quand le catalogue change
+_index_lock = threading.Lock()
+_index_state = {'version': None, 'index': None, 'checked_at': 0.0}
+
+def get_exercise_index(supabase):
+    """Retourne l'index des exercices de tous les programmes (une construction par version du catalogue)"""
+    with _index_lock:
+        if _index_state['index'] is not None and time.time() - _index_state['checked_at'] < CATALOG_CHECK_INTERVAL:
+            return _index_state['index']
+        index, indexed_version = _index_state['index'], _index_state['version']
+
+    # Requêtes hors du verrou : les autres sessions gardent l'index courant
+    version = database.get_exercise_catalog_version(supabase)
+    if version is None or version != indexed_version:
+        names = database.get_exercise_names(supabase)
+        if names is None:
+            return index or ExerciseIndex([])
+        index = ExerciseIndex(name for name in names if name != 'Repos')
+
+    with _index_lock:
+        _index_state['index'] = index
+        _index_state['version'] = version
+        _index_state['checked_at'] = time.time()
+    return index
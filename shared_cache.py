@@ -0,0 +1,242 @@
+"""
+Cache partagé entre les réplicas de l'application (optionnel).
+
+Activé par SHARED_CACHE_URL (secrets Streamlit ou variable d'environnement) :
+    redis://hôte:6379/0          serveur Redis (ou compatible), paquet `redis`
+    sqlite:///chemin/cache.db    fichier sur disque partagé entre processus
+
+Chaque espace de noms a une version stockée dans le cache : une écriture
+l'incrémente, ce qui rend inaccessibles les entrées précédentes pour tous
+les réplicas. Sans configuration, toutes les fonctions se comportent comme
+un cache toujours vide.
+
+Les valeurs sont picklées et signées (HMAC-SHA256) avec SHARED_CACHE_KEY :
+une entrée écrite par un tiers ayant accès au stockage n'est jamais
+désérialisée. Sans clé, le cache partagé reste désactivé.
+"""
+import hashlib
+import hmac
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+import streamlit as st
+
+DEFAULT_TTL = 3600          # Durée de vie des entrées (s)
+CATALOG_VERSION_TTL = 300   # Version du catalogue vérifiée au plus toutes les 5 min
+STAT_CATEGORIES = ['programs', 'catalog', 'user']
+STATS_FLUSH_INTERVAL = 30   # Compteurs de succès envoyés au stockage au plus toutes les 30 s
+SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+class DiskStore:
+    """Stockage clé/valeur SQLite, partageable entre processus d'une même machine"""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute(
+            "create table if not exists cache (key text primary key, value blob, expires_at real)"
+        )
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("select value, expires_at from cache where key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return row[0]
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "insert or replace into cache (key, value, expires_at) values (?, ?, ?)",
+                (key, value, expires_at)
+            )
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            return self._conn.execute(
+                "insert into cache (key, value, expires_at) values (?, ?, null) "
+                "on conflict(key) do update set value = cast(value as integer) + excluded.value returning value",
+                (key, amount)
+            ).fetchone()[0]
+
+class RedisStore:
+    """Stockage Redis (ou serveur compatible : Valkey, KeyDB, Dragonfly...)"""
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self._client.get(key)
+
+    def set(self, key, value, ttl=None):
+        self._client.set(key, value, ex=ttl)
+
+    def incr(self, key, amount=1):
+        return self._client.incr(key, amount)
+
+class SharedCache:
+    """Cache versionné par espace de noms, avec compteurs de succès partagés"""
+
+    def __init__(self, store, secret, prefix="gymtracking"):
+        self.store = store
+        self.secret = secret.encode() if isinstance(secret, str) else secret
+        self.prefix = prefix
+        self.errors = 0
+        # Compteurs de succès du processus, ajoutés au stockage par lots
+        self._pending_stats = Counter()
+        self._stats_lock = threading.Lock()
+        self._stats_flushed_at = time.monotonic()
+
+    def _key(self, *parts):
+        return ":".join([self.prefix, *map(str, parts)])
+
+    def _sign(self, payload):
+        return hmac.new(self.secret, payload, hashlib.sha256).digest()
+
+    def _dumps(self, value):
+        payload = pickle.dumps(value)
+        return self._sign(payload) + payload
+
+    def _loads(self, raw):
+        """Désérialise une entrée, ou None si sa signature est invalide"""
+        signature, payload = raw[:SIGNATURE_SIZE], raw[SIGNATURE_SIZE:]
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            self.errors += 1
+            return None
+        return pickle.loads(payload)
+
+    def _count(self, namespace, outcome):
+        category = namespace.split(':', 1)[0]
+        with self._stats_lock:
+            self._pending_stats[(category, outcome)] += 1
+            due = time.monotonic() - self._stats_flushed_at >= STATS_FLUSH_INTERVAL
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """Ajoute les compteurs locaux aux compteurs partagés"""
+        with self._stats_lock:
+            pending, self._pending_stats = self._pending_stats, Counter()
+            self._stats_flushed_at = time.monotonic()
+        try:
+            for (category, outcome), count in pending.items():
+                self.store.incr(self._key("stats", category, outcome), count)
+        except Exception:
+            self.errors += 1
+
+    def version(self, namespace):
+        return int(self.store.get(self._key("version", namespace)) or 0)
+
+    def get(self, namespace, key, version=None):
+        """Valeur en cache pour la version (courante par défaut) de l'espace de noms, ou None"""
+        try:
+            if version is None:
+                version = self.version(namespace)
+            raw = self.store.get(self._key(namespace, version, key))
+            value = self._loads(raw) if raw is not None else None
+            self._count(namespace, "hits" if value is not None else "misses")
+            return value
+        except Exception:
+            # Un cache indisponible ne doit jamais bloquer l'application
+            self.errors += 1
+            return None
+
+    def set(self, namespace, key, value, ttl=DEFAULT_TTL, version=None):
+        try:
+            if version is None:
+                version = self.version(namespace)
+            self.store.set(self._key(namespace, version, key), self._dumps(value), ttl)
+        except Exception:
+            self.errors += 1
+
+    def get_or_load(self, namespace, key, loader, ttl=DEFAULT_TTL):
+        """
+        Valeur en cache, sinon chargée par loader() puis mise en cache sous
+        la version lue avant le chargement : une écriture concurrente ne
+        peut pas être masquée par une valeur plus ancienne.
+        """
+        try:
+            version = self.version(namespace)
+        except Exception:
+            self.errors += 1
+            return loader()
+        value = self.get(namespace, key, version)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(namespace, key, value, ttl, version)
+        return value
+
+    def invalidate(self, namespace):
+        """Rend obsolètes les entrées de l'espace de noms pour tous les réplicas"""
+        try:
+            self.store.incr(self._key("version", namespace))
+        except Exception:
+            self.errors += 1
+
+    def stats(self):
+        """Succès, échecs et taux de succès par catégorie (tous réplicas confondus)"""
+        self.flush_stats()
+        stats = {}
+        for category in STAT_CATEGORIES:
+            try:
+                hits = int(self.store.get(self._key("stats", category, "hits")) or 0)
+                misses = int(self.store.get(self._key("stats", category, "misses")) or 0)
+            except Exception:
+                self.errors += 1
+                continue
+            total = hits + misses
+            stats[category] = {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else 0.0}
+        return stats
+
+def _setting(name):
+    try:
+        value = st.secrets.get(name)
+    except Exception:
+        value = None
+    return value or os.environ.get(name)
+
+_cache_lock = threading.Lock()
+_cache_state = {'configured': False, 'cache': None}
+
+def get_shared_cache():
+    """Cache partagé du processus, ou None s'il n'est pas configuré"""
+    with _cache_lock:
+        if not _cache_state['configured']:
+            url = _setting("SHARED_CACHE_URL")
+            secret = _setting("SHARED_CACHE_KEY")
+            if url and not secret:
+                print("SHARED_CACHE_URL ignoré : SHARED_CACHE_KEY manquant pour signer les entrées", file=sys.stderr)
+            elif url and url.startswith(("redis://", "rediss://")):
+                _cache_state['cache'] = SharedCache(RedisStore(url), secret)
+            elif url and url.startswith("sqlite:///"):
+                _cache_state['cache'] = SharedCache(DiskStore(url[len("sqlite:///"):]), secret)
+            _cache_state['configured'] = True
+        return _cache_state['cache']
+
+def get_or_load(namespace, key, loader, ttl=DEFAULT_TTL):
+    """Valeur du cache partagé, sinon chargée par loader() (None n'est jamais mis en cache)"""
+    cache = get_shared_cache()
+    if cache is None:
+        return loader()
+    return cache.get_or_load(namespace, key, loader, ttl)
+
+def invalidate_user(user_id):
+    """Une écriture des données d'un utilisateur rend ses entrées obsolètes partout"""
+    cache = get_shared_cache()
+    if cache is not None:
+        cache.invalidate(f"user:{user_id}")
+
+def store_user_value(user_id, key, value):
+    """Écriture directe (write-through) d'une donnée utilisateur qui vient d'être sauvegardée"""
+    cache = get_shared_cache()
+    if cache is not None:
+        cache.set(f"user:{user_id}", key, value)
@@ -0,0 +1,117 @@
+"""
+Modifications des données de l'utilisateur en mémoire.
+
+Toute modification passe par ces fonctions, qui incrémentent le compteur
+de génération de la section touchée. Les caches de données dérivées
+(statistiques, graphiques, recommandations) sont indexés par ces
+compteurs : l'invalidation est exacte et ne coûte rien, sans avoir à
+comparer ou hacher l'historique.
+
+Les clés modifiées (dates de séance, jours skippés...) sont aussi notées,
+pour que l'annulation (undo.record) ne compare que ces entrées et que la
+sauvegarde ne réécrive que les mois concernés.
+"""
+import streamlit as st
+
+SECTIONS = ('history', 'skips', 'body_weight', 'settings')
+
+# Données de st.session_state -> section
+SECTION_OF = {
+    'history': 'history',
+    'skipped_days': 'skips',
+    'skipped_exercises': 'skips',
+    'body_weight_history': 'body_weight',
+    'start_date': 'settings',
+    'target_body_weight': 'settings',
+    'target_body_weight_date': 'settings',
+    'selected_program_id': 'settings',
+    'leaderboard_opt_in': 'settings',
+}
+
+def init():
+    if 'generations' not in st.session_state:
+        st.session_state.generations = dict.fromkeys(SECTIONS, 0)
+    if 'changed_keys' not in st.session_state:
+        st.session_state.changed_keys = {}
+
+def generation(*sections):
+    """Compteurs des sections (clé de cache des données qui en dépendent)"""
+    return tuple(st.session_state.generations[section] for section in sections)
+
+def _mark(name, keys=None):
+    """Note les clés modifiées d'une donnée (None : donnée entière)"""
+    changed = st.session_state.changed_keys
+    if keys is None:
+        changed[name] = None
+    elif changed.get(name, set()) is not None:
+        changed[name] = changed.get(name, set()) | set(keys)
+
+def _changed(name, keys=None):
+    st.session_state.generations[SECTION_OF[name]] += 1
+    _mark(name, keys)
+
+def take_changes():
+    """Clés modifiées par donnée depuis l'appel précédent (None : donnée entière)"""
+    changed = st.session_state.changed_keys
+    st.session_state.changed_keys = {}
+    return changed
+
+def touch(*sections):
+    """Signale une modification faite hors de cette API (ex. import en place)"""
+    for section in sections:
+        st.session_state.generations[section] += 1
+        for name, name_section in SECTION_OF.items():
+            if name_section == section:
+                _mark(name)
+
+def assign(name, value, changed_keys=None):
+    """
+    Remplace une donnée (historique, skips, poids du corps ou réglage) ;
+    changed_keys : seules clés qui diffèrent de la valeur précédente, si connues
+    """
+    st.session_state[name] = value
+    _changed(name, changed_keys)
+
+# Historique
+def set_session(date_str, session):
+    st.session_state.history[date_str] = session
+    _changed('history', [date_str])
+
+def delete_session(date_str):
+    if st.session_state.history.pop(date_str, None) is not None:
+        _changed('history', [date_str])
+
+def add_sessions(sessions):
+    """
+    Ajoute des séances chargées après coup (mois plus anciens) : ce ne sont
+    pas des modifications, ni à enregistrer ni à annuler
+    """
+    if sessions:
+        st.session_state.history.update(sessions)
+        st.session_state.generations['history'] += 1
+
+def sessions_changed(dates):
+    """Signale des séances modifiées en place hors de cette API (ex. import)"""
+    if dates:
+        _changed('history', dates)
+
+# Skips
+def skip_day(date_str):
+    if date_str not in st.session_state.skipped_days:
+        st.session_state.skipped_days.append(date_str)
+        _changed('skipped_days', [date_str])
+
+def unskip_day(date_str):
+    if date_str in st.session_state.skipped_days:
+        st.session_state.skipped_days.remove(date_str)
+        _changed('skipped_days', [date_str])
+
+def set_exercise_skip(exercise_key, skipped):
+    if st.session_state.skipped_exercises.get(exercise_key, False) != skipped:
+        st.session_state.skipped_exercises[exercise_key] = skipped
+        _changed('skipped_exercises', [exercise_key])
+
+# Poids du corps
+def set_body_weight(date_str, weight):
+    st.session_state.body_weight_history[date_str] = weight
+    _changed('body_weight_history', [date_str])
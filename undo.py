@@ -0,0 +1,159 @@
+"""
+Annuler / rétablir les modifications de l'historique, des jours et
+exercices skippés et du poids du corps.
+
+Chaque état est un ensemble de dictionnaires persistants (pmap.PMap) :
+un nouvel état partage tout ce qui n'a pas changé avec le précédent, et
+ne coûte que les entrées modifiées. Les valeurs (séances, booléens,
+poids) ne sont jamais modifiées en place, elles sont remplacées.
+
+Les clés modifiées depuis le dernier enregistrement (state.take_changes())
+sont passées à record : seule une donnée remplacée en entier est comparée
+en entier.
+"""
+import streamlit as st
+
+import state
+from pmap import PMap, MISSING
+
+MAX_UNDO = 20  # Niveaux d'annulation conservés
+
+def _lookup(values, key):
+    return values.get(key, MISSING)
+
+# Données suivies : nom dans st.session_state -> (vers dictionnaire, depuis
+# dictionnaire, valeur d'une clé)
+TRACKED = {
+    'history': (dict, dict, _lookup),
+    'skipped_days': (
+        lambda days: dict.fromkeys(days, True),
+        lambda days: sorted(days),
+        lambda days, key: True if key in days else MISSING
+    ),
+    'skipped_exercises': (dict, dict, _lookup),
+    'body_weight_history': (dict, dict, _lookup),
+}
+
+def init():
+    """État initial, après chargement des données"""
+    state.take_changes()
+    st.session_state.undo = {
+        'state': {name: PMap.from_dict(to_dict(st.session_state[name])) for name, (to_dict, _, _) in TRACKED.items()},
+        'undo': [],
+        'redo': []
+    }
+
+def _sync(snapshot, values):
+    """Nouvelle version du snapshot avec les seules entrées qui ont changé"""
+    for key, value in values.items():
+        previous = snapshot.get(key, MISSING)
+        if previous is not value and previous != value:
+            snapshot = snapshot.set(key, value)
+    if len(snapshot) > len(values):
+        for key in [key for key in snapshot if key not in values]:
+            snapshot = snapshot.delete(key)
+    return snapshot
+
+def _sync_keys(snapshot, values, keys, lookup):
+    """Comme _sync, en ne comparant que les clés modifiées"""
+    for key in keys:
+        value = lookup(values, key)
+        previous = snapshot.get(key, MISSING)
+        if value is MISSING:
+            if previous is not MISSING:
+                snapshot = snapshot.delete(key)
+        elif previous is not value and previous != value:
+            snapshot = snapshot.set(key, value)
+    return snapshot
+
+def record(label, changes):
+    """
+    Enregistre l'état courant comme une action annulable (sans effet si rien
+    n'a changé) ; changes : clés modifiées par donnée, de state.take_changes()
+    """
+    undo_state = st.session_state.undo
+    previous = undo_state['state']
+    current = dict(previous)
+    for name, keys in changes.items():
+        if name not in TRACKED:
+            continue
+        to_dict, _, lookup = TRACKED[name]
+        if keys is None:
+            current[name] = _sync(previous[name], to_dict(st.session_state[name]))
+        else:
+            current[name] = _sync_keys(previous[name], st.session_state[name], keys, lookup)
+    if all(current[name] is previous[name] for name in TRACKED):
+        return
+
+    undo_state['undo'].append((label, previous))
+    del undo_state['undo'][:-MAX_UNDO]
+    undo_state['redo'] = []
+    undo_state['state'] = current
+
+def absorb_loaded(sessions):
+    """
+    Ajoute des séances chargées après coup (mois plus anciens) à tous les
+    états : elles n'ont pas été modifiées et ne doivent pas être effacées
+    par une annulation.
+    """
+    undo_state = st.session_state.undo
+
+    def absorb(snapshot):
+        history = snapshot['history']
+        for date_str, session in sessions.items():
+            if date_str not in history:
+                history = history.set(date_str, session)
+        return {**snapshot, 'history': history}
+
+    undo_state['state'] = absorb(undo_state['state'])
+    undo_state['undo'] = [(label, absorb(snapshot)) for label, snapshot in undo_state['undo']]
+    undo_state['redo'] = [(label, absorb(snapshot)) for label, snapshot in undo_state['redo']]
+
+def undo_label():
+    stack = st.session_state.undo['undo']
+    return stack[-1][0] if stack else None
+
+def redo_label():
+    stack = st.session_state.undo['redo']
+    return stack[-1][0] if stack else None
+
+def _restore(target):
+    """
+    Revient à un état : seules les entrées différentes de l'état courant
+    sont appliquées. Retourne {donnée: clés modifiées}.
+    """
+    undo_state = st.session_state.undo
+    changes = {}
+    for name, (to_dict, from_dict, _) in TRACKED.items():
+        current = undo_state['state'][name]
+        changed = set()
+        values = to_dict(st.session_state[name])
+        for key, _, new in current.diff(target[name]):
+            if new is MISSING:
+                values.pop(key, None)
+            else:
+                values[key] = new
+            changed.add(key)
+        if changed:
+            state.assign(name, from_dict(values), changed)
+            changes[name] = changed
+    undo_state['state'] = target
+    return changes
+
+def undo():
+    """Annule la dernière action ; retourne les clés modifiées par donnée"""
+    undo_state = st.session_state.undo
+    if not undo_state['undo']:
+        return {}
+    label, target = undo_state['undo'].pop()
+    undo_state['redo'].append((label, undo_state['state']))
+    return _restore(target)
+
+def redo():
+    """Rétablit la dernière action annulée ; retourne les clés modifiées par donnée"""
+    undo_state = st.session_state.undo
+    if not undo_state['redo']:
+        return {}
+    label, target = undo_state['redo'].pop()
+    undo_state['undo'].append((label, undo_state['state']))
+    return _restore(target)